@@ -0,0 +1,273 @@
+"""
+Latency, memory and ranking-quality benchmark for the recommender pipeline.
+
+    python benchmarks/bench_recommender.py                        # 100 .. 100k
+    python benchmarks/bench_recommender.py --sizes 100 1000 --save-baseline
+    python benchmarks/bench_recommender.py --baseline benchmarks/baseline.json
+
+Stages timed at each pool size: build_soup, build_feature_frame, fit_tfidf,
+the VADER sentiment pass, the batch sentiment scorer and recommend_hybrid. Peak memory comes from a
+separate tracemalloc run so it does not distort the timings.
+
+Ranking quality is precision@10 against ground truth: cluster mates for the
+synthetic catalog, and TMDB's similar_movies lists for recorded fixtures in
+benchmarks/fixtures/ (create them with --record <movie ids>, needs TMDB_API_KEY).
+
+With a baseline file, the run exits 1 when a stage is slower or hungrier than
+baseline * (1 + threshold), or quality drops by more than --quality-tol.
+"""
+import argparse
+import glob
+import json
+import math
+import os
+import platform
+import random
+import sys
+import time
+import tracemalloc
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(HERE), "src"))
+sys.path.insert(0, HERE)
+
+from features import build_soup, hydrate_movie  # noqa: E402
+from recommender import (  # noqa: E402
+    _sentiment, build_feature_frame, fit_tfidf, recommend_hybrid,
+)
+from batch_sentiment import score_overviews  # noqa: E402
+from synthetic import cluster_truth, iter_catalog  # noqa: E402
+
+FIXTURE_DIR = os.path.join(HERE, "fixtures")
+DEFAULT_BASELINE = os.path.join(HERE, "baseline.json")
+DEFAULT_SIZES = [100, 1000, 10000, 100000]
+STAGES = [
+    "build_soup", "build_feature_frame", "fit_tfidf", "sentiment", "sentiment_batch", "recommend_hybrid",
+]
+
+
+def _timed(fn, repeat):
+    """Best-of-`repeat` wall time plus the last result."""
+    best, result = math.inf, None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - t0)
+    return best, result
+
+
+def _peak_mb(fn):
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak / 2**20
+
+
+def precision_at_k(truth, ranked, k=10):
+    """Mean share of the top-k recommendations that appear in the ground truth list."""
+    scores = []
+    for seed_id, recs in ranked:
+        relevant = set(truth.get(seed_id, []))
+        if not relevant:
+            continue
+        hits = len(set(recs[:k]) & relevant)
+        scores.append(hits / min(k, len(relevant)))
+    return sum(scores) / len(scores) if scores else None
+
+
+def _rank(df, mat, seed_ids, top_n=10):
+    return [(sid, recommend_hybrid(df, mat, sid, top_n=top_n)["id"].tolist()) for sid in seed_ids]
+
+
+def bench_size(n, repeat, n_seeds, with_memory):
+    """All stage timings (and optionally peak memory) for a synthetic pool of n movies."""
+    result = {}
+
+    soup_time, soup_peak, movies = 0.0, 0.0, []
+    for chunk in iter_catalog(n):
+        t, _ = _timed(lambda: [build_soup(det) for det in chunk], repeat)
+        soup_time += t
+        if with_memory:
+            soup_peak = max(soup_peak, _peak_mb(lambda: [build_soup(det) for det in chunk]))
+        movies.extend(hydrate_movie(det) for det in chunk)
+    result["build_soup"] = {"time_s": soup_time}
+    if with_memory:
+        result["build_soup"]["peak_mb"] = soup_peak
+
+    t, df = _timed(lambda: build_feature_frame(movies), repeat)
+    result["build_feature_frame"] = {"time_s": t}
+
+    t, (_, mat) = _timed(lambda: fit_tfidf(df), repeat)
+    result["fit_tfidf"] = {"time_s": t}
+
+    t, sentiment = _timed(lambda: df["overview"].apply(_sentiment), 1)
+    result["sentiment"] = {"time_s": t}
+    df["sentiment"] = sentiment
+
+    t, _ = _timed(lambda: score_overviews(df["overview"]), repeat)
+    result["sentiment_batch"] = {"time_s": t}
+
+    rng = random.Random(n)
+    seed_ids = [int(x) for x in rng.sample(list(df["id"]), min(n_seeds, len(df)))]
+    t, ranked = _timed(lambda: _rank(df, mat, seed_ids), repeat)
+    result["recommend_hybrid"] = {"time_s": t / len(seed_ids)}
+
+    if with_memory:
+        result["build_feature_frame"]["peak_mb"] = _peak_mb(lambda: build_feature_frame(movies))
+        result["fit_tfidf"]["peak_mb"] = _peak_mb(lambda: fit_tfidf(df))
+        # VADER holds nothing per document, so a 1000-overview sample bounds the peak
+        result["sentiment"]["peak_mb"] = _peak_mb(lambda: df["overview"].head(1000).apply(_sentiment))
+        result["sentiment_batch"]["peak_mb"] = _peak_mb(lambda: score_overviews(df["overview"]))
+        result["recommend_hybrid"]["peak_mb"] = _peak_mb(lambda: recommend_hybrid(df, mat, seed_ids[0]))
+
+    quality = precision_at_k(cluster_truth(n), ranked)
+    return result, quality
+
+
+def bench_fixtures(n_seeds):
+    """precision@10 against recorded TMDB similar_movies lists, per fixture file."""
+    out = {}
+    for path in sorted(glob.glob(os.path.join(FIXTURE_DIR, "*.json"))):
+        with open(path, encoding="utf-8") as f:
+            fixture = json.load(f)
+
+        movies = [hydrate_movie(det) for det in fixture["movies"]]
+        df = build_feature_frame(movies)
+        _, mat = fit_tfidf(df)
+
+        in_pool = set(df["id"])
+        truth = {int(k): [m for m in v if m in in_pool] for k, v in fixture["similar"].items()}
+        seeds = [sid for sid in truth if sid in in_pool][:n_seeds]
+        out[os.path.basename(path)] = precision_at_k(truth, _rank(df, mat, seeds))
+    return out
+
+
+def scaling_exponents(results):
+    """Log-log slope of time vs. pool size between consecutive sizes (1.0 = linear)."""
+    curves = {}
+    sizes = sorted(results, key=int)
+    for stage in STAGES:
+        slopes = []
+        for a, b in zip(sizes, sizes[1:]):
+            ta, tb = results[a][stage]["time_s"], results[b][stage]["time_s"]
+            if ta > 0 and tb > 0:
+                slopes.append(round(math.log(tb / ta) / math.log(int(b) / int(a)), 2))
+        curves[stage] = slopes
+    return curves
+
+
+def compare(run, baseline, threshold, quality_tol, min_time):
+    """Regression messages for anything worse than the stored baseline."""
+    problems = []
+    for size, stages in run["results"].items():
+        for stage, metrics in stages.items():
+            base = baseline.get("results", {}).get(size, {}).get(stage)
+            if not base:
+                continue
+            t, bt = metrics["time_s"], base["time_s"]
+            if t > min_time and t > bt * (1 + threshold):
+                problems.append(f"{stage} @ {size}: {t * 1000:.1f} ms vs baseline {bt * 1000:.1f} ms")
+            if "peak_mb" in metrics and "peak_mb" in base and metrics["peak_mb"] > base["peak_mb"] * (1 + threshold):
+                problems.append(
+                    f"{stage} @ {size}: peak {metrics['peak_mb']:.1f} MB vs baseline {base['peak_mb']:.1f} MB"
+                )
+
+    for name, q in run["quality"].items():
+        bq = baseline.get("quality", {}).get(name)
+        if q is not None and bq is not None and q < bq - quality_tol:
+            problems.append(f"quality {name}: precision@10 {q:.3f} vs baseline {bq:.3f}")
+    return problems
+
+
+def record_fixture(seed_ids, name):
+    """Save seeds, their TMDB similar lists and every referenced movie's details."""
+    from tmdb_client import movie_details, similar_movies
+
+    similar, wanted = {}, []
+    for sid in seed_ids:
+        ids = []
+        for page in [1, 2]:
+            ids += [m["id"] for m in similar_movies(sid, page=page).get("results", [])]
+        similar[str(sid)] = ids
+        wanted += [sid] + ids
+
+    movies = [movie_details(mid) for mid in dict.fromkeys(wanted)]
+    os.makedirs(FIXTURE_DIR, exist_ok=True)
+    path = os.path.join(FIXTURE_DIR, f"{name}.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"movies": movies, "similar": similar}, f)
+    print(f"recorded {len(movies)} movies for {len(seed_ids)} seeds -> {path}")
+
+
+def print_table(run):
+    sizes = sorted(run["results"], key=int)
+    print(f"{'stage':<22}" + "".join(f"{s:>14}" for s in sizes) + "   slope")
+    for stage in STAGES:
+        cells = []
+        for s in sizes:
+            m = run["results"][s][stage]
+            cell = f"{m['time_s'] * 1000:.1f}ms"
+            if "peak_mb" in m:
+                cell += f"/{m['peak_mb']:.0f}M"
+            cells.append(f"{cell:>14}")
+        print(f"{stage:<22}" + "".join(cells) + "   " + ",".join(map(str, run["scaling"][stage])))
+    for name, q in run["quality"].items():
+        print(f"precision@10 {name}: {'n/a' if q is None else f'{q:.3f}'}")
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--seeds", type=int, default=20, help="seeds per size for recommend_hybrid and quality")
+    ap.add_argument("--no-memory", action="store_true", help="skip the tracemalloc runs")
+    ap.add_argument("--baseline", default=DEFAULT_BASELINE)
+    ap.add_argument("--save-baseline", action="store_true")
+    ap.add_argument("--threshold", type=float, default=0.25, help="allowed slowdown / memory growth")
+    ap.add_argument("--quality-tol", type=float, default=0.05)
+    ap.add_argument("--min-time", type=float, default=0.005, help="ignore timing regressions under this (s)")
+    ap.add_argument("--out", help="also write the run as JSON here")
+    ap.add_argument("--record", type=int, nargs="+", metavar="MOVIE_ID", help="record a fixture and exit")
+    ap.add_argument("--record-name", default="recorded")
+    args = ap.parse_args(argv)
+
+    if args.record:
+        record_fixture(args.record, args.record_name)
+        return 0
+
+    run = {"python": platform.python_version(), "machine": platform.machine(), "results": {}, "quality": {}}
+    for n in args.sizes:
+        print(f"pool size {n} …", flush=True)
+        stages, quality = bench_size(n, args.repeat, args.seeds, not args.no_memory)
+        run["results"][str(n)] = stages
+        run["quality"][f"synthetic_{n}"] = quality
+    run["quality"].update(bench_fixtures(args.seeds))
+    run["scaling"] = scaling_exponents(run["results"])
+
+    print_table(run)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(run, f, indent=2)
+
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(run, f, indent=2)
+        print(f"baseline saved to {args.baseline}")
+        return 0
+
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding="utf-8") as f:
+            problems = compare(run, json.load(f), args.threshold, args.quality_tol, args.min_time)
+        for p in problems:
+            print("REGRESSION:", p)
+        return 1 if problems else 0
+
+    print("no baseline yet; run with --save-baseline to store one")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
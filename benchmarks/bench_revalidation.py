@@ -0,0 +1,95 @@
+"""
+Bytes on the wire per cache refresh cycle, against the offline TMDB stand-in.
+
+    python benchmarks/bench_revalidation.py --movies 2000 --details 500 --churn 0 0.05 0.25
+
+Warms tmdb_client's cache with `--details` movie detail payloads, then for
+each churn fraction edits that share of the stand-in catalog, expires every
+cache entry and refreshes them all twice: once conditionally (the normal
+expired-entry path: If-None-Match, 304 for unchanged movies) and once from an
+empty cache. Reports body bytes on the wire, decoded bytes, 304 counts and the saving.
+"""
+import argparse
+import json
+import os
+import sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(HERE), "src"))
+sys.path.insert(0, HERE)
+
+import tmdb_client  # noqa: E402
+from tmdb_standin import serve  # noqa: E402
+
+
+def _expire_all():
+    with tmdb_client._cache_lock:
+        for key, entry in tmdb_client._cache.items():
+            tmdb_client._cache[key] = (0.0,) + entry[1:]
+
+
+def _cycle(ids):
+    before = tmdb_client.transfer_report()
+    for mid in ids:
+        tmdb_client.movie_details(mid)
+    after = tmdb_client.transfer_report()
+    return {k: after[k] - before[k] for k in ("requests", "full_responses", "not_modified",
+                                              "wire_bytes", "decoded_bytes", "bytes_saved_by_304")}
+
+
+def run(n_movies, n_details, churns):
+    server, catalog, _, base_url = serve(n_movies)
+    tmdb_client.BASE_URL = base_url
+    os.environ.setdefault("TMDB_API_KEY", "offline")
+    ids = sorted(catalog.movies)[:n_details]
+
+    try:
+        tmdb_client._cache.clear()
+        report = {"movies": n_movies, "details": len(ids), "cold": _cycle(ids), "cycles": []}
+        for churn in churns:
+            changed = set(catalog.churn(churn))
+            _expire_all()
+            conditional = _cycle(ids)
+
+            tmdb_client._cache.clear()
+            unconditional = _cycle(ids)
+
+            full = unconditional["wire_bytes"]
+            report["cycles"].append({
+                "churn": churn,
+                "changed_in_sample": len(changed.intersection(ids)),
+                "conditional": conditional,
+                "unconditional": unconditional,
+                "wire_saved_ratio": 1 - conditional["wire_bytes"] / full if full else None,
+                "gzip_ratio": full / unconditional["decoded_bytes"] if unconditional["decoded_bytes"] else None,
+            })
+    finally:
+        server.shutdown()
+    return report
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Measure bytes saved by conditional, compressed refreshes.")
+    ap.add_argument("--movies", type=int, default=2000, help="stand-in catalog size")
+    ap.add_argument("--details", type=int, default=500, help="detail payloads kept in the cache")
+    ap.add_argument("--churn", type=float, nargs="+", default=[0.0, 0.05, 0.25])
+    ap.add_argument("--out", help="also write the report as JSON")
+    args = ap.parse_args(argv)
+
+    report = run(args.movies, args.details, args.churn)
+    print(f"cold fill: {report['cold']['wire_bytes']:,} wire bytes for {report['details']} details")
+    print(f"\n{'churn':>6} {'changed':>8} {'304s':>6} {'conditional':>12} {'full':>12} {'saved':>7} {'gzip':>6}")
+    for c in report["cycles"]:
+        print(
+            f"{c['churn']:>6.2f} {c['changed_in_sample']:>8} {c['conditional']['not_modified']:>6} "
+            f"{c['conditional']['wire_bytes']:>12,} {c['unconditional']['wire_bytes']:>12,} "
+            f"{c['wire_saved_ratio']:>7.1%} {c['gzip_ratio']:>6.2f}"
+        )
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
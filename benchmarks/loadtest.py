@@ -0,0 +1,380 @@
+"""
+Concurrent-session load test for one `streamlit run src/app.py` instance.
+
+    python benchmarks/loadtest.py                          # ramp 1 2 4 8 16 sessions
+    python benchmarks/loadtest.py --sessions 1 4 16 32 --iterations 3 --out loadtest.json
+
+For each concurrency level this starts the offline TMDB stand-in (once) and a
+fresh app server with its own empty data directory, primes it with one
+unmeasured session, then runs N scripted sessions at once. Each session talks
+to the server over Streamlit's websocket protocol the way a browser tab does
+(BackMsg rerun requests carrying widget states, waiting for script_finished)
+and repeats this script:
+
+    load        open the app (full run)
+    search      type a title into the search box
+    seed_pick   "Use as seed" on the first result (search-tab fragment)
+    slider      move the sidebar "Min rating" slider (full run, recs rebuilt)
+    watchlist   add the first recommendation (watchlist-button fragment)
+    nl_query    type a natural-language query (NL-tab fragment)
+    trending    rerun the trending tab (trending fragment)
+
+Reported per level: p50 / p95 / p99 latency per interaction, interactions/s,
+server CPU seconds and RSS growth per session (from /proc, Linux only), and
+errors. The saturation point is the last level before throughput stops
+growing by --min-gain or seed_pick p95 exceeds --p95-factor x its 1-session
+value. Needs the `websockets` package (pip install -r benchmarks/requirements.txt).
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+import numpy as np
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+APP = os.path.join(os.path.dirname(HERE), "src", "app.py")
+sys.path.insert(0, HERE)
+
+from tmdb_standin import serve  # noqa: E402
+
+INTERACTIONS = ["load", "search", "seed_pick", "slider", "watchlist", "nl_query", "trending"]
+NL_QUERIES = [
+    "drama after 2000 rating over 6",
+    "comedy 90s under 120 min",
+    "thriller rating >= 7",
+    "romance after 2010",
+]
+FINISHED_EARLY_FOR_RERUN = 2
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+# ---------- server process ----------
+
+def _proc_cpu_s(pid):
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            fields = f.read().rsplit(")", 1)[1].split()
+        return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def _proc_rss_mb(pid):
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+
+class AppServer:
+    """`streamlit run src/app.py` in a subprocess with an isolated data dir."""
+
+    def __init__(self, tmdb_url, warmer=False):
+        self.port = _free_port()
+        self.data_dir = tempfile.mkdtemp(prefix="cinecompass-load-")
+        env = dict(os.environ)
+        env.update({
+            "TMDB_BASE_URL": tmdb_url,
+            "TMDB_API_KEY": "offline",
+            "CINECOMPASS_WARMER": "1" if warmer else "0",
+            "CINECOMPASS_CATALOG": os.path.join(self.data_dir, "catalog"),
+            "CINECOMPASS_NEIGHBOURS": os.path.join(self.data_dir, "neighbours"),
+            "CINECOMPASS_WATCH_EVENTS": os.path.join(self.data_dir, "watchlist_events.jsonl"),
+            "CINECOMPASS_COWATCH": os.path.join(self.data_dir, "cowatch.json"),
+        })
+        self.proc = subprocess.Popen(
+            [sys.executable, "-m", "streamlit", "run", APP, "--server.headless", "true",
+             "--server.port", str(self.port), "--browser.gatherUsageStats", "false"],
+            env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        self._wait_healthy()
+
+    def _wait_healthy(self, timeout=60):
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            if self.proc.poll() is not None:
+                raise RuntimeError("streamlit exited during startup")
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{self.port}/_stcore/health", timeout=2) as r:
+                    if r.status == 200:
+                        return
+            except OSError:
+                time.sleep(0.3)
+        raise RuntimeError("streamlit did not become healthy")
+
+    @property
+    def ws_url(self):
+        return f"ws://127.0.0.1:{self.port}/_stcore/stream"
+
+    def cpu_s(self):
+        return _proc_cpu_s(self.proc.pid)
+
+    def rss_mb(self):
+        return _proc_rss_mb(self.proc.pid)
+
+    def stop(self):
+        self.proc.terminate()
+        try:
+            self.proc.wait(10)
+        except subprocess.TimeoutExpired:
+            self.proc.kill()
+        shutil.rmtree(self.data_dir, ignore_errors=True)
+
+
+# ---------- one browser-like session ----------
+
+class Session:
+    """Minimal Streamlit client: keeps the element tree and widget values of one tab."""
+
+    def __init__(self, ws_url, timeout=120):
+        self.ws_url = ws_url
+        self.timeout = timeout
+        self.elements = {}   # delta path -> (element type, proto, fragment id)
+        self.widgets = {}    # widget id -> WidgetState kept across reruns, like the frontend
+        self.errors = []
+        self.ws = None
+
+    async def __aenter__(self):
+        import websockets
+        self.ws = await websockets.connect(self.ws_url, subprotocols=["streamlit"], max_size=None)
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.ws.close()
+
+    def find(self, etype, label=None, key_contains=None, body_contains=None):
+        for path in sorted(self.elements):
+            t, proto, fragment_id = self.elements[path]
+            if t != etype:
+                continue
+            if label is not None and getattr(proto, "label", None) != label:
+                continue
+            if key_contains is not None and key_contains not in getattr(proto, "id", ""):
+                continue
+            if body_contains is not None and body_contains not in getattr(proto, "body", ""):
+                continue
+            return proto, fragment_id
+        return None, None
+
+    async def rerun(self, set_values=None, trigger=None, fragment_id=""):
+        """Send one rerun request and wait for the script (or fragment) to finish; returns seconds."""
+        from streamlit.proto.BackMsg_pb2 import BackMsg
+        from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+        from streamlit.proto.WidgetStates_pb2 import WidgetState
+
+        for widget_id, apply in (set_values or {}).items():
+            state = WidgetState(id=widget_id)
+            apply(state)
+            self.widgets[widget_id] = state
+
+        msg = BackMsg()
+        rerun = msg.rerun_script
+        rerun.page_script_hash = ""
+        rerun.widget_states.widgets.extend(self.widgets.values())
+        if trigger is not None:
+            rerun.widget_states.widgets.append(WidgetState(id=trigger, trigger_value=True))
+        if fragment_id:
+            rerun.fragment_id = fragment_id
+        else:
+            self.elements.clear()
+
+        started = time.perf_counter()
+        await self.ws.send(msg.SerializeToString())
+        while True:
+            raw = await asyncio.wait_for(self.ws.recv(), self.timeout)
+            fm = ForwardMsg()
+            fm.ParseFromString(raw)
+            kind = fm.WhichOneof("type")
+            if kind == "delta" and fm.delta.WhichOneof("type") == "new_element":
+                el = fm.delta.new_element
+                etype = el.WhichOneof("type")
+                self.elements[tuple(fm.metadata.delta_path)] = (etype, getattr(el, etype), fm.delta.fragment_id)
+                if etype == "exception":
+                    self.errors.append(el.exception.message)
+            elif kind == "script_finished" and fm.script_finished != FINISHED_EARLY_FOR_RERUN:
+                return time.perf_counter() - started
+
+    async def click(self, proto, fragment_id):
+        return await self.rerun(trigger=proto.id, fragment_id=fragment_id)
+
+
+async def run_script(url, rng, latencies):
+    """One pass of the scripted interactions; appends (interaction, seconds) to latencies."""
+    async with Session(url) as s:
+        latencies.append(("load", await s.rerun()))
+
+        text, frag = s.find("text_input", label="Search")
+        query = f"Movie {rng.randint(1, 99)}"
+        latencies.append(("search", await s.rerun(
+            set_values={text.id: lambda w: setattr(w, "string_value", query)}, fragment_id=frag,
+        )))
+
+        seed, frag = s.find("button", label="Use as seed")
+        if seed is not None:
+            latencies.append(("seed_pick", await s.click(seed, frag)))
+
+        rating, _ = s.find("slider", label="Min rating")
+        if rating is not None:
+            value = round(rng.uniform(5.0, 6.5), 1)
+            latencies.append(("slider", await s.rerun(
+                set_values={rating.id: lambda w: w.double_array_value.data.append(value)},
+            )))
+
+        add, frag = s.find("button", label="➕ Watchlist", key_contains="-rec_")
+        if add is not None:
+            latencies.append(("watchlist", await s.click(add, frag)))
+
+        nl, frag = s.find("text_input", label="Describe what you want:")
+        if nl is not None:
+            q = rng.choice(NL_QUERIES)
+            latencies.append(("nl_query", await s.rerun(
+                set_values={nl.id: lambda w: setattr(w, "string_value", q)}, fragment_id=frag,
+            )))
+
+        _, frag = s.find("markdown", body_contains="Trending this week")
+        if frag:
+            latencies.append(("trending", await s.rerun(fragment_id=frag)))
+        return s.errors
+
+
+async def _session(url, idx, seed, iterations, think):
+    rng = random.Random(seed * 1000 + idx)
+    latencies, errors = [], []
+    for _ in range(iterations):
+        try:
+            errors += await run_script(url, rng, latencies)
+        except Exception as e:  # noqa: BLE001 - a failed session is a data point, not a crash
+            errors.append(f"{type(e).__name__}: {e}")
+        await asyncio.sleep(think)
+    return latencies, errors
+
+
+async def _level(url, n, seed, iterations, think):
+    results = await asyncio.gather(*(_session(url, i, seed, iterations, think) for i in range(n)))
+    return [lat for r in results for lat in r[0]], [err for r in results for err in r[1]]
+
+
+# ---------- ramp ----------
+
+def _percentiles(values):
+    arr = np.asarray(values) * 1000
+    return {p: round(float(np.percentile(arr, q)), 1) for p, q in (("p50", 50), ("p95", 95), ("p99", 99))}
+
+
+def run_level(tmdb_url, n, seed=7, iterations=2, think=0.2, warmer=False):
+    server = AppServer(tmdb_url, warmer=warmer)
+    try:
+        asyncio.run(_level(server.ws_url, 1, seed + 1, 1, 0))  # prime caches, unmeasured
+        cpu0, rss0 = server.cpu_s(), server.rss_mb()
+        started = time.perf_counter()
+        latencies, errors = asyncio.run(_level(server.ws_url, n, seed, iterations, think))
+        wall = time.perf_counter() - started
+        cpu1, rss1 = server.cpu_s(), server.rss_mb()
+    finally:
+        server.stop()
+
+    per = {}
+    for name in INTERACTIONS:
+        values = [t for k, t in latencies if k == name]
+        if values:
+            per[name] = dict(_percentiles(values), count=len(values))
+    return {
+        "sessions": n,
+        "wall_s": round(wall, 2),
+        "interactions": len(latencies),
+        "throughput_per_s": round(len(latencies) / wall, 2) if wall else None,
+        "cpu_s_per_session": round((cpu1 - cpu0) / n, 3) if cpu0 is not None and cpu1 is not None else None,
+        "server_cpu_util": round((cpu1 - cpu0) / wall, 2) if cpu0 is not None and cpu1 is not None else None,
+        "rss_mb_per_session": round((rss1 - rss0) / n, 2) if rss0 is not None and rss1 is not None else None,
+        "latency_ms": per,
+        "errors": errors[:10],
+        "error_count": len(errors),
+    }
+
+
+def saturation(levels, min_gain, p95_factor):
+    """Last level before throughput stalls or seed-pick p95 blows past p95_factor x the first level."""
+    if not levels:
+        return None
+    base = levels[0]["latency_ms"].get("seed_pick", {}).get("p95")
+    sat = levels[0]["sessions"]
+    for prev, cur in zip(levels, levels[1:]):
+        stalled = cur["throughput_per_s"] < prev["throughput_per_s"] * (1 + min_gain)
+        p95 = cur["latency_ms"].get("seed_pick", {}).get("p95")
+        slow = base is not None and p95 is not None and p95 > base * p95_factor
+        if stalled or slow:
+            return {"sessions": sat, "reason": "throughput stalled" if stalled else "seed_pick p95 degraded"}
+        sat = cur["sessions"]
+    return {"sessions": sat, "reason": "not reached"}
+
+
+def _print_level(level):
+    print(
+        f"\n{level['sessions']} sessions: {level['throughput_per_s']} interactions/s, "
+        f"server CPU {level['server_cpu_util']} cores, {level['cpu_s_per_session']} CPU s and "
+        f"{level['rss_mb_per_session']} MB RSS per session, {level['error_count']} errors"
+    )
+    print(f"  {'interaction':<11} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'n':>5}")
+    for name, stats in level["latency_ms"].items():
+        print(f"  {name:<11} {stats['p50']:>9} {stats['p95']:>9} {stats['p99']:>9} {stats['count']:>5}")
+    for err in level["errors"][:3]:
+        print(f"  error: {err[:120]}")
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Ramp concurrent scripted sessions against one app instance.")
+    ap.add_argument("--sessions", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    ap.add_argument("--iterations", type=int, default=2, help="script passes per session")
+    ap.add_argument("--think", type=float, default=0.2, help="seconds between passes")
+    ap.add_argument("--movies", type=int, default=3000, help="stand-in catalog size")
+    ap.add_argument("--seed", type=int, default=7)
+    ap.add_argument("--warmer", action="store_true", help="leave the cache warmer on")
+    ap.add_argument("--min-gain", type=float, default=0.1)
+    ap.add_argument("--p95-factor", type=float, default=3.0)
+    ap.add_argument("--out", help="also write the report as JSON")
+    args = ap.parse_args(argv)
+
+    try:
+        import websockets  # noqa: F401
+    except ImportError:
+        print("loadtest needs the websockets package: pip install -r benchmarks/requirements.txt")
+        return 1
+
+    tmdb, _, _, tmdb_url = serve(args.movies, seed=args.seed)
+    levels = []
+    try:
+        for n in args.sessions:
+            level = run_level(tmdb_url, n, args.seed, args.iterations, args.think, args.warmer)
+            levels.append(level)
+            _print_level(level)
+    finally:
+        tmdb.shutdown()
+
+    sat = saturation(levels, args.min_gain, args.p95_factor)
+    print(f"\nsaturation: {sat['sessions']} sessions ({sat['reason']})")
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump({"args": vars(args), "levels": levels, "saturation": sat}, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,128 @@
+"""
+Synthetic TMDB /movie/{id} payloads (credits, keywords, release_dates appended).
+
+Movies are generated in clusters that share genres, keywords, cast, a director
+and a plot vocabulary, so "the other movies in my cluster" is a usable ground
+truth for ranking quality when no recorded fixtures are available.
+
+The labels are deliberately noisy: every movie also borrows from the next
+cluster over, and DRIFT of them lean on that cluster more than their own while
+keeping their original label, so a perfect score is out of reach and a
+ranking regression still shows.
+"""
+import random
+
+GENRES = [
+    (28, "Action"), (12, "Adventure"), (16, "Animation"), (35, "Comedy"),
+    (80, "Crime"), (99, "Documentary"), (18, "Drama"), (10751, "Family"),
+    (14, "Fantasy"), (36, "History"), (27, "Horror"), (10402, "Music"),
+    (9648, "Mystery"), (10749, "Romance"), (878, "Science Fiction"),
+    (53, "Thriller"), (10752, "War"), (37, "Western"),
+]
+CERTS = ["G", "PG", "PG-13", "R", "NC-17", ""]
+CREW_JOBS = ["Writer", "Editor", "Producer", "Composer"]
+LANGS = ["en"] * 6 + ["fr", "es", "ko", "ja", "de"]
+DRIFT = 0.25  # share of movies drawn mostly from the neighbouring cluster
+
+PLOT_WORDS = (
+    "a young detective must uncover the truth behind a series of strange events "
+    "in a small town where nothing is what it seems friends family love betrayal "
+    "war journey city night secret mission escape heist revenge dream school "
+    "island ship planet robot monster ghost king queen soldier doctor lawyer"
+).split()
+MOOD_WORDS = (
+    "happy joyful wonderful hilarious delightful love brave hope triumph "
+    "terrible brutal deadly grief fear horror murder tragic lonely dark"
+).split()
+
+
+def _name(rng, prefix):
+    return f"{prefix} {rng.randint(0, 10**6)}"
+
+
+def _cluster(rng, cid):
+    genres = rng.sample(GENRES, 2)
+    return {
+        "id": cid,
+        "genres": genres,
+        "keywords": [(cid * 100 + i, f"topic{cid} {i}") for i in range(12)],
+        "cast": [_name(rng, "Actor") for _ in range(10)],
+        "director": _name(rng, "Director"),
+        "plot": rng.sample(PLOT_WORDS, 12),
+        "mood": rng.sample(MOOD_WORDS, 3),
+    }
+
+
+def make_movie(rng, movie_id, cluster, n_cast=20, n_crew=30, neighbour=None):
+    """
+    One raw details payload drawn from a cluster (and partly from `neighbour`,
+    see DRIFT), padded like real responses.
+    """
+    own, other = cluster, neighbour or cluster
+    if rng.random() < DRIFT:
+        own, other = other, own
+
+    cast = list(dict.fromkeys(rng.sample(own["cast"], 4) + rng.sample(other["cast"], 1)))
+    cast += [f"Extra {movie_id}-{k}" for k in range(n_cast - len(cast))]
+    crew = [{"name": f"Crew {movie_id}-{k}", "job": CREW_JOBS[k % len(CREW_JOBS)]}
+            for k in range(n_crew)]
+    crew.insert(rng.randint(0, n_crew), {"name": own["director"], "job": "Director"})
+
+    words = rng.sample(own["plot"], 6) + rng.sample(other["plot"], 2) + rng.sample(PLOT_WORDS, 10) + own["mood"]
+    rng.shuffle(words)
+    keywords = list(dict.fromkeys(rng.sample(own["keywords"], 4) + rng.sample(other["keywords"], 2)))
+
+    year = rng.randint(1950, 2025)
+    return {
+        "id": movie_id,
+        "title": f"Movie {movie_id}",
+        "overview": " ".join(words).capitalize() + ".",
+        "vote_average": round(rng.uniform(3.0, 9.0), 1),
+        "vote_count": rng.randint(0, 30000),
+        "popularity": round(rng.uniform(0.5, 300.0), 3),
+        "release_date": f"{year}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+        "runtime": rng.randint(70, 200),
+        "original_language": rng.choice(LANGS),
+        "poster_path": None,
+        "genres": [{"id": gid, "name": name} for gid, name in own["genres"]],
+        "keywords": {"keywords": [{"id": kid, "name": name} for kid, name in keywords]},
+        "credits": {"cast": [{"name": n, "character": "x"} for n in cast], "crew": crew},
+        "release_dates": {"results": [
+            {"iso_3166_1": country, "release_dates": [{"certification": rng.choice(CERTS), "type": 3}]}
+            for country in ["US", "GB", "FR", "DE"]
+        ]},
+    }
+
+
+def iter_catalog(n, cluster_size=20, seed=7, chunk=10000):
+    """
+    Yield n payloads in lists of at most `chunk`, so 100k-movie runs never
+    hold every raw payload at once. Deterministic for (n, cluster_size, seed).
+    """
+    rng = random.Random(seed)
+    n_clusters = max(1, n // cluster_size)
+    clusters = [_cluster(rng, cid) for cid in range(n_clusters)]
+
+    batch = []
+    for i in range(n):
+        cid = i % n_clusters
+        batch.append(make_movie(rng, i + 1, clusters[cid], neighbour=clusters[(cid + 1) % n_clusters]))
+        if len(batch) == chunk:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def cluster_truth(n, cluster_size=20):
+    """Ground truth {movie_id: [other ids in the same cluster]} for iter_catalog(n)."""
+    n_clusters = max(1, n // cluster_size)
+    members = {}
+    for i in range(n):
+        members.setdefault(i % n_clusters, []).append(i + 1)
+
+    truth = {}
+    for ids in members.values():
+        for mid in ids:
+            truth[mid] = [x for x in ids if x != mid]
+    return truth
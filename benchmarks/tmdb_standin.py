@@ -0,0 +1,252 @@
+"""
+Offline stand-in for the slice of the TMDB v3 API the app uses, serving the
+synthetic catalog from synthetic.py:
+
+    python benchmarks/tmdb_standin.py --movies 5000 --port 8765
+    TMDB_BASE_URL=http://127.0.0.1:8765/3 TMDB_API_KEY=offline streamlit run src/app.py
+
+Endpoints: /movie/{id}, /movie/{id}/similar, /search/movie, /search/person,
+/trending/movie/week and /discover/movie (genre, rating, vote, runtime, date
+and language filters; other params are ignored). Every response carries a
+strong ETag and a Last-Modified date, answers If-None-Match /
+If-Modified-Since with 304, and is gzipped when the client asks for it.
+churn(fraction) edits a random slice of movies so revalidation sees a
+realistic mix of 200s and 304s.
+"""
+import argparse
+import gzip
+import hashlib
+import json
+import random
+import re
+import sys
+import threading
+import time
+from email.utils import formatdate, parsedate_to_datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from synthetic import iter_catalog
+
+PAGE_SIZE = 20
+_MOVIE = re.compile(r"^/3/movie/(\d+)(/similar)?$")
+
+
+def _summary(m):
+    return {
+        "id": m["id"],
+        "title": m["title"],
+        "overview": m["overview"],
+        "vote_average": m["vote_average"],
+        "vote_count": m["vote_count"],
+        "popularity": m["popularity"],
+        "release_date": m["release_date"],
+        "poster_path": m["poster_path"],
+        "original_language": m["original_language"],
+        "genre_ids": [g["id"] for g in m["genres"]],
+    }
+
+
+def _page(results, page):
+    page = max(1, int(page or 1))
+    start = (page - 1) * PAGE_SIZE
+    return {
+        "page": page,
+        "results": [_summary(m) for m in results[start:start + PAGE_SIZE]],
+        "total_results": len(results),
+        "total_pages": max(1, -(-len(results) // PAGE_SIZE)),
+    }
+
+
+class StandInCatalog:
+    """The synthetic movies plus per-movie modification times."""
+
+    def __init__(self, n=2000, cluster_size=20, seed=7):
+        self.movies = {}
+        for batch in iter_catalog(n, cluster_size=cluster_size, seed=seed):
+            for m in batch:
+                self.movies[m["id"]] = m
+        self.n_clusters = max(1, n // cluster_size)
+        now = int(time.time())
+        self.modified = dict.fromkeys(self.movies, now)
+        self.list_modified = now
+        self.by_popularity = sorted(self.movies.values(), key=lambda m: -m["popularity"])
+        self.lock = threading.Lock()
+        self._rng = random.Random(seed + 1)
+
+    def churn(self, fraction):
+        """Change vote stats on a random fraction of movies; returns their ids."""
+        with self.lock:
+            picked = self._rng.sample(list(self.movies), int(len(self.movies) * fraction))
+            stamp = max(int(time.time()), self.list_modified + 1)  # Last-Modified has 1 s resolution
+            for mid in picked:
+                m = self.movies[mid]
+                m["vote_count"] += self._rng.randint(1, 50)
+                m["vote_average"] = round(min(10.0, max(0.0, m["vote_average"] + self._rng.uniform(-0.2, 0.2))), 1)
+                self.modified[mid] = stamp
+            self.list_modified = stamp
+        return picked
+
+    def similar(self, movie_id):
+        cluster = (movie_id - 1) % self.n_clusters
+        return [m for m in self.by_popularity
+                if (m["id"] - 1) % self.n_clusters == cluster and m["id"] != movie_id]
+
+    def discover(self, q):
+        def keep(m):
+            genres = {g["id"] for g in m["genres"]}
+            if q.get("with_genres"):
+                wanted = q["with_genres"]
+                ids = [int(x) for x in re.split(r"[,|]", wanted)]
+                if ("|" in wanted and not genres.intersection(ids)) or ("|" not in wanted and not genres.issuperset(ids)):
+                    return False
+            checks = [
+                ("vote_average.gte", m["vote_average"], float, False),
+                ("vote_average.lte", m["vote_average"], float, True),
+                ("vote_count.gte", m["vote_count"], float, False),
+                ("vote_count.lte", m["vote_count"], float, True),
+                ("with_runtime.gte", m["runtime"], float, False),
+                ("with_runtime.lte", m["runtime"], float, True),
+                ("primary_release_date.gte", m["release_date"], str, False),
+                ("primary_release_date.lte", m["release_date"], str, True),
+            ]
+            for key, value, cast, upper in checks:
+                if key in q and (value > cast(q[key]) if upper else value < cast(q[key])):
+                    return False
+            lang = q.get("with_original_language")
+            return not lang or m["original_language"] == lang
+
+        field, _, direction = q.get("sort_by", "popularity.desc").partition(".")
+        field = {"primary_release_date": "release_date"}.get(field, field)
+        results = [m for m in self.movies.values() if keep(m)]
+        results.sort(key=lambda m: m.get(field) or 0, reverse=direction != "asc")
+        return results
+
+    def resolve(self, path, q):
+        """(payload, last_modified) for a request, or (None, None) for a 404."""
+        with self.lock:
+            match = _MOVIE.match(path)
+            if match:
+                mid = int(match.group(1))
+                if mid not in self.movies:
+                    return None, None
+                if match.group(2):
+                    return _page(self.similar(mid), q.get("page")), self.list_modified
+                return self.movies[mid], self.modified[mid]
+
+            if path == "/3/search/movie":
+                needle = q.get("query", "").lower()
+                hits = [m for m in self.by_popularity if needle and needle in m["title"].lower()]
+                return _page(hits, q.get("page")), self.list_modified
+            if path == "/3/search/person":
+                needle = q.get("query", "").lower()
+                people = sorted({c["name"] for m in self.by_popularity[:500]
+                                 for c in m["credits"]["cast"] + m["credits"]["crew"]
+                                 if needle and needle in c["name"].lower()})
+                results = [{"id": int(hashlib.md5(name.encode()).hexdigest()[:7], 16), "name": name} for name in people[:PAGE_SIZE]]
+                return {"page": 1, "results": results, "total_results": len(results)}, self.list_modified
+            if path == "/3/trending/movie/week":
+                return _page(self.by_popularity, 1), self.list_modified
+            if path == "/3/discover/movie":
+                return _page(self.discover(q), q.get("page")), self.list_modified
+        return None, None
+
+
+def make_handler(catalog, stats):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def _send(self, status, body=b"", headers=None):
+            self.send_response(status)
+            for k, v in (headers or {}).items():
+                self.send_header(k, v)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            if body:
+                self.wfile.write(body)
+            with catalog.lock:
+                stats[status] = stats.get(status, 0) + 1
+                stats["bytes_sent"] = stats.get("bytes_sent", 0) + len(body)
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            q = {k: v[0] for k, v in parse_qs(url.query).items()}
+            if not q.pop("api_key", None):
+                self._send(401, b'{"status_message": "Invalid API key"}', {"Content-Type": "application/json"})
+                return
+
+            payload, modified = catalog.resolve(url.path, q)
+            if payload is None:
+                self._send(404, b'{"status_message": "Not found"}', {"Content-Type": "application/json"})
+                return
+
+            body = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+            etag = '"%s"' % hashlib.blake2b(body, digest_size=12).hexdigest()
+            headers = {"ETag": etag, "Last-Modified": formatdate(modified, usegmt=True),
+                       "Cache-Control": "public, max-age=3600"}
+
+            if_none_match = self.headers.get("If-None-Match")
+            if_modified_since = self.headers.get("If-Modified-Since")
+            if if_none_match is not None:
+                not_modified = etag in [t.strip() for t in if_none_match.split(",")]
+            elif if_modified_since:
+                try:
+                    not_modified = parsedate_to_datetime(if_modified_since).timestamp() >= modified
+                except (TypeError, ValueError):
+                    not_modified = False
+            else:
+                not_modified = False
+            if not_modified:
+                self._send(304, headers=headers)
+                return
+
+            headers["Content-Type"] = "application/json;charset=utf-8"
+            if "gzip" in self.headers.get("Accept-Encoding", ""):
+                body = gzip.compress(body, compresslevel=6)
+                headers["Content-Encoding"] = "gzip"
+                headers["Vary"] = "Accept-Encoding"
+            self._send(200, body, headers)
+
+    return Handler
+
+
+def serve(n=2000, host="127.0.0.1", port=0, cluster_size=20, seed=7):
+    """
+    Start the stand-in on a daemon thread. Returns (server, catalog, stats, base_url);
+    point the app at it with TMDB_BASE_URL=base_url and call server.shutdown() when done.
+    """
+    catalog = StandInCatalog(n, cluster_size=cluster_size, seed=seed)
+    stats = {}
+    server = ThreadingHTTPServer((host, port), make_handler(catalog, stats))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="tmdb-standin", daemon=True).start()
+    base_url = f"http://{host}:{server.server_address[1]}/3"
+    return server, catalog, stats, base_url
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Offline TMDB stand-in serving the synthetic catalog.")
+    ap.add_argument("--movies", type=int, default=2000)
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8765)
+    ap.add_argument("--churn", type=float, default=0.0, help="fraction of movies edited every --churn-every s")
+    ap.add_argument("--churn-every", type=float, default=300.0)
+    args = ap.parse_args(argv)
+
+    server, catalog, _, base_url = serve(args.movies, args.host, args.port)
+    print(f"serving {len(catalog.movies)} movies at {base_url}  (Ctrl+C to stop)")
+    try:
+        while True:
+            time.sleep(args.churn_every if args.churn else 3600)
+            if args.churn:
+                print(f"churned {len(catalog.churn(args.churn))} movies")
+    except KeyboardInterrupt:
+        server.shutdown()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,18 +1,108 @@
+import os
+import uuid
+from contextlib import contextmanager
+
 import streamlit as st
 import streamlit.components.v1 as components
 
 from tmdb_client import (
     search_movie, search_person, movie_details,
-    discover_movies, trending_movies, similar_movies
+    discover_movies, trending_movies, similar_movies, projection_report,
+    transfer_report
 )
-from features import build_soup, extract_certification, top_director
+from features import DETAILS_SCHEMA_VERSION, extract_certification, hydrate_movie
 from recommender import (
-    build_feature_frame, fit_tfidf,
-    recommend_hybrid, explain_similarity
+    build_feature_frame, fit_tfidf, fit_hashed,
+    recommend_hybrid, explain_similarity, build_incidence
 )
 from nlp_query import parse_nl_query, GENRE_WORDS
+from catalog import Catalog
+from filter_index import FilterIndex
+from cache_warmer import CacheWarmer, WARMER_ENABLED
+from profiler import RerunProfiler
+from batch_sentiment import score_overviews
+from neighbours import load_table
+from cowatch import CoWatch, record_add
+import rerun_meter
 
 st.set_page_config(page_title="CineCompass", layout="wide")
+rerun_meter.begin_full_run()
+
+# Tabs, the search grid's seed picks and watchlist buttons rerun as isolated
+# fragments; CINECOMPASS_FRAGMENTS=0 restores full-script reruns for comparison.
+FRAGMENTS = os.getenv("CINECOMPASS_FRAGMENTS", "1") != "0"
+fragment = st.fragment if FRAGMENTS else (lambda fn: fn)
+
+# ---------- optional rerun profiling (?profile=1 or CINECOMPASS_PROFILE=1) ----------
+# A full run is captured top to bottom; a fragment rerun (seed pick, watchlist
+# button, one tab) is captured around its rerun_scope.
+PROFILE_ALL = os.getenv("CINECOMPASS_PROFILE") == "1"
+
+
+def active_profiler():
+    return st.session_state.get("_rerun_profiler")
+
+
+def start_profile(scope):
+    if active_profiler() is not None:
+        finish_profile(interrupted=True)  # previous rerun ended early (st.rerun) before saving
+    if not (PROFILE_ALL or st.query_params.get("profile") == "1"):
+        return None
+    profiler = st.session_state["_rerun_profiler"] = RerunProfiler().start()
+    profiler.annotate(scope=scope)
+    if "profile" in st.query_params:
+        del st.query_params["profile"]  # URL switch captures a single rerun
+    return profiler
+
+
+def finish_profile(interrupted=False):
+    profiler = active_profiler()
+    if profiler is not None:
+        path = profiler.save(interrupted=interrupted)
+        st.session_state["_rerun_profiler"] = None
+        note = " (interrupted)" if interrupted else ""
+        st.toast(f"Profile saved{note}: {os.path.basename(path)}")
+
+
+@contextmanager
+def rerun_scope(name):
+    """rerun_meter.scope that is also profiled when the scope reruns on its own."""
+    profiler = None
+    if not rerun_meter.in_full_run() and active_profiler() is None:
+        profiler = start_profile(name)
+        if profiler is not None:
+            profiler.annotate(filters=profile_filters)
+    interrupted = True
+    try:
+        with rerun_meter.scope(name):
+            yield
+        interrupted = False
+    finally:
+        if profiler is not None:
+            finish_profile(interrupted)
+
+
+start_profile("full script")
+
+# "hashed" reuses per-movie vectors across pools instead of refitting TF-IDF each time
+VECTOR_MODE = os.getenv("CINECOMPASS_VECTORS", "tfidf").lower()
+
+# "batch" scores pool overviews with the vectorized VADER approximation
+SENTIMENT_MODE = os.getenv("CINECOMPASS_SENTIMENT", "vader").lower()
+
+# local catalog answers discover filters when it already holds enough matches
+POOL_SIZE = 160
+LOCAL_POOL_MIN = int(os.getenv("CINECOMPASS_LOCAL_POOL_MIN", "60"))
+
+# result cards in the search tab
+SEARCH_SLOTS = 12
+
+# weight of the "watchlisted together" term; 0 turns it off
+W_COLLAB = float(os.getenv("CINECOMPASS_W_COLLAB", "0.2"))
+
+# weight of the shared genres / keywords / cast / director term; off by default,
+# the soup cosine already counts the same attributes
+W_OVERLAP = float(os.getenv("CINECOMPASS_W_OVERLAP", "0"))
 
 st.markdown(
     """
@@ -175,23 +265,68 @@ if "movie_cache" not in st.session_state:
 
 if "search_results" not in st.session_state:
     st.session_state.search_results = []
+if "search_query" not in st.session_state:
+    st.session_state.search_query = ""
 if "seed_id" not in st.session_state:
     st.session_state.seed_id = None
 if "seed_det" not in st.session_state:
     st.session_state.seed_det = None
 if "scroll_to_recs" not in st.session_state:
     st.session_state.scroll_to_recs = False
+if "session_uid" not in st.session_state:
+    st.session_state.session_uid = uuid.uuid4().hex
+
+
+@st.cache_resource
+def shared_catalog():
+    return Catalog()
+
+
+@st.cache_resource
+def cache_warmer():
+    catalog = shared_catalog()
+    warmer = CacheWarmer(on_details=lambda dets: catalog.ingest([hydrate_movie(d) for d in dets]))
+    if WARMER_ENABLED:
+        warmer.start()
+    return warmer
+
+
+cache_warmer()
+
+
+@st.cache_resource
+def co_watch():
+    return CoWatch().start()
 
 
 def cached_details(mid):
-    if mid not in st.session_state.movie_cache:
+    cached = st.session_state.movie_cache.get(mid)
+    if cached is None or cached.get("_schema") != DETAILS_SCHEMA_VERSION:
         st.session_state.movie_cache[mid] = movie_details(mid)
     return st.session_state.movie_cache[mid]
 
 
+def search_titles(query):
+    """
+    Local title index hits, topped up from TMDB unless prefix matches fill every
+    slot. Fuzzy guesses never stand in for TMDB; they only follow its results.
+    """
+    local = shared_catalog().search_titles(query, SEARCH_SLOTS)
+    if local["match"] == "prefix" and len(local["results"]) >= SEARCH_SLOTS:
+        return local["results"]
+    rerun_meter.count("API searches")
+    remote = search_movie(query).get("results", [])
+    ranked = local["results"] + remote if local["match"] == "prefix" else remote + local["results"]
+    merged = {}
+    for m in ranked:
+        merged.setdefault(m["id"], m)
+    return list(merged.values())[:SEARCH_SLOTS]
+
+
 def person_id_from_name(name):
     if not name.strip():
         return None
+    rerun_meter.count("person lookups")
     res = search_person(name)
     people = res.get("results", [])
     if not people:
@@ -199,30 +334,35 @@ def person_id_from_name(name):
     return people[0]["id"]
 
 
-def hydrate_movie(det):
-    credits = det.get("credits", {})
-    cast_list = [c["name"] for c in credits.get("cast", [])[:5]]
-    director = top_director(credits)
-    keywords_list = [k["name"] for k in det.get("keywords", {}).get("keywords", [])]
-    genres_list = [g["name"] for g in det.get("genres", [])]
-
-    return {
-        "id": det["id"],
-        "title": det["title"],
-        "overview": det.get("overview","") or "",
-        "soup": build_soup(det),
-        "vote_average": det.get("vote_average",0),
-        "vote_count": det.get("vote_count",0),
-        "release_date": det.get("release_date","") or "",
-        "runtime": det.get("runtime"),
-        "cert": extract_certification(det.get("release_dates",{})),
-        "language": det.get("original_language",""),
-        "genres_list": genres_list,
-        "keywords_list": keywords_list,
-        "cast_list": cast_list,
-        "director": director,
-        "poster_path": det.get("poster_path")
-    }
+def neighbour_recs(catalog, seed_id, discover_params, seed_cert, seed_genre_ids, collab=None, top_n=10):
+    """Seed recs from the materialized neighbour table, or None to run the full pipeline."""
+    table = load_table()
+    hit = table.lookup(seed_id) if table is not None else None
+    if hit is None:
+        return None
+
+    nbr_ids, scores = hit
+    index = catalog.filter_index()
+    # with_genres / with_keywords only tighten API pools; the neighbours are already on-theme
+    base = {k: v for k, v in discover_params.items() if k not in ("with_genres", "with_keywords")}
+    keep = index.matches([int(mid) for mid in nbr_ids], base)
+    if keep is None:
+        return None
+    if seed_cert in ["R", "NC-17"]:
+        keep = index.restrict(keep, exclude_certs={"G", "PG", "PG-13"})
+    if seed_genre_ids:
+        keep = index.restrict(keep, any_genres=seed_genre_ids) or keep
+
+    if len(keep) < top_n:
+        return None
+
+    score_of = dict(zip(nbr_ids.tolist(), scores.tolist()))
+    if collab and W_COLLAB:
+        score_of = {mid: sc + W_COLLAB * collab.get(mid, 0.0) for mid, sc in score_of.items()}
+        keep = sorted(keep, key=lambda mid: -score_of[mid])
+    df = catalog.frame(keep[:top_n])
+    df["hybrid_score"] = [score_of[mid] for mid in df["id"]]
+    return build_feature_frame(df)
 
 
 def poster_url(poster_path, size="w500"):
@@ -231,7 +371,22 @@ def poster_url(poster_path, size="w500"):
     return f"https://image.tmdb.org/t/p/{size}{poster_path}"
 
 
+def add_to_watchlist(mid):
+    if mid not in st.session_state.watchlist:
+        st.session_state.watchlist.append(mid)
+        record_add(st.session_state.session_uid, mid)
+
+
+@fragment
+def watchlist_button(mid, key):
+    with rerun_scope("watchlist button"):
+        added = mid in st.session_state.watchlist
+        btn_label = "✅ Added" if added else "➕ Watchlist"
+        st.button(btn_label, key=key, on_click=add_to_watchlist, args=(mid,))
+
+
 def render_movie_card(row, seed_row=None, allow_add=True, key_prefix="rec"):
+    rerun_meter.count("cards")
     title = row["title"]
     year = (row["release_date"] or "")[:4]
     rating = row.get("vote_average", 0)
@@ -262,14 +417,12 @@ def render_movie_card(row, seed_row=None, allow_add=True, key_prefix="rec"):
         st.markdown(f"### {title} ({year})")
         st.markdown(badges_html, unsafe_allow_html=True)
         if seed_row is not None:
-            st.caption(explain_similarity(seed_row, row))
+            why = row.get("why")
+            st.caption(why if why else explain_similarity(seed_row, row))
 
     if allow_add:
-        added = int(row["id"]) in st.session_state.watchlist
-        btn_label = "✅ Added" if added else "➕ Watchlist"
-        if cols[2].button(btn_label, key=f"{key_prefix}_{row['id']}"):
-            if not added:
-                st.session_state.watchlist.append(int(row["id"]))
+        with cols[2]:
+            watchlist_button(int(row["id"]), f"{key_prefix}_{row['id']}")
 
     st.markdown("</div>", unsafe_allow_html=True)
 
@@ -306,73 +459,146 @@ with st.sidebar.expander("🧑‍🎤 People (optional)", expanded=False):
     actor_id = person_id_from_name(actor_name)
     director_id = person_id_from_name(director_name)
 
+# untouched sidebar = seed recs can come from the precomputed neighbour table
+custom_filters = (
+    (year_min, year_max) != (1950, 2025) or min_rating != 6.0 or min_votes != 0
+    or tuple(runtime_range) != (70, 200) or cert_val or language or selected_genres
+    or actor_id or director_id
+)
+
+with st.sidebar.expander("♨️ Cache", expanded=False):
+    proj = projection_report()
+    if proj["movies"]:
+        st.caption(
+            f"Detail payloads (schema v{proj['schema']}): {proj['movies']} projected · "
+            f"~{proj['saved_bytes_per_movie'] / 1024:.1f} KB saved per movie "
+            f"({proj['saved_ratio']:.0%})"
+        )
+    transfer = transfer_report()
+    if transfer["requests"]:
+        st.caption(
+            f"TMDB requests: {transfer['requests']} · {transfer['not_modified']} answered 304 · "
+            f"{transfer['wire_bytes'] / 1024:.0f} KB downloaded · "
+            f"~{transfer['bytes_saved_by_304'] / 1024:.0f} KB saved by revalidation"
+        )
+    if WARMER_ENABLED:
+        report = cache_warmer().last_report
+        if report:
+            st.caption(
+                f"{report['calls']}/{report['budget']} calls · {len(report['warmed'])} warmed · "
+                f"{report['fresh']} already fresh · {report['over_budget']} over budget"
+            )
+            if report["errors"]:
+                st.caption("Errors: " + "; ".join(report["errors"][:3]))
+        else:
+            st.caption("First warming cycle still running…")
+
+if rerun_meter.METER_ENABLED:
+    with st.sidebar.expander("⏱️ Rerun cost", expanded=True):
+        # refreshes on its own so fragment-only reruns show up too
+        @st.fragment(run_every="3s")
+        def rerun_cost_panel():
+            rerun_meter.render_log()
+
+        rerun_cost_panel()
+
+profile_filters = {
+    "year_range": [year_min, year_max],
+    "min_rating": min_rating,
+    "min_votes": int(min_votes),
+    "runtime_range": list(runtime_range),
+    "cert": cert_val,
+    "language": language.strip().lower(),
+    "genres": sorted(selected_genres),
+    "genre_logic": genre_logic,
+    "actor": actor_name.strip().lower(),
+    "director": director_name.strip().lower(),
+}
+if active_profiler() is not None:
+    active_profiler().annotate(filters=profile_filters)
+
 tab1, tab2, tab3 = st.tabs(["Search + Recommend", "Natural-Language Query", "Trending"])
 
+
+def pick_seed(det):
+    st.session_state.seed_id = det["id"]
+    st.session_state.seed_det = det
+    st.session_state.scroll_to_recs = True
+    cache_warmer().note_seed(det["id"])
+
+
+def pick_seed_id(mid):
+    pick_seed(cached_details(mid))
+
+
 # ======================================================
 # TAB 1: SEARCH + RECOMMEND
 # ======================================================
-with tab1:
-    st.markdown(
-        """
-        <div class="card" style="padding:18px 18px; margin-bottom:18px;">
-          <div style="display:flex; align-items:center; gap:12px;">
-            <div style="font-size:1.6rem;">🔎</div>
-            <div>
-              <div style="font-size:1.35rem; font-weight:800;">Find your seed movie</div>
-              <div style="color:#aab3c5; font-size:0.95rem;">
-                Search → pick a poster → get hybrid recommendations
+@fragment
+def search_tab():
+    with rerun_scope("search tab"):
+        st.markdown(
+            """
+            <div class="card" style="padding:18px 18px; margin-bottom:18px;">
+              <div style="display:flex; align-items:center; gap:12px;">
+                <div style="font-size:1.6rem;">🔎</div>
+                <div>
+                  <div style="font-size:1.35rem; font-weight:800;">Find your seed movie</div>
+                  <div style="color:#aab3c5; font-size:0.95rem;">
+                    Search → pick a poster → get hybrid recommendations
+                  </div>
+                </div>
               </div>
             </div>
-          </div>
-        </div>
-        """,
-        unsafe_allow_html=True
-    )
+            """,
+            unsafe_allow_html=True
+        )
 
-    with st.form("search_form", clear_on_submit=False):
+        # live: results follow the typing; the local index answers in well under
+        # a millisecond, TMDB is only asked when it cannot fill the slots with prefix hits
         q = st.text_input(
             "Search",
             placeholder="Try: Superbad, Harold & Kumar, The Shining…",
-            label_visibility="collapsed"
+            label_visibility="collapsed",
+            type="search",
+            live="300ms",
         )
-        submitted = st.form_submit_button("Search")
 
-    if submitted and q.strip():
-        res = search_movie(q.strip())
-        st.session_state.search_results = res.get("results", [])[:12]
-        st.session_state.seed_id = None
-        st.session_state.seed_det = None
+        if q.strip() != st.session_state.search_query:
+            st.session_state.search_query = q.strip()
+            st.session_state.search_results = search_titles(q.strip()) if q.strip() else []
+            st.session_state.seed_id = None
+            st.session_state.seed_det = None
 
-    results = st.session_state.search_results
+        results = st.session_state.search_results
 
-    if results:
-        st.markdown("#### Results (pick one as your seed)")
-        cols = st.columns(4)
+        if results:
+            st.markdown("#### Results (pick one as your seed)")
+            cols = st.columns(4)
 
-        for i, m in enumerate(results):
-            det = cached_details(m["id"])
-            rec = hydrate_movie(det)
-            p = poster_url(rec.get("poster_path"), size="w342")
+            for i, m in enumerate(results):
+                p = poster_url(m.get("poster_path"), size="w342")
 
-            with cols[i % 4]:
-                st.markdown("<div class='card' style='padding:10px;'>", unsafe_allow_html=True)
+                with cols[i % 4]:
+                    rerun_meter.count("cards")
+                    st.markdown("<div class='card' style='padding:10px;'>", unsafe_allow_html=True)
 
-                if p:
-                    st.image(p, use_container_width=True)
-                else:
-                    st.markdown("<div class='poster-frame'>🎞️<br>No poster available</div>", unsafe_allow_html=True)
+                    if p:
+                        st.image(p, use_container_width=True)
+                    else:
+                        st.markdown("<div class='poster-frame'>🎞️<br>No poster available</div>", unsafe_allow_html=True)
 
-                st.markdown(f"<div class='title-clamp'>{rec['title']}</div>", unsafe_allow_html=True)
-                st.caption((rec["release_date"] or "")[:4])
+                    st.markdown(f"<div class='title-clamp'>{m['title']}</div>", unsafe_allow_html=True)
+                    st.caption((m.get("release_date") or "")[:4])
 
-                if st.button("Use as seed", key=f"seedpick_{rec['id']}"):
-                    st.session_state.seed_id = rec["id"]
-                    st.session_state.seed_det = det
-                    st.session_state.scroll_to_recs = True
-                    st.rerun()
+                    st.button("Use as seed", key=f"seedpick_{m['id']}", on_click=pick_seed_id, args=(m["id"],))
 
-                st.markdown("</div>", unsafe_allow_html=True)
+                    st.markdown("</div>", unsafe_allow_html=True)
 
+        render_recommendations()
+
+
+def render_recommendations():
     seed_id = st.session_state.seed_id
     seed_det = st.session_state.seed_det
 
@@ -383,7 +609,6 @@ with tab1:
 
         seed_cert = extract_certification(seed_det.get("release_dates", {}))
         seed_genre_ids = [str(g["id"]) for g in seed_det.get("genres", [])]
-        seed_genre_names = {g["name"] for g in seed_det.get("genres", [])}
         seed_keyword_ids = [str(k["id"]) for k in seed_det.get("keywords", {}).get("keywords", [])[:5]]
 
         discover_params = {
@@ -416,45 +641,85 @@ with tab1:
         if director_id:
             discover_params["with_crew"] = director_id
 
-        with st.spinner("Building recommendation pool…"):
-            pool = []
-            for page in [1, 2, 3]:
-                pool += discover_movies(discover_params, page=page).get("results", [])
-            for page in [1, 2]:
-                pool += similar_movies(seed_id, page=page).get("results", [])
-
-            seen = set()
-            uniq_pool = []
-            for m in pool:
-                mid = m.get("id")
-                if mid and mid not in seen:
-                    seen.add(mid)
-                    uniq_pool.append(m)
-
-            movies = [hydrate_movie(cached_details(m["id"])) for m in uniq_pool[:160]]
-
-            if not any(x["id"] == seed_id for x in movies):
-                movies.append(hydrate_movie(seed_det))
-
-            if (cert_val is None) and (seed_cert in ["R", "NC-17"]):
-                kid_certs = {"G", "PG", "PG-13"}
-                movies = [mv for mv in movies if (mv.get("cert") not in kid_certs)]
-
-            if (not selected_genres) and seed_genre_names:
-                filtered = [
-                    mv for mv in movies
-                    if seed_genre_names.intersection(set(mv.get("genres_list", [])))
+        catalog = shared_catalog()
+        recs, seed_row, pool_label, pool_size = None, None, "", None
+
+        collab = co_watch().neighbours(seed_id)
+
+        if not custom_filters:
+            recs = neighbour_recs(catalog, seed_id, discover_params, seed_cert, seed_genre_ids, collab)
+            if recs is not None:
+                seed_row = hydrate_movie(seed_det)
+                pool_label = "Precomputed neighbours"
+
+        if recs is None:
+            rerun_meter.count("pool builds")
+            with st.spinner("Building recommendation pool…"):
+                local_ids = catalog.filter_index().query(discover_params, limit=POOL_SIZE)
+
+                pool = []
+                if local_ids is not None and len(local_ids) >= LOCAL_POOL_MIN:
+                    pool += [{"id": int(mid)} for mid in local_ids]
+                else:
+                    for page in [1, 2, 3]:
+                        pool += discover_movies(discover_params, page=page).get("results", [])
+                for page in [1, 2]:
+                    pool += similar_movies(seed_id, page=page).get("results", [])
+
+                seen = set()
+                uniq_pool = []
+                for m in pool:
+                    mid = m.get("id")
+                    if mid and mid not in seen:
+                        seen.add(mid)
+                        uniq_pool.append(m)
+
+                known = {mv["id"]: mv for mv in catalog.records([m["id"] for m in uniq_pool[:POOL_SIZE]])}
+                movies = [
+                    known.get(m["id"]) or hydrate_movie(cached_details(m["id"]))
+                    for m in uniq_pool[:POOL_SIZE]
                 ]
-                if filtered:
-                    movies = filtered
 
-            df = build_feature_frame(movies)
-            _, mat = fit_tfidf(df)
-            recs = recommend_hybrid(df, mat, seed_id, top_n=10)
+                if not any(x["id"] == seed_id for x in movies):
+                    movies.append(hydrate_movie(seed_det))
+
+                catalog.ingest(movies)
+                # the shared index catches up with this ingest in the background;
+                # post-filter over the pool's own rows, which are all in hand
+                index = FilterIndex(movies)
+                keep_ids = list(dict.fromkeys(mv["id"] for mv in movies))
+
+                if (cert_val is None) and (seed_cert in ["R", "NC-17"]):
+                    keep_ids = index.restrict(keep_ids, exclude_certs={"G", "PG", "PG-13"})
+
+                if (not selected_genres) and seed_genre_ids:
+                    filtered = index.restrict(keep_ids, any_genres=seed_genre_ids)
+                    if filtered:
+                        keep_ids = filtered
+
+                df = build_feature_frame(catalog.frame(keep_ids))
+                if SENTIMENT_MODE == "batch":
+                    df["sentiment"] = score_overviews(df["overview"])
+                fit = fit_hashed if VECTOR_MODE == "hashed" else fit_tfidf
+                _, mat = fit(df)
+                recs = recommend_hybrid(
+                    df, mat, seed_id, top_n=10, incidence=build_incidence(df),
+                    w_overlap=W_OVERLAP, collab=collab, w_collab=W_COLLAB,
+                )
+                seed_row = df[df["id"] == seed_id].iloc[0]
+                pool_size = len(df)
+                pool_label = f"Pool size: {pool_size}"
+
+        if active_profiler() is not None:
+            active_profiler().annotate(
+                seed_id=seed_id, pool_size=pool_size,
+                pool_source="neighbours" if pool_size is None else "built",
+                discover_params=discover_params,
+            )
 
         if recs.empty:
             st.warning("No recommendations found — widen filters.")
-            st.stop()
+            return
 
         st.markdown("<div id='recs'></div>", unsafe_allow_html=True)
         if st.session_state.scroll_to_recs:
@@ -470,42 +735,63 @@ with tab1:
             )
             st.session_state.scroll_to_recs = False
 
-        st.markdown(f"#### Your Recommendations  ·  Pool size: {len(df)}")
-        seed_row = df[df["id"] == seed_id].iloc[0]
+        st.markdown(f"#### Your Recommendations  ·  {pool_label}")
 
         for _, row in recs.iterrows():
             render_movie_card(row, seed_row=seed_row, key_prefix="rec")
 
-        st.caption("Hybrid score = TF-IDF similarity + sentiment closeness.")
+        if collab and W_COLLAB:
+            st.caption("Hybrid score = TF-IDF similarity + sentiment closeness + watchlisted together.")
+        else:
+            st.caption("Hybrid score = TF-IDF similarity + sentiment closeness.")
+
+
+with tab1:
+    search_tab()
 
 # ======================================================
 # TAB 2: NL QUERY
 # ======================================================
-with tab2:
-    st.write("Example: *raunchy comedy after 2000 under 115 min rating >= 7*")
-    nlq = st.text_input("Describe what you want:", placeholder="horror 80s rating over 7 under 110 min")
+@fragment
+def nl_tab():
+    with rerun_scope("NL tab"):
+        st.write("Example: *raunchy comedy after 2000 under 115 min rating >= 7*")
+        nlq = st.text_input("Describe what you want:", placeholder="horror 80s rating over 7 under 110 min")
 
-    if nlq:
-        nl_filters = parse_nl_query(nlq)
-        nl_filters.setdefault("vote_average.gte", min_rating)
-        nl_filters.setdefault("vote_count.gte", min_votes)
+        if nlq:
+            nl_filters = parse_nl_query(nlq)
+            nl_filters.setdefault("vote_average.gte", min_rating)
+            nl_filters.setdefault("vote_count.gte", min_votes)
 
-        matches = discover_movies(nl_filters, page=1).get("results", [])
+            matches = discover_movies(nl_filters, page=1).get("results", [])
 
-        if not matches:
-            st.warning("No matches — try different wording.")
-        else:
-            st.markdown("#### Matches")
-            for m in matches[:12]:
-                det = cached_details(m["id"])
-                render_movie_card(hydrate_movie(det), allow_add=True, key_prefix="nl")
+            if not matches:
+                st.warning("No matches — try different wording.")
+            else:
+                st.markdown("#### Matches")
+                for m in matches[:12]:
+                    det = cached_details(m["id"])
+                    render_movie_card(hydrate_movie(det), allow_add=True, key_prefix="nl")
+
+
+with tab2:
+    nl_tab()
 
 # ======================================================
 # TAB 3: TRENDING
 # ======================================================
+@fragment
+def trending_tab():
+    with rerun_scope("trending tab"):
+        t = trending_movies().get("results", [])
+        st.markdown("#### Trending this week")
+        for m in t[:12]:
+            det = cached_details(m["id"])
+            render_movie_card(hydrate_movie(det), allow_add=True, key_prefix="trend")
+
+
 with tab3:
-    t = trending_movies().get("results", [])
-    st.markdown("#### Trending this week")
-    for m in t[:12]:
-        det = cached_details(m["id"])
-        render_movie_card(hydrate_movie(det), allow_add=True, key_prefix="trend")
+    trending_tab()
+
+finish_profile()
+rerun_meter.end_full_run()
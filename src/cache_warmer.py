@@ -0,0 +1,137 @@
+import logging
+import os
+import threading
+import time
+from collections import Counter
+
+from tmdb_client import (
+    DETAILS_PARAMS, cache_ttl_remaining, discover_movies, movie_details,
+    similar_movies, trending_movies,
+)
+
+log = logging.getLogger(__name__)
+
+WARMER_ENABLED = os.getenv("CINECOMPASS_WARMER", "1") != "0"
+WARMER_BUDGET = int(os.getenv("CINECOMPASS_WARMER_BUDGET", "60"))
+WARMER_INTERVAL = int(os.getenv("CINECOMPASS_WARMER_INTERVAL", "900"))
+
+POPULAR_PARAMS = {"sort_by": "popularity.desc"}
+
+
+class CacheWarmer:
+    """
+    Re-fetches the hottest TMDB responses into the shared cache before they expire:
+    trending, the first popular discover pages, their movie details, and the
+    details + similar pages of the most picked seeds. Each cycle spends at most
+    `budget` API calls and records what it did in `last_report`.
+    """
+
+    def __init__(self, budget=WARMER_BUDGET, interval=WARMER_INTERVAL,
+                 discover_pages=2, details_per_list=12, top_seeds=5, on_details=None):
+        self.budget = budget
+        self.interval = interval
+        self.discover_pages = discover_pages
+        self.details_per_list = details_per_list
+        self.top_seeds = top_seeds
+        # anything still valid for less than this gets refreshed now, so it
+        # never lapses between two cycles
+        self.margin = interval * 1.5
+        self.on_details = on_details
+
+        self.seed_counts = Counter()
+        self.last_report = None
+        self._thread = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+
+    def note_seed(self, movie_id):
+        with self._lock:
+            self.seed_counts[movie_id] += 1
+
+    def _needs_refresh(self, path, params=None):
+        remaining = cache_ttl_remaining(path, params)
+        return remaining is None or remaining < self.margin
+
+    def run_once(self):
+        """One warming cycle; returns (and stores) a report dict."""
+        started = time.time()
+        report = {
+            "started": started, "budget": self.budget, "calls": 0,
+            "warmed": [], "fresh": 0, "over_budget": 0, "errors": [],
+        }
+        details = []
+
+        def warm(label, path, params, fetch):
+            if not self._needs_refresh(path, params):
+                report["fresh"] += 1
+                return fetch(False)
+            if report["calls"] >= self.budget:
+                report["over_budget"] += 1
+                return None
+            report["calls"] += 1
+            try:
+                data = fetch(True)
+            except Exception as e:  # keep warming the rest of the list
+                report["errors"].append(f"{label}: {e}")
+                return None
+            report["warmed"].append(label)
+            return data
+
+        lists = [warm("trending", "/trending/movie/week", None, lambda r: trending_movies(refresh=r))]
+        for page in range(1, self.discover_pages + 1):
+            params = dict(POPULAR_PARAMS, page=page)
+            lists.append(warm(f"discover p{page}", "/discover/movie", params,
+                              lambda r, p=page: discover_movies(POPULAR_PARAMS, page=p, refresh=r)))
+
+        with self._lock:
+            seeds = [mid for mid, _ in self.seed_counts.most_common(self.top_seeds)]
+
+        movie_ids = list(seeds)
+        for data in lists:
+            for m in (data or {}).get("results", [])[:self.details_per_list]:
+                movie_ids.append(m["id"])
+
+        for mid in dict.fromkeys(movie_ids):
+            det = warm(f"details {mid}", f"/movie/{mid}", DETAILS_PARAMS,
+                       lambda r, m=mid: movie_details(m, refresh=r))
+            if det:
+                details.append(det)
+
+        for mid in seeds:
+            for page in [1, 2]:
+                warm(f"similar {mid} p{page}", f"/movie/{mid}/similar", {"page": page},
+                     lambda r, m=mid, p=page: similar_movies(m, page=p, refresh=r))
+
+        if self.on_details and details:
+            try:
+                self.on_details(details)
+            except Exception as e:
+                report["errors"].append(f"on_details: {e}")
+
+        report["duration_s"] = round(time.time() - started, 3)
+        self.last_report = report
+        log.info(
+            "cache warmer: %d calls, %d warmed, %d already fresh, %d over budget, %d errors",
+            report["calls"], len(report["warmed"]), report["fresh"],
+            report["over_budget"], len(report["errors"]),
+        )
+        return report
+
+    def _loop(self):
+        while not self._stop.is_set():
+            try:
+                self.run_once()
+            except Exception:
+                log.exception("cache warmer cycle failed")
+            self._stop.wait(self.interval)
+
+    def start(self):
+        """Run cycles every `interval` seconds on a daemon thread (idempotent)."""
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._loop, name="cache-warmer", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
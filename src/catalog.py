@@ -0,0 +1,148 @@
+import json
+import os
+import threading
+
+from columnar import ColumnStore, normalize
+from filter_index import FilterIndex
+from title_index import TitleIndex, search_response
+
+# Hydrated movies persist here so every session (and offline jobs) can reuse them.
+CATALOG_PATH = os.getenv(
+    "CINECOMPASS_CATALOG",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "catalog"),
+)
+
+
+class _LiveIndex:
+    """
+    An index over a ColumnStore that follows ingests without blocking readers:
+    once the store changes, the previous index keeps answering while a new one
+    is built on a background thread. Only the very first build runs in the caller.
+    """
+
+    def __init__(self, store, build, name):
+        self.store = store
+        self.build = build
+        self.name = name
+        self.index = None
+        self.version = None
+        self.thread = None  # background rebuild in progress
+        self._lock = threading.Lock()
+        self._first = threading.Lock()
+
+    def get(self):
+        with self._lock:
+            version = self.store.refresh().version
+            if self.index is not None:
+                if self.version != version and self.thread is None:
+                    self.thread = threading.Thread(target=self._rebuild, name=self.name, daemon=True)
+                    self.thread.start()
+                return self.index
+        with self._first:
+            if self.index is None:
+                index, version = self._snapshot()
+                with self._lock:
+                    self.index, self.version = index, version
+            return self.index
+
+    def _snapshot(self):
+        """(index, store version) of one snapshot; rebuilt if an ingest lands mid-build."""
+        while True:
+            version = self.store.refresh().version
+            index = self.build(self.store)
+            if self.store.version == version:
+                return index, version
+
+    def _rebuild(self):
+        try:
+            index, version = self._snapshot()
+            with self._lock:
+                self.index, self.version = index, version
+        finally:
+            with self._lock:
+                self.thread = None
+
+
+class Catalog:
+    """
+    Shared store of hydrated movies keyed by TMDB id, kept in a memory-mapped
+    columnar store (columnar.py). New or changed movies are appended as delta
+    segments, which a background thread compacts into the base once they pile up.
+    """
+
+    def __init__(self, path=CATALOG_PATH):
+        self.path = path
+        self.store = ColumnStore(path)
+        self._lock = threading.Lock()
+        self._filters = _LiveIndex(self.store, FilterIndex.from_store, "filter-index")
+        self._titles = _LiveIndex(self.store, TitleIndex.from_store, "title-index")
+        self._compact_thread = None  # background compaction in progress
+
+        legacy = path + ".jsonl"  # the old append-only JSONL catalog
+        if not len(self.store) and os.path.exists(legacy):
+            with open(legacy, encoding="utf-8") as f:
+                movies = [json.loads(line) for line in f if line.strip()]
+            self.store.append(movies)
+            self.store.compact()
+
+    def __len__(self):
+        return len(self.store)
+
+    def __contains__(self, mid):
+        return mid in self.store
+
+    def get(self, mid):
+        return self.store.get(mid)
+
+    def records(self, ids=None):
+        """Hydrated dicts for `ids`, or the whole catalog."""
+        return self.store.records(ids)
+
+    def frame(self, ids):
+        """Pool of ids as a DataFrame, decoded from the columns (see build_feature_frame)."""
+        return self.store.frame(ids)
+
+    def ingest(self, movies):
+        """Add hydrated movies; only new or changed rows are written. Returns count written."""
+        movies = [normalize(m) for m in movies]
+        stored = {m["id"]: m for m in self.store.records([m["id"] for m in movies])}
+        fresh = [m for m in movies if stored.get(m["id"]) != m]
+        if not fresh:
+            return 0
+        written = self.store.append(fresh)
+        with self._lock:
+            if self.store.needs_compaction() and self._compact_thread is None:
+                self._compact_thread = threading.Thread(target=self._compact, name="catalog-compact", daemon=True)
+                self._compact_thread.start()
+        return written
+
+    def _compact(self):
+        try:
+            self.store.compact()
+        finally:
+            with self._lock:
+                self._compact_thread = None
+
+    def filter_index(self):
+        """FilterIndex over the catalog; stale for a moment after ingests (see _LiveIndex)."""
+        return self._filters.get()
+
+    def title_index(self):
+        """TitleIndex over the catalog; stale for a moment after ingests (see _LiveIndex)."""
+        return self._titles.get()
+
+    def wait(self):
+        """Block until background compaction and index rebuilds finish (tests, offline jobs)."""
+        for thread in (self._compact_thread, self._filters.thread, self._titles.thread):
+            if thread is not None:
+                thread.join()
+
+    def search_titles(self, query, limit=20):
+        """
+        Ingested movies matching `query`, shaped like a /search/movie response,
+        plus "match": "prefix", "fuzzy" or None (see TitleIndex.match).
+        """
+        ids, kind = self.title_index().match(query, limit)
+        res = search_response(self.records(ids))
+        res["match"] = kind
+        return res
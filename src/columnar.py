@@ -0,0 +1,619 @@
+"""
+Memory-mapped columnar store for hydrated movies.
+
+Each segment is a directory of .npy files opened with mmap_mode="r": numeric
+columns are plain arrays, short codes (cert, language) fixed-width bytes,
+strings a uint8 buffer plus int64 offsets, and list columns one more level of
+offsets. A store is one compacted base segment plus small delta segments
+appended per ingest; the newest segment holding an id wins. MANIFEST names
+the live segments and is replaced atomically, so a reader sees either the
+old or the new set. Writers (app workers, this CLI) serialize on a LOCK file
+and re-read MANIFEST under it. Segments replaced by compaction stay on disk
+for SEGMENT_GRACE seconds, so readers holding an older MANIFEST can still
+open them.
+
+Opening a store only maps files, so every worker shares the same pages
+through the OS page cache instead of holding its own copy. Whole columns are
+zero-copy views while there are no deltas; a pool of ids is one searchsorted
+plus one gather per column.
+
+    python src/columnar.py stats
+    python src/columnar.py compact
+    python src/columnar.py import data/catalog.jsonl
+"""
+import argparse
+import json
+import os
+import shutil
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+import numpy as np
+import pandas as pd
+
+from filter_index import _date_key
+
+NUMERIC = {
+    "vote_average": np.float64,
+    "vote_count": np.int64,
+    "popularity": np.float64,
+    "runtime": np.float64,  # NaN = unknown
+    "date_key": np.int64,   # derived from release_date for range filters
+}
+CODES = ("cert", "language")
+CODE_DTYPE = "S16"
+STRINGS = ("title", "overview", "soup", "release_date", "director", "poster_path")
+NULLABLE_STRINGS = ("poster_path",)  # stored as "", read back as None
+STRING_LISTS = ("genres_list", "keywords_list", "cast_list")
+INT_LISTS = ("genre_ids", "keyword_ids")
+
+# hydrated-row field order, as produced by features.hydrate_movie
+FIELDS = (
+    "id", "title", "overview", "soup", "vote_average", "vote_count", "popularity",
+    "release_date", "runtime", "cert", "language", "genres_list", "genre_ids",
+    "keywords_list", "keyword_ids", "cast_list", "director", "poster_path",
+)
+
+MAX_DELTAS = 16
+MAX_DELTA_RATIO = 0.1  # compact once deltas hold this share of the base
+SEGMENT_GRACE = 600    # seconds a compacted-away segment is kept for late readers
+
+
+def normalize(movie):
+    """A hydrated row exactly as the store will read it back."""
+    row = {f: movie.get(f) for f in FIELDS}
+    for name in STRINGS + CODES:
+        row[name] = row[name] or ""
+    for name in NULLABLE_STRINGS:
+        row[name] = row[name] or None
+    row["vote_average"] = float(row["vote_average"] or 0)
+    row["popularity"] = float(row["popularity"] or 0)
+    row["vote_count"] = int(row["vote_count"] or 0)
+    row["runtime"] = int(row["runtime"]) if row["runtime"] else None
+    for name in STRING_LISTS + INT_LISTS:
+        row[name] = list(row[name] or [])
+    return row
+
+
+# ---------- ragged helpers ----------
+
+def _offsets(lengths):
+    out = np.zeros(len(lengths) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=out[1:])
+    return out
+
+
+def _ragged_take(offsets, rows):
+    """Flat element indices and new offsets for `rows` of a ragged column."""
+    offsets = np.asarray(offsets)
+    starts = offsets[rows]
+    lengths = offsets[np.asarray(rows) + 1] - starts
+    new_offsets = _offsets(lengths)
+    flat = np.repeat(starts - new_offsets[:-1], lengths) + np.arange(new_offsets[-1], dtype=np.int64)
+    return flat, new_offsets
+
+
+def _gather_ragged(data, offsets, rows):
+    """
+    (data, offsets) holding only `rows`. Byte buffers are copied one run of
+    adjacent rows at a time, so no per-byte index array is ever built.
+    """
+    rows = np.asarray(rows, dtype=np.int64)
+    offsets = np.asarray(offsets)
+    starts, ends = offsets[rows], offsets[rows + 1]
+    new_offsets = _offsets(ends - starts)
+    out = np.empty(int(new_offsets[-1]), dtype=data.dtype)
+    if len(rows):
+        breaks = np.flatnonzero(starts[1:] != ends[:-1]) + 1
+        lo = np.concatenate([[0], breaks]).tolist()
+        hi = np.concatenate([breaks, [len(rows)]]).tolist()
+        for a, b in zip(lo, hi):
+            out[new_offsets[a]:new_offsets[b]] = data[starts[a]:ends[b - 1]]
+    return out, new_offsets
+
+
+def _encode_strings(values):
+    raw = [(v or "").encode("utf-8") for v in values]
+    data = np.frombuffer(b"".join(raw), dtype=np.uint8)
+    return data, _offsets([len(b) for b in raw])
+
+
+def _decode(data, offsets, i):
+    return bytes(data[offsets[i]:offsets[i + 1]]).decode("utf-8")
+
+
+# ---------- segments ----------
+
+def _write_segment(path, movies):
+    """Write hydrated rows (unique ids) as one segment, sorted by id."""
+    movies = sorted(movies, key=lambda m: m["id"])
+    os.makedirs(path)
+    arrays = {"ids": np.array([m["id"] for m in movies], dtype=np.int64)}
+
+    for name, dtype in NUMERIC.items():
+        if name == "date_key":
+            values = [_date_key(m.get("release_date")) for m in movies]
+        elif name == "runtime":
+            values = [m["runtime"] if m.get("runtime") else np.nan for m in movies]
+        else:
+            values = [m.get(name) or 0 for m in movies]
+        arrays[name] = np.array(values, dtype=dtype)
+
+    for name in CODES:
+        arrays[name] = np.array([(m.get(name) or "").encode("utf-8") for m in movies], dtype=CODE_DTYPE)
+
+    for name in STRINGS:
+        arrays[f"{name}.data"], arrays[f"{name}.offsets"] = _encode_strings(m.get(name) for m in movies)
+
+    for name in STRING_LISTS:
+        lists = [m.get(name) or [] for m in movies]
+        arrays[f"{name}.offsets"] = _offsets([len(x) for x in lists])
+        arrays[f"{name}.data"], arrays[f"{name}.str_offsets"] = _encode_strings(v for x in lists for v in x)
+
+    for name in INT_LISTS:
+        lists = [m.get(name) or [] for m in movies]
+        arrays[f"{name}.offsets"] = _offsets([len(x) for x in lists])
+        arrays[f"{name}.values"] = np.array([v for x in lists for v in x], dtype=np.int64)
+
+    _save_arrays(path, arrays)
+
+
+def _save_arrays(path, arrays):
+    os.makedirs(path, exist_ok=True)
+    for name, arr in arrays.items():
+        np.save(os.path.join(path, name + ".npy"), arr)
+
+
+def _take(arrays, rows):
+    """Arrays of the segment layout holding only `rows` (segment or plain dict)."""
+    out = {"ids": arrays["ids"][rows]}
+    for name in list(NUMERIC) + list(CODES):
+        out[name] = arrays[name][rows]
+    for name in STRINGS:
+        out[f"{name}.data"], out[f"{name}.offsets"] = _gather_ragged(
+            arrays[f"{name}.data"], arrays[f"{name}.offsets"], rows
+        )
+    for name in STRING_LISTS:
+        elems, out[f"{name}.offsets"] = _ragged_take(arrays[f"{name}.offsets"], rows)
+        out[f"{name}.data"], out[f"{name}.str_offsets"] = _gather_ragged(
+            arrays[f"{name}.data"], arrays[f"{name}.str_offsets"], elems
+        )
+    for name in INT_LISTS:
+        flat, out[f"{name}.offsets"] = _ragged_take(arrays[f"{name}.offsets"], rows)
+        out[f"{name}.values"] = arrays[f"{name}.values"][flat]
+    return out
+
+
+def _map(path):
+    # plain ndarray view of the map: same pages, cheaper slicing than np.memmap
+    return np.asarray(np.load(path, mmap_mode="r"))
+
+
+class Segment:
+    """One immutable segment, memory-mapped."""
+
+    def __init__(self, path):
+        self.path = path
+        self.name = os.path.basename(path)
+        # map every file up front so compaction can unlink them under us
+        self._arrays = {
+            f[:-4]: _map(os.path.join(path, f)) for f in os.listdir(path) if f.endswith(".npy")
+        }
+        self.ids = self["ids"]
+
+    def __getitem__(self, name):
+        return self._arrays[name]
+
+    def __len__(self):
+        return len(self.ids)
+
+    def take(self, rows):
+        return _take(self, rows)
+
+
+def _concat_arrays(parts):
+    """Concatenate take() outputs, rebasing every offsets array."""
+    out = {}
+    for key in parts[0]:
+        if key.endswith("offsets"):
+            pieces, base = [np.zeros(1, dtype=np.int64)], 0
+            for p in parts:
+                pieces.append(p[key][1:] + base)
+                base += int(p[key][-1])
+            out[key] = np.concatenate(pieces)
+        else:
+            out[key] = np.concatenate([p[key] for p in parts])
+    return out
+
+
+@contextmanager
+def _file_lock(path):
+    """Exclusive inter-process lock on `path` (created if missing)."""
+    with open(path, "a+b") as f:
+        if fcntl is not None:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        else:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+# ---------- store ----------
+
+class _View:
+    """Immutable snapshot: live segments and, per live id, where its row is."""
+
+    def __init__(self, segments):
+        self.segments = segments
+        if len(segments) == 1:
+            # compacted: the base ids are the live ids, no remapping needed
+            self.ids, self.seg_of, self.row_of = segments[0].ids, None, None
+            return
+        if not segments:
+            self.ids = self.seg_of = self.row_of = np.empty(0, dtype=np.int64)
+            return
+
+        ids = np.concatenate([s.ids for s in segments])
+        seg = np.concatenate([np.full(len(s), k, dtype=np.int64) for k, s in enumerate(segments)])
+        row = np.concatenate([np.arange(len(s), dtype=np.int64) for s in segments])
+        # newest segment wins: sort by (id, segment), keep the last of each run
+        order = np.lexsort((seg, ids))
+        ids, seg, row = ids[order], seg[order], row[order]
+        last = np.ones(len(ids), dtype=bool)
+        last[:-1] = ids[:-1] != ids[1:]
+        self.ids, self.seg_of, self.row_of = ids[last], seg[last], row[last]
+
+    def locate(self, ids):
+        """(segment index, row) per id; missing ids get segment -1."""
+        ids = np.asarray(ids, dtype=np.int64)
+        if not len(self.ids):
+            return np.full(len(ids), -1, dtype=np.int64), np.zeros(len(ids), dtype=np.int64)
+        pos = np.searchsorted(self.ids, ids).clip(0, len(self.ids) - 1)
+        found = np.asarray(self.ids[pos]) == ids
+        if self.seg_of is None:
+            return np.where(found, 0, -1), pos
+        return np.where(found, self.seg_of[pos], -1), self.row_of[pos]
+
+    def rows(self, ids=None):
+        if ids is not None:
+            return self.locate(ids)
+        if self.seg_of is None:
+            n = len(self.ids)
+            return np.zeros(n, dtype=np.int64), np.arange(n)
+        return self.seg_of, self.row_of
+
+
+def _decode_strings(data, offsets, rows):
+    buf, offs = _gather_ragged(data, offsets, rows)
+    buf = buf.tobytes()
+    offs = offs.tolist()
+    return [buf[a:b].decode("utf-8") for a, b in zip(offs[:-1], offs[1:])]
+
+
+def _split(values, offsets):
+    offsets = offsets.tolist()
+    return [values[a:b] for a, b in zip(offsets[:-1], offsets[1:])]
+
+
+def _decode_rows(s, rows):
+    """Columns (lists, FIELDS order) for `rows` of one segment, one gather per column."""
+    rows = np.asarray(rows, dtype=np.int64)
+    cols = {"id": s.ids[rows].tolist()}
+    for name in STRINGS:
+        cols[name] = _decode_strings(s[f"{name}.data"], s[f"{name}.offsets"], rows)
+    for name in NULLABLE_STRINGS:
+        cols[name] = [v or None for v in cols[name]]
+    for name in ("vote_average", "popularity", "vote_count"):
+        cols[name] = s[name][rows].tolist()
+    cols["runtime"] = [None if r != r else int(r) for r in s["runtime"][rows].tolist()]
+    for name in CODES:
+        cols[name] = [b.decode("utf-8") for b in s[name][rows].tolist()]
+    for name in STRING_LISTS:
+        elems, offs = _ragged_take(s[f"{name}.offsets"], rows)
+        cols[name] = _split(_decode_strings(s[f"{name}.data"], s[f"{name}.str_offsets"], elems), offs)
+    for name in INT_LISTS:
+        flat, offs = _ragged_take(s[f"{name}.offsets"], rows)
+        cols[name] = _split(s[f"{name}.values"][flat].tolist(), offs)
+    return {f: cols[f] for f in FIELDS}
+
+
+class ColumnStore:
+    """
+    Columnar, append-only movie store. Reads work on an immutable snapshot
+    and take no lock; appends and compaction hold a thread lock plus the
+    directory's LOCK file and swap MANIFEST.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        self._lock = threading.Lock()
+        self._manifest_stamp = None
+        self._manifest = {}
+        self._view = _View([])
+        self._reload()
+
+    # --- view ---
+
+    def _manifest_path(self):
+        return os.path.join(self.directory, "MANIFEST")
+
+    def _reload(self, force=False):
+        path = self._manifest_path()
+        for attempt in range(3):
+            try:
+                st = os.stat(path)
+            except FileNotFoundError:
+                return
+            # os.replace gives MANIFEST a new inode, so two commits within one
+            # mtime tick still look different
+            stamp = (st.st_mtime_ns, st.st_ino)
+            if stamp == self._manifest_stamp and not force:
+                return
+            with open(path, encoding="utf-8") as f:
+                manifest = json.load(f)
+            open_now = {s.name: s for s in self._view.segments}
+            try:
+                segments = [
+                    open_now.get(name) or Segment(os.path.join(self.directory, name))
+                    for name in manifest["segments"]
+                ]
+            except FileNotFoundError:
+                if attempt == 2:
+                    raise
+                continue  # a newer MANIFEST retired these; read it again
+            if [s.name for s in segments] != list(open_now):
+                self._view = _View(segments)
+            self._manifest = manifest
+            self._manifest_stamp = stamp
+            return
+
+    def refresh(self):
+        """Pick up segments written by another process."""
+        self._reload()
+        return self
+
+    @property
+    def version(self):
+        """Changes whenever the set of live segments does."""
+        return tuple(s.name for s in self._view.segments)
+
+    @property
+    def ids(self):
+        return self._view.ids
+
+    def __len__(self):
+        return len(self._view.ids)
+
+    def __contains__(self, mid):
+        return bool(self._view.locate([mid])[0][0] >= 0)
+
+    # --- reads ---
+
+    def column(self, name, ids=None):
+        """
+        Numeric or code column for `ids` (all live rows, in id order, by default).
+        With a single segment and ids=None this is the memory-mapped array itself.
+        """
+        v = self._view
+        if ids is None and v.seg_of is None and v.segments:
+            return v.segments[0][name]
+        seg, row = v.rows(ids)
+        out = np.zeros(len(seg), dtype=CODE_DTYPE if name in CODES else NUMERIC[name])
+        for k, s in enumerate(v.segments):
+            hit = seg == k
+            if hit.any():
+                out[hit] = s[name][row[hit]]
+        return out
+
+    def lists(self, name, ids=None):
+        """(flat int values, offsets) of an int-list column for `ids` (all live rows by default)."""
+        v = self._view
+        if ids is None and v.seg_of is None and v.segments:
+            s = v.segments[0]
+            return s[f"{name}.values"], s[f"{name}.offsets"]
+        seg, row = v.rows(ids)
+        parts, order = [], []
+        for k, s in enumerate(v.segments):
+            hit = np.flatnonzero(seg == k)
+            if len(hit):
+                flat, offs = _ragged_take(s[f"{name}.offsets"], row[hit])
+                parts.append({"values": s[f"{name}.values"][flat], "offsets": offs})
+                order.append(hit)
+        if not parts:
+            return np.empty(0, dtype=np.int64), np.zeros(len(seg) + 1, dtype=np.int64)
+        merged = _concat_arrays(parts)
+        # rows come out grouped by segment; put them back in request order
+        # (unknown ids have no entry, so give them an empty slot at the end)
+        merged["offsets"] = np.append(merged["offsets"], merged["offsets"][-1])
+        back = np.full(len(seg), len(merged["offsets"]) - 2, dtype=np.int64)
+        back[np.concatenate(order)] = np.arange(sum(len(o) for o in order))
+        flat, offsets = _ragged_take(merged["offsets"], back)
+        return merged["values"][flat], offsets
+
+    def strings(self, name, ids=None):
+        """Decoded string column for `ids` (all live rows by default); unknown ids give ""."""
+        v = self._view
+        seg, row = v.rows(ids)
+        out = []
+        for k, r in zip(seg.tolist(), row.tolist()):
+            if k < 0:
+                out.append("")
+                continue
+            s = v.segments[k]
+            out.append(_decode(s[f"{name}.data"], s[f"{name}.offsets"], r))
+        return out
+
+    def _columns(self, ids):
+        """Decoded columns for `ids` (all live rows by default), unknown ids dropped."""
+        v = self._view
+        seg, row = v.rows(ids)
+        found = np.flatnonzero(seg >= 0)
+        seg, row = seg[found], row[found]
+        if len(v.segments) == 1 or not len(found):
+            return _decode_rows(v.segments[0], row) if len(found) else {f: [] for f in FIELDS}
+
+        out = {f: [None] * len(found) for f in FIELDS}
+        for k, s in enumerate(v.segments):
+            at = np.flatnonzero(seg == k)
+            if not len(at):
+                continue
+            part = _decode_rows(s, row[at])
+            for f in FIELDS:
+                col = out[f]
+                for i, value in zip(at.tolist(), part[f]):
+                    col[i] = value
+        return out
+
+    def get(self, mid):
+        """One hydrated row as a dict, or None."""
+        cols = self._columns([mid])
+        return {f: cols[f][0] for f in FIELDS} if cols["id"] else None
+
+    def records(self, ids=None, chunk=10000):
+        """Hydrated dicts for `ids` (all live rows by default), skipping unknown ids."""
+        ids = np.asarray(self._view.ids if ids is None else ids, dtype=np.int64)
+        for start in range(0, len(ids), chunk):
+            cols = self._columns(ids[start:start + chunk])
+            for values in zip(*(cols[f] for f in FIELDS)):
+                yield dict(zip(FIELDS, values))
+
+    def frame(self, ids):
+        """
+        DataFrame for a pool of ids in the shape build_feature_frame returns,
+        gathered column by column (unknown ids are dropped).
+        """
+        df = pd.DataFrame(self._columns(ids), columns=list(FIELDS))
+        df["runtime"] = df["runtime"].astype(float)
+        return df
+
+    # --- writes ---
+
+    @contextmanager
+    def _writing(self):
+        """Thread and process exclusive section for MANIFEST updates, on the latest MANIFEST."""
+        with self._lock:
+            os.makedirs(self.directory, exist_ok=True)
+            with _file_lock(os.path.join(self.directory, "LOCK")):
+                self._reload(force=True)
+                yield
+
+    def _commit(self, names, retired=()):
+        """Replace MANIFEST (hold _writing); drops retired segments past their grace period."""
+        now = time.time()
+        pending, expired = [], []
+        for name, at in self._manifest.get("retired", []):
+            (expired if now - at >= SEGMENT_GRACE else pending).append([name, at])
+        pending += [[name, now] for name in retired]
+
+        tmp = self._manifest_path() + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"segments": names, "retired": pending, "written_at": now}, f)
+        os.replace(tmp, self._manifest_path())
+        self._reload()
+        # open maps of removed segments stay valid after unlinking (POSIX)
+        for name, _ in expired:
+            shutil.rmtree(os.path.join(self.directory, name), ignore_errors=True)
+
+    def _new_name(self, prefix):
+        return f"{prefix}{time.time_ns()}-{os.getpid()}"
+
+    def append(self, movies):
+        """
+        Write hydrated rows as a new delta segment (last row per id wins).
+        Never compacts; callers check needs_compaction() and run compact() off
+        the request path.
+        """
+        latest = {m["id"]: m for m in movies}
+        if not latest:
+            return 0
+        with self._writing():
+            name = self._new_name("d")
+            _write_segment(os.path.join(self.directory, name), latest.values())
+            self._commit([s.name for s in self._view.segments] + [name])
+        return len(latest)
+
+    def needs_compaction(self):
+        """More than MAX_DELTAS deltas, or deltas holding over MAX_DELTA_RATIO of the base's rows."""
+        segments = self._view.segments
+        if len(segments) <= 1:
+            return False
+        base, deltas = segments[0], segments[1:]
+        return len(deltas) > MAX_DELTAS or sum(len(d) for d in deltas) > MAX_DELTA_RATIO * max(len(base), 1)
+
+    def compact(self):
+        """
+        Merge every segment into one base segment of live rows. The merge reads
+        a snapshot without the write lock, so appends go on meanwhile; deltas
+        they add stay on top of the new base.
+        """
+        v = self.refresh()._view
+        if len(v.segments) <= 1:
+            return {"segments": len(v.segments), "rows": len(self)}
+        started = time.time()
+        parts = [s.take(v.row_of[v.seg_of == k]) for k, s in enumerate(v.segments)]
+        merged = _concat_arrays([p for p in parts if len(p["ids"])])
+        merged = _take(merged, np.argsort(merged["ids"], kind="stable"))
+
+        name = self._new_name("b")
+        path = os.path.join(self.directory, name)
+        _save_arrays(path, merged)
+        names = [s.name for s in v.segments]
+        with self._writing():
+            live = [s.name for s in self._view.segments]
+            if live[:len(names)] != names:  # another writer compacted these first
+                shutil.rmtree(path, ignore_errors=True)
+                return {"segments": len(v.segments), "rows": len(self), "skipped": True}
+            self._commit([name] + live[len(names):], retired=names)
+        return {"segments": len(v.segments), "rows": len(self), "duration_s": round(time.time() - started, 3)}
+
+    def stats(self):
+        return {
+            "directory": self.directory,
+            "rows": len(self),
+            "segments": [{"name": s.name, "rows": len(s)} for s in self._view.segments],
+            "bytes_on_disk": sum(
+                os.path.getsize(os.path.join(s.path, f)) for s in self._view.segments for f in os.listdir(s.path)
+            ),
+        }
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Inspect, compact or import the columnar catalog.")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    sub.add_parser("stats")
+    sub.add_parser("compact")
+    imp = sub.add_parser("import", help="append a JSONL file of hydrated movies")
+    imp.add_argument("jsonl")
+    args = ap.parse_args(argv)
+
+    from catalog import CATALOG_PATH
+    store = ColumnStore(CATALOG_PATH)
+    if args.cmd == "import":
+        with open(args.jsonl, encoding="utf-8") as f:
+            movies = [json.loads(line) for line in f if line.strip()]
+        print(f"appended {store.append(movies)} movies")
+        print(json.dumps(store.compact(), indent=2))
+    elif args.cmd == "compact":
+        print(json.dumps(store.compact(), indent=2))
+    else:
+        print(json.dumps(store.stats(), indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
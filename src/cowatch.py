@@ -0,0 +1,273 @@
+"""
+"Watchlisted together" signal from every session's watchlist additions.
+
+Each add is appended to data/watchlist_events.jsonl. update() folds only the
+events written since the last batch into a sparse item-item co-occurrence
+matrix: adding movie m to a session's watchlist credits (m, p) for every
+movie p already on it. Weights decay exponentially with event age
+(HALF_LIFE_DAYS); they are stored scaled by exp(rate * (t - t0)) so decay
+never needs a pass over old entries until the scale is renormalized.
+
+Scores are cosine co-occurrence w_ij / sqrt(d_i * d_j), where d_i is the
+decayed number of watchlists holding i. Only pairs with at least MIN_SUPPORT
+decayed co-adds count, and each movie keeps its TOP_K best partners, so
+scoring a candidate against a seed is one lookup in a k-entry dict.
+
+In the app, start() runs the batches on a background thread, so a rerun
+only ever reads the top lists. The state file is a snapshot rewritten at
+most every SAVE_EVERY seconds: events logged after it are simply folded
+again from the saved byte offset on the next start.
+
+    python src/cowatch.py            # fold new events, print stats
+    python src/cowatch.py --rebuild  # replay the whole log
+"""
+import argparse
+import json
+import logging
+import math
+import os
+import sys
+import threading
+import time
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data")
+EVENTS_PATH = os.getenv("CINECOMPASS_WATCH_EVENTS", os.path.join(DATA_DIR, "watchlist_events.jsonl"))
+STATE_PATH = os.getenv("CINECOMPASS_COWATCH", os.path.join(DATA_DIR, "cowatch.json"))
+
+TOP_K = 50
+HALF_LIFE_DAYS = 90
+MIN_SUPPORT = 0.5     # decayed co-adds a pair needs: one co-add within the last half-life
+MAX_BASKET = 100      # most recent movies remembered per session
+SESSION_TTL = 30 * 86400
+BATCH_INTERVAL = 60   # seconds between background batches in the app
+SAVE_EVERY = 3600     # seconds between state snapshots; the event log covers the gap
+RESCALE_AT = 50.0     # renormalize once stored weights grow by e**50
+RESCORE_ALL_EVERY = 86400  # re-apply MIN_SUPPORT to untouched rows as they decay
+
+log = logging.getLogger(__name__)
+
+_RATE = math.log(2) / (HALF_LIFE_DAYS * 86400)
+_log_lock = threading.Lock()
+
+
+def record_add(session_id, movie_id, path=EVENTS_PATH, ts=None):
+    """Append one watchlist addition to the event log."""
+    event = {"ts": time.time() if ts is None else ts, "session": session_id, "movie_id": int(movie_id)}
+    with _log_lock:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(event) + "\n")
+
+
+class CoWatch:
+    """Incrementally maintained co-occurrence matrix and per-movie top-k lists."""
+
+    def __init__(self, events_path=EVENTS_PATH, state_path=STATE_PATH, k=TOP_K):
+        self.events_path = events_path
+        self.state_path = state_path
+        self.k = k
+        self._lock = threading.Lock()
+        self._saved = 0.0     # when the state file was last written
+        self._dirty = False   # state changed since then
+        self._thread = None
+        self._stop = threading.Event()
+        self._reset()
+        if state_path and os.path.exists(state_path):
+            self._load()
+
+    def _reset(self):
+        self.t0 = None        # scale origin for stored weights
+        self.offset = 0       # bytes of the event log already folded in
+        self.baskets = {}     # session -> [[movie_id, ts], ...]
+        self.degree = {}      # movie -> scaled watchlist count
+        self.pairs = {}       # movie -> {movie: scaled co-add weight}
+        self.top = {}         # movie -> {movie: score}, at most k entries
+        self.events = 0
+        self.rescored_all = 0.0
+
+    # --- persistence ---
+
+    def _load(self):
+        with open(self.state_path, encoding="utf-8") as f:
+            state = json.load(f)
+        self.t0 = state["t0"]
+        self.offset = state["offset"]
+        self.events = state["events"]
+        self.rescored_all = state["rescored_all"]
+        self.baskets = state["baskets"]
+        self.degree = {int(m): w for m, w in state["degree"].items()}
+        self.pairs = {int(m): {int(p): w for p, w in row.items()} for m, row in state["pairs"].items()}
+        self.top = {int(m): {int(p): s for p, s in row} for m, row in state["top"].items()}
+
+    def _save(self):
+        self._dirty = False
+        if not self.state_path:
+            return
+        os.makedirs(os.path.dirname(self.state_path), exist_ok=True)
+        tmp = self.state_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({
+                "t0": self.t0, "offset": self.offset, "events": self.events,
+                "rescored_all": self.rescored_all,
+                "baskets": self.baskets,
+                "degree": self.degree,
+                "pairs": self.pairs,
+                "top": {m: sorted(row.items(), key=lambda kv: -kv[1]) for m, row in self.top.items()},
+            }, f)
+        os.replace(tmp, self.state_path)
+
+    # --- batch update ---
+
+    def _scale(self, ts):
+        return math.exp(_RATE * (ts - self.t0))
+
+    def _rescale(self, now):
+        """Move the scale origin to `now` and drop entries that decayed to nothing."""
+        factor = self._scale(now) ** -1
+        floor = MIN_SUPPORT * 1e-3
+        self.degree = {m: w * factor for m, w in self.degree.items() if w * factor > floor}
+        for m in list(self.pairs):
+            row = {p: w * factor for p, w in self.pairs[m].items() if w * factor > floor}
+            if row:
+                self.pairs[m] = row
+            else:
+                del self.pairs[m]
+        self.t0 = now
+
+    def _read_new_events(self):
+        if not os.path.exists(self.events_path):
+            return []
+        with open(self.events_path, "rb") as f:
+            f.seek(self.offset)
+            chunk = f.read()
+        end = chunk.rfind(b"\n") + 1  # a line still being written waits for the next batch
+        self.offset += end
+        return [json.loads(line) for line in chunk[:end].splitlines() if line.strip()]
+
+    def _fold(self, events):
+        touched = set()
+        for e in sorted(events, key=lambda e: e["ts"]):
+            sid, mid, ts = e["session"], int(e["movie_id"]), e["ts"]
+            if self.t0 is None:
+                self.t0 = ts
+            basket = self.baskets.setdefault(sid, [])
+            if any(m == mid for m, _ in basket):
+                continue
+            g = self._scale(ts)
+            self.degree[mid] = self.degree.get(mid, 0.0) + g
+            row = self.pairs.setdefault(mid, {})
+            for other, _ in basket:
+                row[other] = row.get(other, 0.0) + g
+                back = self.pairs.setdefault(other, {})
+                back[mid] = back.get(mid, 0.0) + g
+                touched.add(other)
+            touched.add(mid)
+            basket.append([mid, ts])
+            del basket[:-MAX_BASKET]
+            self.events += 1
+        return touched
+
+    def _score_row(self, mid, now_scale):
+        d_i = self.degree.get(mid, 0.0)
+        scores = {}
+        for other, w in self.pairs.get(mid, {}).items():
+            if w / now_scale < MIN_SUPPORT:
+                continue
+            d_j = self.degree.get(other, 0.0)
+            if d_i > 0 and d_j > 0:
+                scores[other] = w / math.sqrt(d_i * d_j)
+        best = sorted(scores.items(), key=lambda kv: -kv[1])[:self.k]
+        return dict(best)
+
+    def update(self, now=None, rebuild=False):
+        """Fold events logged since the last batch; returns a report dict."""
+        started = time.time()
+        now = started if now is None else now
+        with self._lock:
+            if rebuild:
+                self._reset()
+            events = self._read_new_events()
+            touched = self._fold(events)
+
+            if self.t0 is not None and _RATE * (now - self.t0) > RESCALE_AT:
+                self._rescale(now)
+            if not self.rescored_all:
+                self.rescored_all = now  # a fresh matrix: every row is scored as it is folded
+            elif now - self.rescored_all >= RESCORE_ALL_EVERY:
+                touched = set(self.pairs)  # old pairs may have decayed below support
+                self.rescored_all = now
+
+            cutoff = now - SESSION_TTL
+            self.baskets = {s: b for s, b in self.baskets.items() if b and b[-1][1] >= cutoff}
+
+            # a changed degree moves the score of every pair the movie is in
+            rows = set(touched)
+            for mid in touched:
+                rows.update(self.pairs.get(mid, ()))
+            if self.t0 is not None:
+                now_scale = self._scale(now)
+                for mid in rows:
+                    best = self._score_row(mid, now_scale)
+                    if best:
+                        self.top[mid] = best
+                    else:
+                        self.top.pop(mid, None)
+
+            self._dirty = self._dirty or bool(events or rows)
+            if rebuild or (self._dirty and now - self._saved >= SAVE_EVERY):
+                self._save()
+                self._saved = now
+            return {
+                "events": len(events), "rows_rescored": len(rows), "movies": len(self.top),
+                "sessions": len(self.baskets), "duration_s": round(time.time() - started, 4),
+            }
+
+    def flush(self):
+        """Write the state file now if anything changed since the last snapshot."""
+        with self._lock:
+            if self._dirty:
+                self._save()
+                self._saved = time.time()
+
+    def _loop(self, interval):
+        while not self._stop.is_set():
+            try:
+                self.update()
+            except Exception:
+                log.exception("co-watch batch failed")
+            self._stop.wait(interval)
+        self.flush()
+
+    def start(self, interval=BATCH_INTERVAL):
+        """Run update() every `interval` seconds on a daemon thread (idempotent)."""
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._loop, args=(interval,), name="cowatch", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def neighbours(self, movie_id):
+        """{movie_id: score in (0, 1]} for the movie's top-k co-watched titles."""
+        return self.top.get(int(movie_id), {})
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Fold watchlist events into the co-watch matrix.")
+    ap.add_argument("--rebuild", action="store_true", help="replay the whole event log")
+    ap.add_argument("--show", type=int, help="print a movie's co-watched neighbours")
+    args = ap.parse_args(argv)
+
+    model = CoWatch()
+    print(json.dumps(model.update(rebuild=args.rebuild), indent=2))
+    model.flush()
+    if args.show is not None:
+        for mid, score in sorted(model.neighbours(args.show).items(), key=lambda kv: -kv[1]):
+            print(f"{mid:>10}  {score:.3f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -17,6 +17,43 @@ def top_director(credits):
     return ""
 
 
+# Bump when project_details changes shape; cached payloads with another
+# version are re-fetched instead of reused.
+DETAILS_SCHEMA_VERSION = 1
+
+DETAIL_FIELDS = (
+    "id", "title", "overview", "vote_average", "vote_count", "popularity",
+    "release_date", "runtime", "original_language", "poster_path",
+)
+
+
+def project_details(det):
+    """
+    Reduce a /movie/{id} payload (with credits, keywords, release_dates) to
+    exactly what hydrate_movie, build_soup and the app read: top 5 cast,
+    the director, keywords, genres and the US certification.
+    """
+    credits = det.get("credits", {})
+    director = top_director(credits)
+    cert = extract_certification(det.get("release_dates", {}))
+
+    out = {k: det.get(k) for k in DETAIL_FIELDS}
+    out["genres"] = [{"id": g["id"], "name": g["name"]} for g in det.get("genres", [])]
+    out["keywords"] = {
+        "keywords": [{"id": k["id"], "name": k["name"]}
+                     for k in det.get("keywords", {}).get("keywords", [])]
+    }
+    out["credits"] = {
+        "cast": [{"name": c["name"]} for c in credits.get("cast", [])[:5]],
+        "crew": [{"name": director, "job": "Director"}] if director else [],
+    }
+    out["release_dates"] = {
+        "results": [{"iso_3166_1": "US", "release_dates": [{"certification": cert}]}] if cert else []
+    }
+    out["_schema"] = DETAILS_SCHEMA_VERSION
+    return out
+
+
 def build_soup(det):
     """
     Build a weighted text soup for TF-IDF.
@@ -46,3 +83,33 @@ def build_soup(det):
     )
 
     return " ".join([w for w in weighted_tokens if w])
+
+
+def hydrate_movie(det):
+    """Flatten a TMDB details payload into the row shape used by the recommender."""
+    credits = det.get("credits", {})
+    cast_list = [c["name"] for c in credits.get("cast", [])[:5]]
+    director = top_director(credits)
+    keywords = det.get("keywords", {}).get("keywords", [])
+    genres = det.get("genres", [])
+
+    return {
+        "id": det["id"],
+        "title": det["title"],
+        "overview": det.get("overview","") or "",
+        "soup": build_soup(det),
+        "vote_average": det.get("vote_average",0),
+        "vote_count": det.get("vote_count",0),
+        "popularity": det.get("popularity",0.0) or 0.0,
+        "release_date": det.get("release_date","") or "",
+        "runtime": det.get("runtime"),
+        "cert": extract_certification(det.get("release_dates",{})),
+        "language": det.get("original_language",""),
+        "genres_list": [g["name"] for g in genres],
+        "genre_ids": [g["id"] for g in genres],
+        "keywords_list": [k["name"] for k in keywords],
+        "keyword_ids": [k["id"] for k in keywords],
+        "cast_list": cast_list,
+        "director": director,
+        "poster_path": det.get("poster_path")
+    }
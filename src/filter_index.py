@@ -0,0 +1,255 @@
+import numpy as np
+
+# discover params the index can answer locally; anything else (with_cast,
+# with_crew, other certification countries) means "ask the live API".
+RANGE_PARAMS = {
+    "primary_release_date.gte": ("date", "gte"),
+    "primary_release_date.lte": ("date", "lte"),
+    "vote_average.gte": ("rating", "gte"),
+    "vote_average.lte": ("rating", "lte"),
+    "vote_count.gte": ("votes", "gte"),
+    "vote_count.lte": ("votes", "lte"),
+    "with_runtime.gte": ("runtime", "gte"),
+    "with_runtime.lte": ("runtime", "lte"),
+}
+IGNORED_PARAMS = {"page", "sort_by", "certification_country"}
+
+SORT_COLUMNS = {
+    "popularity": "popularity",
+    "vote_average": "rating",
+    "vote_count": "votes",
+    "primary_release_date": "date",
+}
+
+
+def _date_key(release_date):
+    """'2004-07-23' -> 20040723 so date filters are plain integer ranges."""
+    digits = (release_date or "").replace("-", "")
+    return int(digits) if digits.isdigit() and len(digits) == 8 else -1
+
+
+def _lists(values_per_row):
+    """Ragged (flat values, offsets) from a list of lists."""
+    offsets = np.zeros(len(values_per_row) + 1, dtype=np.int64)
+    np.cumsum([len(v) for v in values_per_row], out=offsets[1:])
+    return np.array([v for vals in values_per_row for v in vals], dtype=np.int64), offsets
+
+
+class _Postings:
+    """
+    value -> rows holding it, sorted once. get() materializes the boolean row
+    mask on demand, so memory is one entry per (row, value) rather than one
+    full-length mask per distinct value.
+    """
+
+    def __init__(self, values, rows, n):
+        order = np.argsort(values, kind="stable")
+        self._rows = np.asarray(rows)[order]
+        self._keys, self._starts = np.unique(np.asarray(values)[order], return_index=True)
+        self._ends = np.append(self._starts[1:], len(self._rows))
+        self.n = n
+
+    def get(self, value, default=None):
+        if self._keys.dtype.kind == "S":
+            value = str(value).encode("utf-8")
+        i = int(np.searchsorted(self._keys, value))
+        if i >= len(self._keys) or self._keys[i] != value:
+            return default
+        mask = np.zeros(self.n, dtype=bool)
+        mask[self._rows[self._starts[i]:self._ends[i]]] = True
+        return mask
+
+
+def _postings(values, n):
+    """Postings for a single-valued column (one value per row)."""
+    return _Postings(values, np.arange(n), n)
+
+
+def _list_postings(flat, offsets, n):
+    """Postings for a list column stored as flat values + row offsets."""
+    rows = np.repeat(np.arange(n), np.diff(offsets))
+    return _Postings(flat, rows, n)
+
+
+class FilterIndex:
+    """
+    Columnar index over hydrated movies for resolving discover params locally.
+    Numeric filters are binary searches over sorted columns; cert, language,
+    genre and keyword filters are boolean masks ANDed / ORed together.
+    """
+
+    def __init__(self, movies):
+        movies = list(movies)
+        self._build(
+            ids=np.array([m["id"] for m in movies], dtype=np.int64),
+            columns={
+                "date": np.array([_date_key(m.get("release_date")) for m in movies], dtype=np.int64),
+                "rating": np.array([m.get("vote_average") or 0.0 for m in movies], dtype=np.float64),
+                "votes": np.array([m.get("vote_count") or 0 for m in movies], dtype=np.int64),
+                "runtime": np.array(
+                    [m["runtime"] if m.get("runtime") else np.nan for m in movies], dtype=np.float64
+                ),
+                "popularity": np.array([m.get("popularity") or 0.0 for m in movies], dtype=np.float64),
+            },
+            cert=np.array([(m.get("cert") or "").encode("utf-8") for m in movies], dtype="S16"),
+            lang=np.array([(m.get("language") or "").encode("utf-8") for m in movies], dtype="S16"),
+            genres=_lists([m.get("genre_ids") or [] for m in movies]),
+            keywords=_lists([m.get("keyword_ids") or [] for m in movies]),
+        )
+
+    @classmethod
+    def from_store(cls, store):
+        """Build straight from a columnar.ColumnStore without decoding any rows."""
+        index = cls.__new__(cls)
+        index._build(
+            ids=np.asarray(store.ids),
+            columns={
+                "date": store.column("date_key"),
+                "rating": store.column("vote_average"),
+                "votes": store.column("vote_count"),
+                "runtime": store.column("runtime"),
+                "popularity": store.column("popularity"),
+            },
+            cert=store.column("cert"),
+            lang=store.column("language"),
+            genres=store.lists("genre_ids"),
+            keywords=store.lists("keyword_ids"),
+        )
+        return index
+
+    def _build(self, ids, columns, cert, lang, genres, keywords):
+        n = len(ids)
+        self.n = n
+        self.ids = ids
+        self._id_order = np.argsort(ids, kind="stable")
+        self._ids_sorted = ids[self._id_order]
+        self.columns = columns
+
+        # sorted copy + row order per range column (NaN runtimes sort last)
+        self._sorted = {}
+        for name in ("date", "rating", "votes", "runtime"):
+            col = np.asarray(columns[name])
+            order = np.argsort(col, kind="stable")
+            self._sorted[name] = (col[order], order)
+
+        self._cert = _postings(np.asarray(cert), n)
+        self._lang = _postings(np.asarray(lang), n)
+        self._genre = _list_postings(*genres, n)
+        self._keyword = _list_postings(*keywords, n)
+
+    def __len__(self):
+        return self.n
+
+    def _rows_of(self, ids):
+        """Row per movie id, -1 for ids the index does not hold."""
+        ids = np.asarray(ids, dtype=np.int64)
+        if not self.n:
+            return np.full(len(ids), -1, dtype=np.int64)
+        pos = np.searchsorted(self._ids_sorted, ids).clip(0, self.n - 1)
+        return np.where(self._ids_sorted[pos] == ids, self._id_order[pos], -1)
+
+    def _range_mask(self, name, op, value):
+        values, order = self._sorted[name]
+        if name == "date":
+            value = _date_key(str(value))
+        else:
+            value = float(value)
+
+        n_valid = len(values) - int(np.isnan(values).sum()) if values.dtype.kind == "f" else len(values)
+        if op == "gte":
+            lo, hi = np.searchsorted(values[:n_valid], value, side="left"), n_valid
+        else:
+            lo, hi = 0, np.searchsorted(values[:n_valid], value, side="right")
+
+        mask = np.zeros(self.n, dtype=bool)
+        mask[order[lo:hi]] = True
+        return mask
+
+    def _set_mask(self, postings, raw):
+        """TMDB list syntax: 'a,b' = all of, 'a|b' = any of."""
+        raw = str(raw)
+        if "|" in raw:
+            mask = np.zeros(self.n, dtype=bool)
+            for part in raw.split("|"):
+                mask |= postings.get(int(part), False)
+            return mask
+
+        mask = np.ones(self.n, dtype=bool)
+        for part in raw.split(","):
+            hit = postings.get(int(part))
+            if hit is None:
+                return np.zeros(self.n, dtype=bool)
+            mask &= hit
+        return mask
+
+    def mask(self, params):
+        """Boolean row mask for a discover params dict, or None if it needs the API."""
+        mask = np.ones(self.n, dtype=bool)
+
+        for key, value in params.items():
+            if value is None or key in IGNORED_PARAMS:
+                continue
+            if key in RANGE_PARAMS:
+                name, op = RANGE_PARAMS[key]
+                mask &= self._range_mask(name, op, value)
+            elif key == "certification":
+                if params.get("certification_country", "US") != "US":
+                    return None
+                mask &= self._cert.get(value, np.zeros(self.n, dtype=bool))
+            elif key == "with_original_language":
+                mask &= self._lang.get(value, np.zeros(self.n, dtype=bool))
+            elif key == "with_genres":
+                mask &= self._set_mask(self._genre, value)
+            elif key == "with_keywords":
+                mask &= self._set_mask(self._keyword, value)
+            else:
+                return None
+
+        return mask
+
+    def query(self, params, limit=None):
+        """
+        Resolve discover params to matching movie IDs, ordered like TMDB's sort_by.
+        Returns None when the params use something only the API can answer.
+        """
+        mask = self.mask(params)
+        if mask is None:
+            return None
+
+        rows = np.flatnonzero(mask)
+        field, _, direction = params.get("sort_by", "popularity.desc").partition(".")
+        col = self.columns.get(SORT_COLUMNS.get(field, "popularity"))[rows]
+        order = np.argsort(-col if direction != "asc" else col, kind="stable")
+        rows = rows[order]
+
+        if limit is not None:
+            rows = rows[:limit]
+        return self.ids[rows]
+
+    def matches(self, ids, params):
+        """The subset of `ids` (order kept) that satisfies params; None if it needs the API."""
+        mask = self.mask(params)
+        if mask is None:
+            return None
+        rows = self._rows_of(ids)
+        return [mid for mid, r in zip(ids, rows.tolist()) if r >= 0 and mask[r]]
+
+    def restrict(self, ids, exclude_certs=None, any_genres=None):
+        """Vectorized post-filter of a pool: drop certs, keep rows sharing any genre."""
+        rows = self._rows_of(ids)
+        known = rows >= 0
+        keep = np.ones(len(rows), dtype=bool)
+
+        if exclude_certs:
+            bad = np.zeros(self.n, dtype=bool)
+            for c in exclude_certs:
+                bad |= self._cert.get(c, False)
+            keep &= ~bad[rows] | ~known
+
+        if any_genres:
+            hit = np.zeros(self.n, dtype=bool)
+            for g in any_genres:
+                hit |= self._genre.get(int(g), False)
+            keep &= hit[rows] & known
+
+        return [mid for mid, k in zip(ids, keep) if k]
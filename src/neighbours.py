@@ -0,0 +1,267 @@
+"""
+Materialized top-N hybrid neighbours for every movie in the local catalog.
+
+    python src/neighbours.py            # incremental: only new / changed movies
+    python src/neighbours.py --full     # rebuild everything
+
+Scores use the same hybrid as recommend_hybrid (content cosine + sentiment
+closeness), over hashed vectors and batch sentiment so the job scales to the
+whole catalog. Content similarity is the raw cosine rather than the per-pool
+min-max rescale, which keeps scores pairwise and lets incremental updates
+merge new candidates into existing rows exactly. Rows that are not recomputed
+keep the IDF weights of the run that built them, so run --full now and then
+as the catalog grows.
+
+Tables live in data/neighbours/<version>/ as .npy files (int32 ids,
+float16 scores) and are opened memory-mapped; CURRENT names the live version.
+"""
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import sys
+import time
+
+import numpy as np
+
+from batch_sentiment import score_overviews
+from recommender import build_feature_frame, fit_hashed
+
+NEIGHBOURS_DIR = os.getenv(
+    "CINECOMPASS_NEIGHBOURS",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "neighbours"),
+)
+TOP_K = 50
+W_CONTENT = 0.75
+W_SENT = 0.25
+BLOCK_CELLS = 20_000_000  # dense score cells per block (~80 MB float32)
+KEEP_VERSIONS = 2
+
+
+def fingerprint(movie):
+    """64-bit hash of the fields that feed the hybrid score."""
+    h = hashlib.blake2b(digest_size=8)
+    h.update((movie.get("soup") or "").encode("utf-8"))
+    h.update(b"\0")
+    h.update((movie.get("overview") or "").encode("utf-8"))
+    return int.from_bytes(h.digest(), "little")
+
+
+def _features(movies):
+    df = build_feature_frame(movies)
+    _, mat = fit_hashed(df)
+    sent = np.asarray(score_overviews(df["overview"]), dtype=np.float32)
+    return mat.astype(np.float32).tocsr(), sent
+
+
+def _scores(mat, sent, rows, cols, w_content, w_sent):
+    sims = (mat[rows] @ mat[cols].T).toarray()
+    close = 1.0 - np.abs(sent[rows][:, None] - sent[cols][None, :]) / 2.0
+    return w_content * sims + w_sent * close
+
+
+def _top_k(scores, cand_ids, k):
+    """Row-wise top-k of a (rows x candidates) block; cand_ids is 1-D or per-row."""
+    k_eff = min(k, scores.shape[1])
+    part = np.argpartition(-scores, k_eff - 1, axis=1)[:, :k_eff] if k_eff else np.empty((len(scores), 0), int)
+    part_scores = np.take_along_axis(scores, part, axis=1)
+    order = np.argsort(-part_scores, axis=1, kind="stable")
+    part = np.take_along_axis(part, order, axis=1)
+
+    ids = np.full((len(scores), k), -1, dtype=np.int32)
+    out = np.full((len(scores), k), -np.inf, dtype=np.float32)
+    picked = cand_ids[part] if cand_ids.ndim == 1 else np.take_along_axis(cand_ids, part, axis=1)
+    ids[:, :k_eff] = picked
+    out[:, :k_eff] = np.take_along_axis(scores, part, axis=1)
+    ids[~np.isfinite(out)] = -1
+    return ids, out
+
+
+def _block_rows(n_cols):
+    return max(1, BLOCK_CELLS // max(1, n_cols))
+
+
+def _compute_rows(mat, sent, ids, rows, k, w_content, w_sent):
+    """Full top-k for `rows` against every movie."""
+    all_cols = np.arange(len(ids))
+    nbr_ids = np.empty((len(rows), k), dtype=np.int32)
+    nbr_scores = np.empty((len(rows), k), dtype=np.float32)
+    step = _block_rows(len(ids))
+    for start in range(0, len(rows), step):
+        block = rows[start:start + step]
+        scores = _scores(mat, sent, block, all_cols, w_content, w_sent)
+        scores[np.arange(len(block)), block] = -np.inf  # never your own neighbour
+        nbr_ids[start:start + step], nbr_scores[start:start + step] = _top_k(scores, ids, k)
+    return nbr_ids, nbr_scores
+
+
+class NeighbourTable:
+    """Read-only, memory-mapped view of one table version."""
+
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, "meta.json"), encoding="utf-8") as f:
+            self.meta = json.load(f)
+        self.ids = np.load(os.path.join(path, "ids.npy"), mmap_mode="r")
+        self.nbr_ids = np.load(os.path.join(path, "nbr_ids.npy"), mmap_mode="r")
+        self.nbr_scores = np.load(os.path.join(path, "nbr_scores.npy"), mmap_mode="r")
+        self.fingerprints = np.load(os.path.join(path, "fingerprints.npy"), mmap_mode="r")
+
+    def __len__(self):
+        return len(self.ids)
+
+    def row(self, movie_id):
+        i = int(np.searchsorted(self.ids, movie_id))
+        return i if i < len(self.ids) and self.ids[i] == movie_id else None
+
+    def lookup(self, movie_id):
+        """(neighbour ids, scores) best first, or None if the movie is not materialized."""
+        i = self.row(movie_id)
+        if i is None:
+            return None
+        ids = np.asarray(self.nbr_ids[i])
+        keep = ids >= 0
+        return ids[keep], np.asarray(self.nbr_scores[i], dtype=np.float32)[keep]
+
+
+def current_version(directory=NEIGHBOURS_DIR):
+    try:
+        with open(os.path.join(directory, "CURRENT"), encoding="utf-8") as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+_open_tables = {}
+
+
+def load_table(directory=NEIGHBOURS_DIR):
+    """Live table (reopened only when CURRENT changes), or None before the first build."""
+    version = current_version(directory)
+    if version is None:
+        return None
+    key = (directory, version)
+    if key not in _open_tables:
+        _open_tables.clear()
+        _open_tables[key] = NeighbourTable(os.path.join(directory, version))
+    return _open_tables[key]
+
+
+def _write(directory, ids, nbr_ids, nbr_scores, fps, meta):
+    version = f"v{time.time_ns()}"  # sortable, unique per write
+    path = os.path.join(directory, version)
+    os.makedirs(path)
+    np.save(os.path.join(path, "ids.npy"), ids.astype(np.int32))
+    np.save(os.path.join(path, "nbr_ids.npy"), nbr_ids.astype(np.int32))
+    np.save(os.path.join(path, "nbr_scores.npy"), nbr_scores.astype(np.float16))
+    np.save(os.path.join(path, "fingerprints.npy"), fps.astype(np.uint64))
+    with open(os.path.join(path, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump(meta, f, indent=2)
+
+    tmp = os.path.join(directory, "CURRENT.tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(version)
+    os.replace(tmp, os.path.join(directory, "CURRENT"))
+
+    versions = sorted(d for d in os.listdir(directory) if d.startswith("v"))
+    for old in versions[:-KEEP_VERSIONS]:
+        shutil.rmtree(os.path.join(directory, old), ignore_errors=True)
+    return path
+
+
+def update(movies, directory=NEIGHBOURS_DIR, k=TOP_K, w_content=W_CONTENT, w_sent=W_SENT, full=False):
+    """
+    Bring the table in line with `movies` (hydrated rows). Only new or changed
+    movies, and rows that listed a changed movie, get full rows; the others
+    just merge in scores against the changed movies.
+    Returns a report dict.
+    """
+    started = time.time()
+    movies = sorted(movies, key=lambda m: m["id"])
+    ids = np.array([m["id"] for m in movies], dtype=np.int64)
+    fps = np.array([fingerprint(m) for m in movies], dtype=np.uint64)
+    report = {"rows": len(ids), "k": k}
+
+    old = load_table(directory)
+    if old is not None and (old.meta.get("k") != k or old.meta.get("w_content") != w_content
+                            or old.meta.get("w_sent") != w_sent):
+        old = None
+
+    old_rows = np.full(len(ids), -1, dtype=np.int64)
+    if old is not None and not full:
+        pos = np.searchsorted(old.ids, ids).clip(0, max(len(old.ids) - 1, 0))
+        found = (np.asarray(old.ids)[pos] == ids) if len(old.ids) else np.zeros(len(ids), bool)
+        same = found & (np.asarray(old.fingerprints)[pos] == fps)
+        old_rows[same] = pos[same]
+
+    changed = np.flatnonzero(old_rows < 0)
+    kept = np.flatnonzero(old_rows >= 0)
+    report.update(mode="full" if len(kept) == 0 else "incremental", changed=len(changed))
+
+    # a row that listed a changed movie lost that entry, and its replacement
+    # (the old k+1-th best) was never stored: recompute those rows in full
+    stale = np.zeros(len(kept), dtype=bool)
+    if len(kept) and len(changed):
+        changed_ids = ids[changed].astype(np.int32)
+        step = _block_rows(k)
+        for start in range(0, len(kept), step):
+            prev_ids = np.asarray(old.nbr_ids[old_rows[kept[start:start + step]]])
+            stale[start:start + step] = np.isin(prev_ids, changed_ids).any(axis=1)
+    recompute = np.sort(np.concatenate([changed, kept[stale]]))
+    kept = kept[~stale]
+    report["recomputed"] = len(recompute)
+
+    if len(changed) == 0 and old is not None and len(old.ids) == len(ids):
+        report["duration_s"] = round(time.time() - started, 3)
+        report["path"] = old.path
+        return report
+
+    mat, sent = _features(movies)
+    nbr_ids = np.empty((len(ids), k), dtype=np.int32)
+    nbr_scores = np.empty((len(ids), k), dtype=np.float32)
+
+    nbr_ids[recompute], nbr_scores[recompute] = _compute_rows(mat, sent, ids, recompute, k, w_content, w_sent)
+
+    if len(kept):
+        changed_ids = ids[changed].astype(np.int32)
+        step = _block_rows(len(changed) + k)
+        for start in range(0, len(kept), step):
+            block = kept[start:start + step]
+            prev_ids = np.asarray(old.nbr_ids[old_rows[block]])
+            prev_scores = np.asarray(old.nbr_scores[old_rows[block]], dtype=np.float32)
+            prev_scores[prev_ids < 0] = -np.inf
+
+            if len(changed):
+                fresh = _scores(mat, sent, block, changed, w_content, w_sent)
+                cand_ids = np.hstack([prev_ids, np.broadcast_to(changed_ids, fresh.shape)])
+                cand_scores = np.hstack([prev_scores, fresh])
+            else:
+                cand_ids, cand_scores = prev_ids, prev_scores
+            nbr_ids[block], nbr_scores[block] = _top_k(cand_scores, cand_ids, k)
+
+    meta = {"k": k, "w_content": w_content, "w_sent": w_sent, "rows": len(ids), "built_at": time.time()}
+    os.makedirs(directory, exist_ok=True)
+    report["path"] = _write(directory, ids, nbr_ids, nbr_scores, fps, meta)
+    report["duration_s"] = round(time.time() - started, 3)
+    return report
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Materialize top-N hybrid neighbours for the local catalog.")
+    ap.add_argument("--full", action="store_true", help="recompute every row")
+    ap.add_argument("--k", type=int, default=TOP_K)
+    ap.add_argument("--dir", default=NEIGHBOURS_DIR)
+    args = ap.parse_args(argv)
+
+    from catalog import Catalog
+    movies = list(Catalog().records())
+    if len(movies) < 2:
+        print("catalog has fewer than 2 movies; ingest some first")
+        return 1
+    print(json.dumps(update(movies, args.dir, k=args.k, full=args.full), indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,202 @@
+"""
+On-demand sampling profiler for a single app.py rerun, either the full
+script or one fragment (seed pick, watchlist button, a tab) on its own.
+
+Turn it on with ?profile=1 in the URL (profiles the next rerun only) or
+CINECOMPASS_PROFILE=1 (profiles every rerun). Captures land in profiles/
+with the rerun scope, seed id, normalized filters and pool size; a rerun cut
+short by st.rerun keeps its partial sample, marked interrupted. Browse them with:
+
+    python src/profiler.py list
+    python src/profiler.py show <capture>
+    python src/profiler.py compare <capture_a> <capture_b>
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+PROFILE_DIR = os.getenv(
+    "CINECOMPASS_PROFILE_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "profiles"),
+)
+SAMPLE_INTERVAL = 0.005
+MAX_DURATION = 300
+
+
+def _frame_label(code):
+    return f"{os.path.basename(code.co_filename)}:{code.co_name}:{code.co_firstlineno}"
+
+
+class RerunProfiler:
+    """
+    Samples one thread's Python stack every `interval` seconds from a helper
+    thread. Stacks are stored collapsed ("outer;...;inner" -> samples).
+    """
+
+    def __init__(self, interval=SAMPLE_INTERVAL):
+        self.interval = interval
+        self.meta = {}
+        self.stacks = Counter()
+        self.samples = 0
+        self._target = threading.get_ident()
+        self._done = threading.Event()
+        self._thread = None
+        self.started = None
+
+    def _sample(self):
+        deadline = self.started + MAX_DURATION
+        while not self._done.wait(self.interval) and time.time() < deadline:
+            frame = sys._current_frames().get(self._target)
+            if frame is None:
+                break
+            stack = []
+            while frame is not None:
+                stack.append(_frame_label(frame.f_code))
+                frame = frame.f_back
+            self.stacks[";".join(reversed(stack))] += 1
+            self.samples += 1
+
+    def start(self):
+        self.started = time.time()
+        self._thread = threading.Thread(target=self._sample, name="rerun-profiler", daemon=True)
+        self._thread.start()
+        return self
+
+    def annotate(self, **meta):
+        self.meta.update(meta)
+
+    def stop(self):
+        self._done.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def save(self, directory=PROFILE_DIR, interrupted=False):
+        """
+        Stop sampling and write the capture; returns its path. `interrupted`
+        marks a rerun that was cut short (st.rerun, a newer widget event) and
+        holds only the samples taken up to that point.
+        """
+        self.stop()
+        if interrupted:
+            self.annotate(interrupted=True)
+        os.makedirs(directory, exist_ok=True)
+        millis = int((self.started % 1) * 1000)
+        name = time.strftime("%Y%m%d-%H%M%S", time.localtime(self.started)) + f".{millis:03d}-{os.getpid()}"
+        path = os.path.join(directory, name + ".json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({
+                "name": name,
+                "started": self.started,
+                "duration_s": round(time.time() - self.started, 4),
+                "interval_s": self.interval,
+                "samples": self.samples,
+                "meta": self.meta,
+                "stacks": dict(self.stacks),
+            }, f, indent=1, default=str)
+        return path
+
+
+# ---------- viewer ----------
+
+def load_capture(name_or_path, directory=PROFILE_DIR):
+    path = name_or_path
+    if not os.path.exists(path):
+        path = os.path.join(directory, name_or_path.removesuffix(".json") + ".json")
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def function_times(capture):
+    """{function: (self_s, total_s)} from collapsed stacks."""
+    interval = capture["interval_s"]
+    self_t, total_t = Counter(), Counter()
+    for stack, n in capture["stacks"].items():
+        frames = stack.split(";")
+        self_t[frames[-1]] += n * interval
+        for fn in set(frames):
+            total_t[fn] += n * interval
+    return {fn: (self_t[fn], total_t[fn]) for fn in total_t}
+
+
+def _pool(meta):
+    """Pool size, or where the recommendations came from when no pool was built."""
+    if meta.get("pool_size") is not None:
+        return meta["pool_size"]
+    return meta.get("pool_source")
+
+
+def _list(directory):
+    if not os.path.isdir(directory):
+        print(f"no captures in {directory}")
+        return
+    for fname in sorted(os.listdir(directory)):
+        if not fname.endswith(".json"):
+            continue
+        cap = load_capture(os.path.join(directory, fname))
+        meta = cap["meta"]
+        print(
+            f"{cap['name']:<26} {cap['duration_s']:>8.3f}s  {meta.get('scope', 'full script'):<16} "
+            f"seed={meta.get('seed_id')}  "
+            f"pool={_pool(meta)}  samples={cap['samples']}"
+            + ("  (interrupted)" if meta.get("interrupted") else "")
+        )
+
+
+def _show(name, top, directory):
+    cap = load_capture(name, directory)
+    print(f"{cap['name']}  {cap['duration_s']:.3f}s  {cap['samples']} samples")
+    for k, v in cap["meta"].items():
+        print(f"  {k}: {v}")
+    print(f"\n{'self s':>8} {'total s':>8}  function")
+    times = function_times(cap)
+    for fn, (s, t) in sorted(times.items(), key=lambda kv: -kv[1][1])[:top]:
+        print(f"{s:8.3f} {t:8.3f}  {fn}")
+
+
+def _compare(a, b, top, directory):
+    ca, cb = load_capture(a, directory), load_capture(b, directory)
+    ta, tb = function_times(ca), function_times(cb)
+    print(f"A {ca['name']}: {ca['duration_s']:.3f}s  pool={_pool(ca['meta'])}")
+    print(f"B {cb['name']}: {cb['duration_s']:.3f}s  pool={_pool(cb['meta'])}")
+    for key in sorted(set(ca["meta"]) | set(cb["meta"])):
+        if ca["meta"].get(key) != cb["meta"].get(key):
+            print(f"  {key}: {ca['meta'].get(key)}  ->  {cb['meta'].get(key)}")
+
+    rows = []
+    for fn in set(ta) | set(tb):
+        a_total, b_total = ta.get(fn, (0, 0))[1], tb.get(fn, (0, 0))[1]
+        rows.append((b_total - a_total, a_total, b_total, fn))
+    print(f"\n{'A total':>8} {'B total':>8} {'delta':>8}  function")
+    for delta, a_total, b_total, fn in sorted(rows, key=lambda r: -abs(r[0]))[:top]:
+        print(f"{a_total:8.3f} {b_total:8.3f} {delta:+8.3f}  {fn}")
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="List and compare captured rerun profiles.")
+    ap.add_argument("--dir", default=PROFILE_DIR)
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    sub.add_parser("list")
+    show = sub.add_parser("show")
+    show.add_argument("capture")
+    show.add_argument("--top", type=int, default=25)
+    cmp_ = sub.add_parser("compare")
+    cmp_.add_argument("a")
+    cmp_.add_argument("b")
+    cmp_.add_argument("--top", type=int, default=25)
+    args = ap.parse_args(argv)
+
+    if args.cmd == "list":
+        _list(args.dir)
+    elif args.cmd == "show":
+        _show(args.capture, args.top, args.dir)
+    else:
+        _compare(args.a, args.b, args.top, args.dir)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
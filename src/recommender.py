@@ -1,8 +1,12 @@
+import threading
+
 import numpy as np
 import pandas as pd
+import scipy.sparse as sp
 
-from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.feature_extraction.text import HashingVectorizer, TfidfVectorizer
 from sklearn.metrics.pairwise import cosine_similarity
+from sklearn.preprocessing import normalize
 
 import nltk
 from nltk.sentiment import SentimentIntensityAnalyzer
@@ -17,6 +21,7 @@ _sia = SentimentIntensityAnalyzer()
 
 
 def build_feature_frame(movies):
+    """Hydrated rows (list of dicts, or a frame from Catalog.frame) -> recommender frame."""
     df = pd.DataFrame(movies).copy()
 
     df["overview"] = df["overview"].fillna("")
@@ -41,34 +46,198 @@ def fit_tfidf(df):
     return vec, mat
 
 
+# --- stateless hashed vectors (optional) ---
+# A fixed-width hashing space means a movie's term counts never depend on
+# which pool it lands in, so they are computed once and cached by movie ID
+# (and replaced if the movie's soup changes).
+# IDF is kept globally from every movie ever hashed and applied at gather time.
+HASH_FEATURES = 2 ** 18
+
+_hasher = HashingVectorizer(
+    stop_words="english", ngram_range=(1, 2), n_features=HASH_FEATURES,
+    alternate_sign=False, norm=None,
+)
+_hash_rows = {}   # movie id -> (hash of the soup it was built from, row)
+_doc_freq = np.zeros(HASH_FEATURES, dtype=np.int64)
+_hash_lock = threading.Lock()
+
+
+def hashed_row(movie_id, soup):
+    """Return the cached raw term-count row for a movie, hashing it on first use or when its soup changed."""
+    soup = soup or ""
+    key = hash(soup)
+    cached = _hash_rows.get(movie_id)
+    if cached is not None and cached[0] == key:
+        return cached[1]
+
+    row = _hasher.transform([soup]).tocsr()
+    with _hash_lock:
+        cached = _hash_rows.get(movie_id)
+        if cached is not None and cached[0] == key:
+            return cached[1]
+        if cached is not None:
+            _doc_freq[cached[1].indices] -= 1
+        _hash_rows[movie_id] = (key, row)
+        _doc_freq[row.indices] += 1
+    return row
+
+
+def global_idf():
+    """Smoothed IDF over every movie hashed so far (same formula as TfidfVectorizer)."""
+    with _hash_lock:  # a consistent count and doc freq while hashed_row updates them
+        n_docs = len(_hash_rows)
+        doc_freq = _doc_freq.copy()
+    return np.log((1 + n_docs) / (1 + doc_freq)) + 1.0
+
+
+def fit_hashed(df):
+    """
+    Drop-in for fit_tfidf using cached hashed rows.
+    The pool matrix is a row gather plus an IDF scale, no per-pool fitting.
+    """
+    rows = [hashed_row(mid, soup) for mid, soup in zip(df["id"], df["soup"])]
+    if not rows:
+        return None, sp.csr_matrix((0, HASH_FEATURES))
+
+    tf = sp.vstack(rows, format="csr")
+    mat = normalize(tf @ sp.diags(global_idf()), norm="l2", copy=False)
+    return None, mat.tocsr()
+
+
 def _sentiment(text):
     return _sia.polarity_scores(text or "")["compound"]
 
 
-def recommend_hybrid(df, tfidf_matrix, seed_id, top_n=10, w_content=0.75, w_sent=0.25):
+# --- interned attribute incidence (shared genres / keywords / cast / director) ---
+# Same relative weights as build_soup so the overlap term agrees with the text soup.
+OVERLAP_WEIGHTS = {"genres_list": 4, "keywords_list": 6, "cast_list": 2, "director": 2}
+
+
+def build_incidence(df):
+    """
+    Intern each attribute to integer IDs and build a sparse pool x item
+    incidence matrix per field. Returns {field: (matrix, item_names)}.
+    """
+    incidence = {}
+    for col in OVERLAP_WEIGHTS:
+        if col not in df.columns:
+            continue
+
+        vocab = {}
+        rows, cols = [], []
+        for i, items in enumerate(df[col]):
+            if col == "director":
+                items = [items] if items else []
+            for item in dict.fromkeys(items):
+                rows.append(i)
+                cols.append(vocab.setdefault(item, len(vocab)))
+
+        mat = sp.csr_matrix(
+            (np.ones(len(rows), dtype=np.float32), (rows, cols)),
+            shape=(len(df), len(vocab)),
+        )
+        incidence[col] = (mat, np.array(list(vocab), dtype=object))
+    return incidence
+
+
+def shared_attributes(incidence, seed_idx):
+    """
+    Mask every pool row against the seed's row in one sparse product per field.
+    Returns {field: csr matrix} whose nonzeros are the items shared with the seed.
+    """
+    shared = {}
+    for col, (mat, _) in incidence.items():
+        shared[col] = mat.multiply(mat[seed_idx]).tocsr()
+    return shared
+
+
+def overlap_scores(shared):
+    """Weighted shared-attribute count per pool row, scaled to 0..1."""
+    total = None
+    for col, mat in shared.items():
+        counts = OVERLAP_WEIGHTS[col] * mat.getnnz(axis=1).astype(float)
+        total = counts if total is None else total + counts
+    if total is None or total.max() <= 0:
+        return total if total is not None else 0.0
+    return total / total.max()
+
+
+def _top_shared(shared, incidence, seed_row, col, i, k):
+    mat = shared[col]
+    names = incidence[col][1][mat.indices[mat.indptr[i]:mat.indptr[i + 1]]]
+    seed_items = seed_row.get(col, [])
+    order = {name: pos for pos, name in enumerate(seed_items)} if isinstance(seed_items, list) else {}
+    return sorted(names, key=lambda n: order.get(n, len(order)))[:k]
+
+
+def explain_shared(shared, incidence, seed_row, i):
+    """Vectorized counterpart of explain_similarity for pool row i."""
+    reasons = []
+
+    if "genres_list" in shared:
+        genres = _top_shared(shared, incidence, seed_row, "genres_list", i, 2)
+        if genres:
+            reasons.append("Shared genres: " + ", ".join(genres))
+
+    if "keywords_list" in shared:
+        keywords = _top_shared(shared, incidence, seed_row, "keywords_list", i, 2)
+        if keywords:
+            reasons.append("Shared keywords: " + ", ".join(keywords))
+
+    if "cast_list" in shared:
+        cast = _top_shared(shared, incidence, seed_row, "cast_list", i, 1)
+        if cast:
+            reasons.append("Shared cast: " + ", ".join(cast))
+
+    if "director" in shared and shared["director"].indptr[i + 1] > shared["director"].indptr[i]:
+        reasons.append("Same director")
+
+    if not reasons:
+        return "Similar plot/style based on hybrid match."
+    return " · ".join(reasons[:3])
+
+
+def recommend_hybrid(df, tfidf_matrix, seed_id, top_n=10, w_content=0.75, w_sent=0.25,
+                     incidence=None, w_overlap=0.0, collab=None, w_collab=0.0):
     if "sentiment" not in df.columns:
         df["sentiment"] = df["overview"].apply(_sentiment)
 
-    idx_map = pd.Series(df.index, index=df["id"]).drop_duplicates()
-    if seed_id not in idx_map:
+    # row positions, not index labels: the matrices are positional and df may have any index
+    ids = df["id"].to_numpy()
+    hits = np.flatnonzero(ids == seed_id)
+    if not len(hits):
         return pd.DataFrame()
 
-    seed_idx = idx_map[seed_id]
+    seed_idx = int(hits[0])
 
     sims = cosine_similarity(tfidf_matrix[seed_idx], tfidf_matrix).flatten()
     sims = (sims - sims.min()) / (sims.max() - sims.min() + 1e-9)
 
-    seed_sent = df.loc[seed_idx, "sentiment"]
-    sent_close = 1 - np.abs(df["sentiment"] - seed_sent) / 2.0
+    sentiment = df["sentiment"].to_numpy(dtype=float)
+    sent_close = 1 - np.abs(sentiment - sentiment[seed_idx]) / 2.0
+
+    hybrid = w_content * sims + w_sent * sent_close
+
+    shared = None
+    if incidence is not None:
+        shared = shared_attributes(incidence, seed_idx)
+        if w_overlap:
+            hybrid = hybrid + w_overlap * overlap_scores(shared)
+
+    if collab and w_collab:
+        # collab = the seed's co-watched neighbours {movie_id: score}, one lookup per row
+        hybrid = hybrid + w_collab * df["id"].map(collab).fillna(0.0).values
 
-    hybrid = w_content * sims + w_sent * sent_close.values
+    rows = np.flatnonzero(ids != seed_id)
+    rows = rows[np.argsort(-hybrid[rows], kind="stable")][:top_n]
+    out = df.iloc[rows].copy()
+    out["hybrid_score"] = hybrid[rows]
 
-    out = df.copy()
-    out["hybrid_score"] = hybrid
-    out = out[out["id"] != seed_id]
-    out = out.sort_values("hybrid_score", ascending=False)
+    if shared is not None:
+        seed_row = df.iloc[seed_idx]
+        out["why"] = [explain_shared(shared, incidence, seed_row, i) for i in rows.tolist()]
 
-    return out.head(top_n)
+    return out
 
 
 def explain_similarity(seed_row, row):
@@ -0,0 +1,85 @@
+"""
+Rerun-cost counter: how much of the app one interaction re-executes.
+
+A full script run and every fragment-only rerun are each one "interaction".
+Code inside an interaction calls count("cards") etc.; the finished record
+(trigger, units, ms) is appended to a short per-session log.
+"""
+import os
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+import streamlit as st
+
+METER_ENABLED = os.getenv("CINECOMPASS_RERUN_METER") == "1"
+LOG_SIZE = 15
+
+
+def _start(trigger):
+    st.session_state["_meter_current"] = {"trigger": trigger, "t0": time.perf_counter(), "counts": Counter()}
+
+
+def _finish():
+    current = st.session_state.get("_meter_current")
+    if current is None:
+        return
+    st.session_state["_meter_current"] = None
+    log = st.session_state.setdefault("rerun_log", [])
+    log.append({
+        "trigger": current["trigger"],
+        "ms": round((time.perf_counter() - current["t0"]) * 1000, 1),
+        "counts": dict(current["counts"]),
+    })
+    del log[:-LOG_SIZE]
+
+
+def count(unit, n=1):
+    current = st.session_state.get("_meter_current")
+    if current is not None:
+        current["counts"][unit] += n
+
+
+def begin_full_run():
+    _finish()  # a fragment rerun cut short by st.rerun never reached its end
+    st.session_state["_meter_full_run"] = True
+    _start("full script")
+    count("scope: script")
+
+
+def in_full_run():
+    """True while the whole script is running (as opposed to a fragment on its own)."""
+    return bool(st.session_state.get("_meter_full_run"))
+
+
+def end_full_run():
+    st.session_state["_meter_full_run"] = False
+    _finish()
+
+
+@contextmanager
+def scope(name):
+    """Mark a rerun scope; when it runs on its own it becomes its own interaction."""
+    owner = not in_full_run() and st.session_state.get("_meter_current") is None
+    if owner:
+        _start(name)
+    count(f"scope: {name}")
+    try:
+        yield
+    finally:
+        if owner:
+            _finish()
+
+
+def render_log():
+    """Table of the last interactions, newest first."""
+    log = st.session_state.get("rerun_log", [])
+    if not log:
+        st.caption("No interactions recorded yet.")
+        return
+    rows = []
+    for entry in reversed(log):
+        row = {"trigger": entry["trigger"], "ms": entry["ms"]}
+        row.update(entry["counts"])
+        rows.append(row)
+    st.dataframe(rows, hide_index=True, use_container_width=True)
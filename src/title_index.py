@@ -0,0 +1,270 @@
+"""
+Local title search over the ingested catalog, so typing in the search box
+does not cost a TMDB round trip per keystroke.
+
+Titles are folded (accents stripped, casefolded, punctuation dropped) and
+indexed two ways:
+
+* word prefixes: every distinct word of every title in one sorted byte
+  array, so a query word is a binary-searched range. Rows are numbered by
+  popularity rank, so the smallest rank in a range is the most popular match.
+* trigrams of the padded title, for misspellings. A candidate has to share a
+  MIN_COVERAGE share of the query's trigrams; by pigeonhole it then shares at
+  least one of the rarest few, so only their postings are scanned.
+
+Prefix hits are ranked exact title first, then titles starting with the
+query, then by popularity; only a query with no prefix hit goes fuzzy.
+match() reports which of the two answered, so a caller can tell a real hit
+from a guess. Results are shaped like TMDB's /search/movie, so callers can
+use either source.
+
+    python src/title_index.py "shawshnk"    # results and per-query timing
+"""
+import argparse
+import math
+import re
+import sys
+import time
+import unicodedata
+
+import numpy as np
+
+CANDIDATES = 256          # most popular rows considered per prefix query
+SHORT_PREFIX = 2          # top lists are precomputed for prefixes this short
+MIN_COVERAGE = 0.6        # share of query trigrams a fuzzy hit must contain
+MAX_FUZZY_CANDIDATES = 20000
+POPULARITY_WEIGHT = 0.1   # fuzzy score bonus for the most popular title
+
+_POSSESSIVE = re.compile(r"['’`]s\b", re.IGNORECASE)
+_NON_WORD = re.compile(r"[\W_]+")
+
+
+def fold(text):
+    """'Amélie (2001)' -> 'amelie 2001': accent-free, casefolded words."""
+    text = _POSSESSIVE.sub("s", text or "")  # "Schindler's" -> "schindlers", "d'Amélie" -> "d amelie"
+    if not text.isascii():
+        text = "".join(c for c in unicodedata.normalize("NFKD", text) if not unicodedata.combining(c))
+    return " ".join(_NON_WORD.sub(" ", text.casefold()).split())
+
+
+def _trigram_codes(cps):
+    """Trigram codes at every position of a code point array (21 bits per character)."""
+    return (cps[:-2] << 42) | (cps[1:-1] << 21) | cps[2:]
+
+
+def _query_trigrams(folded):
+    cps = np.frombuffer((" " + folded + " ").encode("utf-32-le"), dtype=np.uint32).astype(np.int64)
+    return np.unique(_trigram_codes(cps))
+
+
+def _next_prefix(prefix):
+    """Smallest byte string greater than every string starting with `prefix` (UTF-8 never has 0xff)."""
+    return prefix[:-1] + bytes([prefix[-1] + 1])
+
+
+def search_response(movies):
+    """Hydrated catalog rows -> a /search/movie style response."""
+    results = [
+        {
+            "id": m["id"],
+            "title": m["title"],
+            "overview": m["overview"],
+            "release_date": m["release_date"],
+            "poster_path": m["poster_path"],
+            "popularity": m["popularity"],
+            "vote_average": m["vote_average"],
+            "vote_count": m["vote_count"],
+            "original_language": m["language"],
+            "genre_ids": m["genre_ids"],
+        }
+        for m in movies
+    ]
+    return {"page": 1, "results": results, "total_pages": 1, "total_results": len(results)}
+
+
+class TitleIndex:
+    """Prefix and trigram index over folded titles, rows ranked by popularity."""
+
+    def __init__(self, ids, titles, popularity):
+        ids = np.asarray(ids, dtype=np.int64)
+        popularity = np.nan_to_num(np.asarray(popularity, dtype=np.float64)).clip(0)
+        order = np.lexsort((ids, -popularity))  # rank 0 = most popular
+        self.ids = ids[order]
+        self._folded = [fold(titles[i]) for i in order.tolist()]
+        top = math.log1p(popularity.max()) if len(popularity) else 0.0
+        self._pop = np.log1p(popularity[order]) / top if top > 0 else np.zeros(len(order))
+        self._build_words()
+        self._build_trigrams()
+
+    @classmethod
+    def from_store(cls, store):
+        """Index every live row of a ColumnStore."""
+        return cls(store.ids, store.strings("title"), store.column("popularity"))
+
+    def __len__(self):
+        return len(self.ids)
+
+    # --- build ---
+
+    def _build_words(self):
+        words, ranks = [], []
+        for r, title in enumerate(self._folded):
+            for w in dict.fromkeys(title.split()):
+                words.append(w.encode("utf-8"))
+                ranks.append(r)
+        words = np.array(words, dtype=bytes) if words else np.empty(0, dtype="S1")
+        order = np.argsort(words, kind="stable")  # ranks stay ascending within a word
+        self._words = words[order]
+        self._word_ranks = np.asarray(ranks, dtype=np.int32)[order]
+
+        # single- and two-letter prefixes match a large share of the catalog;
+        # keep their most popular rows ready instead of scanning the range
+        self._short = {}
+        for length in range(1, SHORT_PREFIX + 1):
+            keys = self._words.astype(f"S{length}")
+            uniq, starts = np.unique(keys, return_index=True)
+            ends = np.append(starts[1:], len(keys))
+            for key, lo, hi in zip(uniq.tolist(), starts.tolist(), ends.tolist()):
+                if len(key) == length and hi - lo > CANDIDATES:
+                    self._short[key] = np.unique(self._word_ranks[lo:hi])[:CANDIDATES]
+
+    def _build_trigrams(self):
+        n = len(self._folded)
+        if not n:
+            self._gram_keys = np.empty(0, dtype=np.int64)
+            self._gram_starts = self._gram_ends = np.empty(0, dtype=np.int64)
+            self._gram_rows = np.empty(0, dtype=np.int32)
+            self._gram_count = np.empty(0, dtype=np.int64)
+            return
+        text = "\0".join(" " + t + " " for t in self._folded)
+        cps = np.frombuffer(text.encode("utf-32-le"), dtype=np.uint32).astype(np.int64)
+        codes = _trigram_codes(cps)
+        rows = np.cumsum(cps == 0)[:-2]
+        valid = (cps[:-2] != 0) & (cps[1:-1] != 0) & (cps[2:] != 0)
+        codes, rows = codes[valid], rows[valid]
+
+        order = np.argsort(codes, kind="stable")  # rows stay ascending within a code
+        codes, rows = codes[order], rows[order]
+        keep = np.ones(len(codes), dtype=bool)
+        keep[1:] = (codes[1:] != codes[:-1]) | (rows[1:] != rows[:-1])
+        codes, rows = codes[keep], rows[keep]
+
+        self._gram_keys, self._gram_starts = np.unique(codes, return_index=True)
+        self._gram_ends = np.append(self._gram_starts[1:], len(codes))
+        self._gram_rows = rows.astype(np.int32)
+        self._gram_count = np.bincount(rows, minlength=n)
+
+    # --- prefix ---
+
+    def _range(self, word):
+        key = word.encode("utf-8")
+        if len(key) > self._words.dtype.itemsize:  # longer than any word; numpy would truncate it
+            return 0, 0
+        lo = int(np.searchsorted(self._words, key, "left"))
+        hi = int(np.searchsorted(self._words, _next_prefix(key), "left"))
+        return lo, hi
+
+    def _top(self, word, lo, hi):
+        """Up to CANDIDATES most popular ranks having a word that starts with `word`."""
+        if hi - lo <= CANDIDATES:
+            return np.unique(self._word_ranks[lo:hi])
+        key = word.encode("utf-8")
+        if key in self._short:
+            return self._short[key]
+        return np.unique(np.partition(self._word_ranks[lo:hi], CANDIDATES)[:CANDIDATES])
+
+    def prefix(self, words, limit):
+        """Ranks whose titles have a word starting with each query word."""
+        ranges = [self._range(w) for w in words]
+        if any(lo == hi for lo, hi in ranges):
+            return []
+        driver = min(range(len(words)), key=lambda i: ranges[i][1] - ranges[i][0])
+        others = [w for i, w in enumerate(words) if i != driver]
+        phrase = " ".join(words)
+
+        hits = []
+        for r in self._top(words[driver], *ranges[driver]).tolist():
+            title = self._folded[r]
+            if others:
+                title_words = title.split()
+                if not all(any(t.startswith(w) for t in title_words) for w in others):
+                    continue
+            tier = 0 if title == phrase else 1 if title.startswith(phrase) else 2
+            hits.append((tier, r))
+        hits.sort()
+        return [r for _, r in hits[:limit]]
+
+    # --- fuzzy ---
+
+    def fuzzy(self, folded, limit):
+        """Ranks of titles sharing at least MIN_COVERAGE of the query's trigrams."""
+        grams = _query_trigrams(folded)
+        pos = np.searchsorted(self._gram_keys, grams).clip(0, max(len(self._gram_keys) - 1, 0))
+        known = self._gram_keys[pos] == grams if len(self._gram_keys) else np.zeros(len(grams), dtype=bool)
+        need = math.ceil(MIN_COVERAGE * len(grams))
+        pos = pos[known]
+        if len(pos) < need:
+            return []
+
+        postings = [self._gram_rows[self._gram_starts[p]:self._gram_ends[p]] for p in pos.tolist()]
+        postings.sort(key=len)
+        # a hit missing all of the rarest len - need + 1 trigrams would share too few
+        seed = postings[:len(postings) - need + 1]
+        if sum(len(p) for p in seed) > MAX_FUZZY_CANDIDATES:
+            return []
+        cand = np.unique(np.concatenate(seed))
+        shared = np.zeros(len(cand), dtype=np.int64)
+        for p in postings:
+            at = np.searchsorted(p, cand).clip(0, len(p) - 1)
+            shared += p[at] == cand
+
+        ok = shared >= need
+        cand, shared = cand[ok], shared[ok]
+        coverage = shared / len(grams)
+        dice = 2 * shared / (len(grams) + self._gram_count[cand])
+        score = coverage + 0.25 * dice + POPULARITY_WEIGHT * self._pop[cand]
+        return cand[np.argsort(-score, kind="stable")[:limit]].tolist()
+
+    # --- query ---
+
+    def match(self, query, limit=20):
+        """(ids, kind): prefix matches if any ("prefix"), else fuzzy ones ("fuzzy"); kind is None without hits."""
+        folded = fold(query)
+        if not folded:
+            return [], None
+        kind, ranks = "prefix", self.prefix(folded.split(), limit)
+        if not ranks:
+            kind, ranks = "fuzzy", self.fuzzy(folded, limit)
+        return self.ids[ranks].tolist(), kind if ranks else None
+
+    def search(self, query, limit=20):
+        """Movie ids matching `query`, best first: prefix matches, then fuzzy ones."""
+        return self.match(query, limit)[0]
+
+
+def main(argv=None):
+    from catalog import Catalog
+
+    ap = argparse.ArgumentParser(description="Query the local title index.")
+    ap.add_argument("query")
+    ap.add_argument("--limit", type=int, default=10)
+    ap.add_argument("--repeat", type=int, default=200, help="timing repetitions")
+    args = ap.parse_args(argv)
+
+    catalog = Catalog()
+    started = time.perf_counter()
+    index = catalog.title_index()
+    print(f"indexed {len(index):,} titles in {time.perf_counter() - started:.2f}s")
+
+    started = time.perf_counter()
+    for _ in range(args.repeat):
+        ids = index.search(args.query, args.limit)
+    per_query = (time.perf_counter() - started) / args.repeat
+    print(f"{len(ids)} results, {per_query * 1e6:.0f} µs per query")
+    for m in catalog.search_titles(args.query, args.limit)["results"]:
+        print(f"{m['id']:>10}  {m['popularity']:>8.1f}  {m['title']} ({(m['release_date'] or '')[:4]})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
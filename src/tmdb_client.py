@@ -1,23 +1,45 @@
 import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+
 import requests
-import streamlit as st
 from dotenv import load_dotenv
 
-BASE_URL = "https://api.themoviedb.org/3"
+from features import DETAILS_SCHEMA_VERSION, project_details
+
+BASE_URL = os.getenv("TMDB_BASE_URL", "https://api.themoviedb.org/3")
 
 # Load environment variables from .env (in project root)
 # This lets each user keep their own TMDB_API_KEY local & private.
 load_dotenv()
 
+# Process-wide response cache shared by every session and the cache warmer.
+# Entries outlive their TTL so they can be revalidated with ETag /
+# Last-Modified: a 304 renews the TTL without downloading the body again.
+# Past CACHE_MAX_ENTRIES the least recently used entries are evicted.
+CACHE_TTL = 3600
+CACHE_MAX_ENTRIES = 20000
+
+_cache = OrderedDict()  # key -> (expires_at, data, validators, wire_bytes), least recently used first
+_cache_lock = threading.Lock()  # also guards the stats counters (script threads + the warmer)
+
+_transfer_stats = {
+    "requests": 0, "full_responses": 0, "not_modified": 0,
+    "wire_bytes": 0, "decoded_bytes": 0, "bytes_saved_by_304": 0,
+}
+
+
+def _cache_key(path, params):
+    return (path, tuple(sorted((k, str(v)) for k, v in params.items())))
 
-@st.cache_data(ttl=3600)
-def tmdb_get(path, params=None):
+
+def _fetch(path, params, validators=None):
     """
-    Cached TMDB GET using API key from environment.
-    Expects TMDB_API_KEY to be set in a .env file or environment variable.
+    GET with compression and optional conditional headers.
+    Returns (data or None on 304, validators, wire bytes).
     """
-    params = dict(params) if params else {}
-
     # 🔥 THIS is the correct line: string key name, not a variable
     api_key = os.getenv("TMDB_API_KEY")
     if not api_key:
@@ -27,12 +49,106 @@ def tmdb_get(path, params=None):
             "TMDB_API_KEY=your_real_tmdb_key_here"
         )
 
-    params["api_key"] = api_key
+    query = dict(params)
+    query["api_key"] = api_key
+
+    headers = {"Accept-Encoding": "gzip, deflate"}
+    if validators:
+        if validators.get("etag"):
+            headers["If-None-Match"] = validators["etag"]
+        if validators.get("last_modified"):
+            headers["If-Modified-Since"] = validators["last_modified"]
 
     url = f"{BASE_URL}{path}"
-    r = requests.get(url, params=params, timeout=20)
+    r = requests.get(url, params=query, headers=headers, timeout=20)
+    not_modified = r.status_code == 304
+    with _cache_lock:
+        _transfer_stats["requests"] += 1
+        _transfer_stats["not_modified"] += int(not_modified)
+    if not_modified:
+        return None, validators, 0
+
     r.raise_for_status()
-    return r.json()
+    wire = int(r.headers.get("Content-Length") or len(r.content))
+    with _cache_lock:
+        _transfer_stats["full_responses"] += 1
+        _transfer_stats["wire_bytes"] += wire
+        _transfer_stats["decoded_bytes"] += len(r.content)
+
+    fresh_validators = {
+        "etag": r.headers.get("ETag"),
+        "last_modified": r.headers.get("Last-Modified"),
+    }
+    return r.json(), fresh_validators, wire
+
+
+def _store(key, data, validators=None, wire=0):
+    with _cache_lock:
+        _cache[key] = (time.time() + CACHE_TTL, data, validators, wire)
+        _cache.move_to_end(key)
+        while len(_cache) > CACHE_MAX_ENTRIES:
+            _cache.popitem(last=False)
+
+
+def _lookup(key):
+    """Cache entry for key (marked as recently used), or None."""
+    with _cache_lock:
+        hit = _cache.get(key)
+        if hit is not None:
+            _cache.move_to_end(key)
+        return hit
+
+
+def _evict(key):
+    with _cache_lock:
+        _cache.pop(key, None)
+
+
+def tmdb_get(path, params=None, refresh=False, project=None):
+    """
+    Cached TMDB GET using API key from environment.
+    Expects TMDB_API_KEY to be set in a .env file or environment variable.
+    refresh=True skips the cache lookup and re-fetches (used by the cache warmer).
+    project, if given, shrinks the response before it is cached.
+    """
+    params = dict(params) if params else {}
+    key = _cache_key(path, params)
+    hit = _lookup(key)
+
+    if hit and not refresh and hit[0] > time.time():
+        return hit[1]
+
+    validators = hit[2] if hit and hit[2] and any(hit[2].values()) else None
+    data, validators, wire = _fetch(path, params, validators)
+    if data is None:
+        # 304: cached body is still current, just renew its TTL
+        with _cache_lock:
+            _transfer_stats["bytes_saved_by_304"] += hit[3]
+        _store(key, hit[1], validators, hit[3])
+        return hit[1]
+
+    if project is not None:
+        data = project(data)
+    _store(key, data, validators, wire)
+    return data
+
+
+def transfer_report():
+    """Request / byte counters since startup (304s are refreshes without a body)."""
+    with _cache_lock:
+        report = dict(_transfer_stats)
+    decoded = report["decoded_bytes"]
+    report["compression_ratio"] = report["wire_bytes"] / decoded if decoded else None
+    return report
+
+
+def cache_ttl_remaining(path, params=None):
+    """Seconds until the cached response expires (<= 0 or None means a miss)."""
+    with _cache_lock:
+        hit = _cache.get(_cache_key(path, dict(params) if params else {}))
+    if not hit:
+        return None
+    return hit[0] - time.time()
 
 
 def search_movie(query, page=1):
@@ -43,23 +159,65 @@ def search_person(query, page=1):
     return tmdb_get("/search/person", {"query": query, "page": page})
 
 
-def movie_details(movie_id):
-    return tmdb_get(
-        f"/movie/{movie_id}",
-        {"append_to_response": "credits,keywords,release_dates"},
-    )
+DETAILS_PARAMS = {"append_to_response": "credits,keywords,release_dates"}
+
+_projection_stats = {"movies": 0, "raw_bytes": 0, "compact_bytes": 0}
+
+
+def _deep_size(obj):
+    """Approximate in-memory size of a decoded JSON value."""
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(_deep_size(k) + _deep_size(v) for k, v in obj.items())
+    elif isinstance(obj, list):
+        size += sum(_deep_size(v) for v in obj)
+    return size
+
+
+def _project_and_measure(det):
+    compact = project_details(det)
+    raw_bytes, compact_bytes = _deep_size(det), _deep_size(compact)
+    with _cache_lock:
+        _projection_stats["movies"] += 1
+        _projection_stats["raw_bytes"] += raw_bytes
+        _projection_stats["compact_bytes"] += compact_bytes
+    return compact
+
+
+def projection_report():
+    """Memory kept vs. dropped by detail projection since startup."""
+    with _cache_lock:
+        n, raw, compact = (_projection_stats[k] for k in ("movies", "raw_bytes", "compact_bytes"))
+    return {
+        "schema": DETAILS_SCHEMA_VERSION,
+        "movies": n,
+        "raw_bytes": raw,
+        "compact_bytes": compact,
+        "saved_bytes_per_movie": (raw - compact) / n if n else 0.0,
+        "saved_ratio": 1 - compact / raw if raw else 0.0,
+    }
+
+
+def movie_details(movie_id, refresh=False):
+    path = f"/movie/{movie_id}"
+    det = tmdb_get(path, DETAILS_PARAMS, refresh=refresh, project=_project_and_measure)
+    if det.get("_schema") != DETAILS_SCHEMA_VERSION:
+        # drop the entry rather than revalidate it: a 304 would hand back the same old body
+        _evict(_cache_key(path, DETAILS_PARAMS))
+        det = tmdb_get(path, DETAILS_PARAMS, project=_project_and_measure)
+    return det
 
 
-def trending_movies():
-    return tmdb_get("/trending/movie/week")
+def trending_movies(refresh=False):
+    return tmdb_get("/trending/movie/week", refresh=refresh)
 
 
-def discover_movies(filters, page=1):
+def discover_movies(filters, page=1, refresh=False):
     f = dict(filters)
     f["page"] = page
-    return tmdb_get("/discover/movie", f)
+    return tmdb_get("/discover/movie", f, refresh=refresh)
 
 
-def similar_movies(movie_id, page=1):
+def similar_movies(movie_id, page=1, refresh=False):
     """TMDB similar endpoint (used to tighten rec pools)."""
-    return tmdb_get(f"/movie/{movie_id}/similar", {"page": page})
+    return tmdb_get(f"/movie/{movie_id}/similar", {"page": page}, refresh=refresh)
@@ -0,0 +1,8 @@
+# src/ modules import each other as top-level modules (as under `streamlit run src/app.py`);
+# benchmarks/ provides the offline TMDB stand-in the client tests talk to
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+sys.path.insert(0, os.path.join(ROOT, "src"))
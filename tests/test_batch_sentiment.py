@@ -0,0 +1,64 @@
+# tests/test_batch_sentiment.py
+import unittest
+
+import numpy as np
+
+from batch_sentiment import BatchSentiment, mark_corpus, score_overviews
+from recommender import _sia
+
+# only the rules the batch scorer models: lexicon words, boosters, negation
+SIMPLE = [
+    "good movie",
+    "this is very good",
+    "not a good film",
+    "a bad and sad story",
+    "it was barely funny",
+    "The movie is extremely bad",
+    "",
+]
+
+
+class TestMarkCorpus(unittest.TestCase):
+
+    def test_booster_and_negation_marks(self):
+        self.assertEqual(mark_corpus(["Very good", "not a good film"]),
+                         ["very b_good", "not neg_a neg_good neg_film"])
+
+    def test_booster_at_end_of_overview_does_not_join_the_next(self):
+        texts = ["this is very", "good movie", "x"]
+        self.assertEqual(mark_corpus(texts), ["this is very", "good movie", "x"])
+        self.assertEqual(len(score_overviews(texts)), len(texts))
+
+    def test_negation_at_end_of_overview_stops_there(self):
+        self.assertEqual(mark_corpus(["it is not", "good"]), ["it is not", "good"])
+
+    def test_newlines_inside_an_overview(self):
+        self.assertEqual(mark_corpus(["very\ngood", None]), ["very b_good", ""])
+
+
+class TestBatchSentiment(unittest.TestCase):
+
+    def test_matches_vader_on_modelled_rules(self):
+        scores = BatchSentiment().compound(SIMPLE)
+        for text, score in zip(SIMPLE, scores):
+            self.assertAlmostEqual(score, _sia.polarity_scores(text)["compound"], places=3, msg=text)
+
+    def test_batch_equals_one_document_at_a_time(self):
+        texts = SIMPLE + ["so very", "bad", "never", "funny", None]
+        engine = BatchSentiment()
+        batch = engine.compound(texts)
+        single = [engine.compound([t])[0] for t in texts]
+        np.testing.assert_allclose(batch, single)
+
+    def test_update_weights_reuses_counts(self):
+        engine = BatchSentiment()
+        counts = engine.counts(["good movie"])
+        before = engine.compound_from_counts(counts)[0]
+        engine.update_weights({"good": -1.9, "not_a_word": 3.0})
+        self.assertGreater(before, 0)
+        self.assertLess(engine.compound_from_counts(counts)[0], 0)
+        self.assertNotIn("not_a_word", engine.lexicon)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,57 @@
+# tests/test_cache_warmer.py
+import unittest
+
+import tmdb_client
+from cache_warmer import CacheWarmer
+from test_tmdb_client import StandInTest
+from tmdb_client import transfer_report
+
+
+class TestCacheWarmer(StandInTest):
+
+    def warmer(self, **kwargs):
+        kwargs.setdefault("budget", 100)
+        kwargs.setdefault("discover_pages", 1)
+        kwargs.setdefault("details_per_list", 3)
+        return CacheWarmer(**kwargs)
+
+    def test_budget_caps_api_calls(self):
+        report = self.warmer(budget=2).run_once()
+        self.assertEqual(report["calls"], 2)
+        self.assertEqual(report["warmed"], ["trending", "discover p1"])
+        self.assertGreater(report["over_budget"], 0)
+        self.assertEqual(transfer_report()["requests"], 2)
+
+    def test_fresh_entries_are_left_alone(self):
+        details = []
+        warmer = self.warmer(on_details=details.extend)
+        first = warmer.run_once()
+        self.assertGreater(first["calls"], 2)
+        self.assertEqual(first["errors"], [])
+        self.assertTrue(details)
+
+        second = warmer.run_once()
+        self.assertEqual(second["calls"], 0)
+        self.assertEqual(second["fresh"], first["calls"])
+
+    def test_entries_inside_the_margin_are_revalidated(self):
+        warmer = self.warmer()
+        first = warmer.run_once()
+        warmer.margin = tmdb_client.CACHE_TTL + 60  # everything would lapse before the next cycle
+        second = warmer.run_once()
+        self.assertEqual(second["calls"], first["calls"])
+        self.assertEqual(transfer_report()["not_modified"], first["calls"])  # unchanged, so all 304s
+
+    def test_most_picked_seeds_are_warmed(self):
+        warmer = self.warmer(top_seeds=1)
+        for mid in (7, 7, 9):
+            warmer.note_seed(mid)
+        warmed = warmer.run_once()["warmed"]
+        self.assertIn("details 7", warmed)
+        self.assertIn("similar 7 p1", warmed)
+        self.assertIn("similar 7 p2", warmed)
+        self.assertNotIn("similar 9 p1", warmed)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,265 @@
+# tests/test_columnar.py
+import json
+import os
+import random
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+
+import columnar
+from catalog import Catalog
+from columnar import ColumnStore, FIELDS, normalize, _gather_ragged, _ragged_take
+from filter_index import FilterIndex
+
+GENRES = {28: "Action", 35: "Comedy", 18: "Drama", 10749: "Romance", 16: "Animation"}
+
+
+def movie(mid, rng, title=None):
+    genre_ids = rng.sample(sorted(GENRES), rng.randint(0, 3))
+    keywords = rng.sample(range(1000, 1020), rng.randint(0, 4))
+    return {
+        "id": mid,
+        "title": title or f"Movie {mid} {rng.choice(['Amélie', 'Ōkami', 'naïve', 'plain'])}",
+        "overview": rng.choice(["", "A story.", "Ünïcödé overview with emoji 🎬."]),
+        "soup": " ".join(rng.sample(["space", "heist", "love", "war", "ghost"], 3)),
+        "vote_average": round(rng.uniform(0, 10), 1),
+        "vote_count": rng.randint(0, 50000),
+        "popularity": round(rng.uniform(0, 300), 3),
+        "release_date": rng.choice(["", "1999-03-31", "2004-07-23", "2015-10-02"]),
+        "runtime": rng.choice([None, 90, 136]),
+        "cert": rng.choice(["", "R", "PG-13"]),
+        "language": rng.choice(["en", "fr", "ja"]),
+        "genres_list": [GENRES[g] for g in genre_ids],
+        "genre_ids": genre_ids,
+        "keywords_list": [f"kw{k}" for k in keywords],
+        "keyword_ids": keywords,
+        "cast_list": rng.sample(["A", "Bé", "C", "D", "E"], rng.randint(0, 5)),
+        "director": rng.choice(["", "Jean-Pierre Jeunet", "X"]),
+        "poster_path": rng.choice([None, "/p.jpg"]),
+    }
+
+
+class TestRaggedGather(unittest.TestCase):
+
+    def test_gather_matches_slicing(self):
+        rng = np.random.default_rng(0)
+        lengths = rng.integers(0, 6, 50)
+        offsets = np.concatenate([[0], np.cumsum(lengths)])
+        data = rng.integers(0, 255, offsets[-1]).astype(np.uint8)
+        # adjacent runs, repeats, reversed order and empty rows
+        for rows in ([], [3], [4, 5, 6, 7], [10, 2, 2, 11, 12], list(range(49, -1, -1)), [0, 49]):
+            out, new_offsets = _gather_ragged(data, offsets, np.array(rows, dtype=np.int64))
+            expected = [data[offsets[r]:offsets[r + 1]] for r in rows]
+            self.assertEqual(len(new_offsets), len(rows) + 1)
+            for i, want in enumerate(expected):
+                np.testing.assert_array_equal(out[new_offsets[i]:new_offsets[i + 1]], want)
+
+            flat, take_offsets = _ragged_take(offsets, np.array(rows, dtype=np.int64))
+            np.testing.assert_array_equal(take_offsets, new_offsets)
+            np.testing.assert_array_equal(data[flat], out)
+
+
+class TestColumnStore(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.path = os.path.join(self.tmp.name, "catalog")
+        self.rng = random.Random(7)
+        # keep deltas around until a test compacts (or lowers MAX_DELTAS)
+        patcher = mock.patch.object(columnar, "MAX_DELTA_RATIO", 100.0)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_round_trip_in_request_order(self):
+        movies = [movie(mid, self.rng) for mid in self.rng.sample(range(1, 10000), 60)]
+        store = ColumnStore(self.path)
+        store.append(movies[:40])
+        store.append(movies[40:])
+
+        ids = [m["id"] for m in movies]
+        self.rng.shuffle(ids)
+        expected = {m["id"]: normalize(m) for m in movies}
+        self.assertEqual(list(store.records(ids)), [expected[i] for i in ids])
+        self.assertEqual(store.get(ids[0]), expected[ids[0]])
+
+        frame = store.frame(ids[:10] + [424242])  # unknown ids are dropped
+        self.assertEqual(frame["id"].tolist(), ids[:10])
+        self.assertEqual(list(frame.columns), list(FIELDS))
+        self.assertEqual(frame["genre_ids"].tolist(), [expected[i]["genre_ids"] for i in ids[:10]])
+
+        before = list(store.records(ids))
+        self.assertEqual(len(store.stats()["segments"]), 2)
+        report = store.compact()
+        self.assertEqual(report["segments"], 2)
+        self.assertEqual(len(store.stats()["segments"]), 1)
+        self.assertEqual(list(store.records(ids)), before)
+        self.assertEqual(list(ColumnStore(self.path).records(ids)), before)
+
+    def test_newest_segment_wins(self):
+        store = ColumnStore(self.path)
+        store.append([movie(mid, self.rng) for mid in range(1, 21)])
+        edited = [dict(movie(mid, self.rng), title=f"Edited {mid}") for mid in (3, 7)]
+        store.append(edited)
+        store.append([dict(movie(7, self.rng), title="Edited 7 again"), movie(21, self.rng)])
+
+        self.assertEqual(len(store), 21)
+        self.assertEqual(store.get(3)["title"], "Edited 3")
+        self.assertEqual(store.get(7)["title"], "Edited 7 again")
+        self.assertEqual(store.strings("title", [7, 3, 999]), ["Edited 7 again", "Edited 3", ""])
+        np.testing.assert_array_equal(store.ids, np.arange(1, 22))
+
+        expected = {m["id"]: m for m in store.records()}
+        store.compact()
+        self.assertEqual({m["id"]: m for m in store.records()}, expected)
+        self.assertEqual(store.get(7)["title"], "Edited 7 again")
+
+    def test_columns_and_lists_across_segments(self):
+        movies = [movie(mid, self.rng) for mid in range(1, 31)]
+        store = ColumnStore(self.path)
+        store.append(movies[:10])
+        store.append(movies[10:20])
+        store.append(movies[20:])
+
+        ids = [25, 2, 14, 404, 9]
+        votes = store.column("vote_count", ids)
+        self.assertEqual(votes.tolist(), [movies[i - 1]["vote_count"] if i <= 30 else 0 for i in ids])
+        values, offsets = store.lists("genre_ids", ids)
+        for i, mid in enumerate(ids):
+            want = movies[mid - 1]["genre_ids"] if mid <= 30 else []
+            self.assertEqual(values[offsets[i]:offsets[i + 1]].tolist(), want)
+
+    def test_append_only_flags_compaction(self):
+        store = ColumnStore(self.path)
+        store.append([movie(mid, self.rng) for mid in range(1, 101)])
+        store.compact()
+        with mock.patch.object(columnar, "MAX_DELTAS", 3):
+            for mid in range(101, 104):
+                store.append([movie(mid, self.rng)])
+                self.assertFalse(store.needs_compaction())
+            store.append([movie(104, self.rng)])
+            self.assertTrue(store.needs_compaction())
+        self.assertEqual(len(store.stats()["segments"]), 5)
+        self.assertEqual(len(store), 104)
+
+    def test_catalog_compacts_in_the_background(self):
+        catalog = Catalog(self.path)
+        catalog.ingest([movie(mid, self.rng) for mid in range(1, 101)])
+        catalog.store.compact()
+        with mock.patch.object(columnar, "MAX_DELTAS", 3):
+            for mid in range(101, 105):
+                catalog.ingest([movie(mid, self.rng)])
+            catalog.wait()
+        self.assertEqual(len(catalog.store.refresh().stats()["segments"]), 1)
+        self.assertEqual(len(catalog), 104)
+
+    def test_catalog_serves_old_filter_index_until_rebuilt(self):
+        catalog = Catalog(self.path)
+        catalog.ingest([dict(movie(mid, self.rng), vote_count=10) for mid in range(1, 21)])
+        old = catalog.filter_index()
+        catalog.ingest([dict(movie(21, self.rng), vote_count=10)])
+        self.assertIs(catalog.filter_index(), old)
+        catalog.wait()
+        self.assertEqual(len(catalog.filter_index()), 21)
+        self.assertIn(21, catalog.filter_index().query({"vote_count.gte": 10}).tolist())
+
+    def test_appends_during_compaction_are_kept(self):
+        store = ColumnStore(self.path)
+        store.append([movie(mid, self.rng) for mid in range(1, 11)])
+        store.append([dict(movie(3, self.rng), title="Edited 3")])
+        other = ColumnStore(self.path)
+        save = columnar._save_arrays
+
+        def save_then_append(path, arrays):
+            save(path, arrays)
+            with mock.patch.object(columnar, "_save_arrays", save):
+                other.append([dict(movie(3, self.rng), title="Edited 3 again"), movie(11, self.rng)])
+
+        with mock.patch.object(columnar, "_save_arrays", save_then_append):
+            report = store.compact()
+        self.assertEqual(report["segments"], 2)
+        self.assertEqual(len(store.stats()["segments"]), 2)  # new base + the delta appended meanwhile
+        self.assertEqual(len(store), 11)
+        self.assertEqual(store.get(3)["title"], "Edited 3 again")
+
+    def test_compaction_that_lost_the_race_is_dropped(self):
+        store = ColumnStore(self.path)
+        store.append([movie(1, self.rng)])
+        store.append([movie(2, self.rng)])
+        other = ColumnStore(self.path)
+        save = columnar._save_arrays
+
+        def save_then_compact(path, arrays):
+            save(path, arrays)
+            with mock.patch.object(columnar, "_save_arrays", save):
+                other.compact()
+
+        with mock.patch.object(columnar, "_save_arrays", save_then_compact):
+            self.assertTrue(store.compact()["skipped"])
+        self.assertEqual(len(store.stats()["segments"]), 1)
+        self.assertEqual(store.ids.tolist(), [1, 2])
+
+    def test_compacted_segments_are_kept_for_a_grace_period(self):
+        store = ColumnStore(self.path)
+        store.append([movie(1, self.rng)])
+        store.append([movie(2, self.rng)])
+        old = [s["name"] for s in store.stats()["segments"]]
+        store.compact()
+        for name in old:
+            self.assertTrue(os.path.isdir(os.path.join(self.path, name)))
+
+        # a reader that still has the pre-compaction MANIFEST can open every segment
+        stale = ColumnStore(self.path)
+        self.assertEqual(len(stale), 2)
+
+        with mock.patch.object(columnar, "SEGMENT_GRACE", 0):
+            store.append([movie(3, self.rng)])
+        for name in old:
+            self.assertFalse(os.path.exists(os.path.join(self.path, name)))
+        with open(os.path.join(self.path, "MANIFEST"), encoding="utf-8") as f:
+            self.assertEqual(json.load(f)["retired"], [])
+
+    def test_writers_see_each_others_segments(self):
+        a, b = ColumnStore(self.path), ColumnStore(self.path)
+        a.append([movie(1, self.rng)])
+        b.append([movie(2, self.rng)])  # b opened before a's append
+        a.append([movie(3, self.rng)])
+        self.assertEqual(ColumnStore(self.path).ids.tolist(), [1, 2, 3])
+
+
+class TestFilterIndexFromStore(unittest.TestCase):
+
+    def test_matches_index_built_from_rows(self):
+        rng = random.Random(11)
+        movies = [movie(mid, rng) for mid in range(1, 201)]
+        with tempfile.TemporaryDirectory() as tmp:
+            store = ColumnStore(os.path.join(tmp, "catalog"))
+            store.append(movies[:150])
+            store.append([dict(m, vote_count=0) for m in movies[100:]])  # overrides 100..150
+            latest = list(store.records())
+
+            for compacted in (False, True):
+                if compacted:
+                    store.compact()
+                from_store, from_rows = FilterIndex.from_store(store), FilterIndex(latest)
+                for params in (
+                    {},
+                    {"vote_count.gte": 1},
+                    {"with_genres": "35,18"},
+                    {"with_genres": "28|16", "with_original_language": "fr"},
+                    {"with_keywords": "1003", "certification": "R"},
+                    {"with_runtime.gte": 100, "primary_release_date.lte": "2005-01-01"},
+                    {"vote_average.gte": 5, "sort_by": "vote_average.desc"},
+                ):
+                    self.assertEqual(from_store.query(params).tolist(), from_rows.query(params).tolist(), params)
+                ids = [5, 120, 180, 999]
+                self.assertEqual(
+                    from_store.restrict(ids, exclude_certs={"R"}, any_genres=["35"]),
+                    from_rows.restrict(ids, exclude_certs={"R"}, any_genres=["35"]),
+                )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,128 @@
+# tests/test_cowatch.py
+import json
+import os
+import random
+import shutil
+import tempfile
+import unittest
+
+import cowatch
+from cowatch import CoWatch, record_add
+
+T0 = 1_700_000_000.0
+DAY = 86400
+HALF_LIFE = cowatch.HALF_LIFE_DAYS * DAY
+
+
+class CoWatchTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.events = os.path.join(self.tmp, "events.jsonl")
+        self.state = os.path.join(self.tmp, "cowatch.json")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def model(self, state_path=None):
+        return CoWatch(events_path=self.events, state_path=state_path)
+
+    def add(self, session, movie, ts):
+        record_add(session, movie, path=self.events, ts=ts)
+
+    def assertSameTop(self, a, b):
+        self.assertEqual(sorted(a.top), sorted(b.top))
+        for mid in a.top:
+            self.assertEqual(sorted(a.top[mid]), sorted(b.top[mid]), mid)
+            for other, score in a.top[mid].items():
+                self.assertAlmostEqual(score, b.top[mid][other], places=9)
+
+    def test_incremental_batches_match_full_replay(self):
+        rng = random.Random(7)
+        inc = self.model()
+        # three weeks of adds, folded in six-hour batches (one daily full rescore included)
+        for batch in range(84):
+            start = T0 + batch * 6 * 3600
+            for ts in sorted(start + rng.uniform(0, 6 * 3600) for _ in range(15)):
+                self.add(f"s{rng.randrange(25)}", rng.randrange(40), ts)
+            inc.update(now=start + 6 * 3600)
+        now = T0 + 84 * 6 * 3600
+
+        full = self.model()
+        report = full.update(now=now, rebuild=True)
+        self.assertEqual(report["events"], 84 * 15)
+        self.assertEqual(inc.events, full.events)
+        self.assertTrue(full.top)
+        self.assertSameTop(inc, full)
+
+    def test_weights_halve_every_half_life(self):
+        self.add("s1", 1, T0)
+        self.add("s1", 2, T0)
+        model = self.model()
+        for now in [T0, T0 + HALF_LIFE, T0 + 2 * HALF_LIFE]:
+            model.update(now=now)
+        self.assertAlmostEqual(model.pairs[1][2] / model._scale(T0 + HALF_LIFE), 0.5)
+        self.assertAlmostEqual(model.degree[1] / model._scale(T0 + 2 * HALF_LIFE), 0.25)
+
+    def test_recent_co_adds_outweigh_old_ones(self):
+        for s in ["a", "b"]:
+            self.add(s, 1, T0)
+            self.add(s, 2, T0)
+        for s in ["c", "d"]:
+            self.add(s, 1, T0 + HALF_LIFE / 2)
+            self.add(s, 3, T0 + HALF_LIFE / 2)
+        model = self.model()
+        model.update(now=T0 + HALF_LIFE / 2)
+        top = model.neighbours(1)
+        self.assertGreater(top[3], top[2])
+
+    def test_pairs_below_min_support_drop_out_on_daily_rescore(self):
+        self.add("s1", 1, T0)
+        self.add("s1", 2, T0)
+        for s in ["s2", "s3"]:
+            self.add(s, 3, T0)
+            self.add(s, 4, T0)
+        model = self.model()
+        model.update(now=T0 + 60)
+        self.assertIn(2, model.neighbours(1))
+        self.assertIn(4, model.neighbours(3))
+
+        # one co-add 1.5 half-lives ago weighs ~0.35 < MIN_SUPPORT; two weigh ~0.71
+        model.update(now=T0 + 1.5 * HALF_LIFE)
+        self.assertEqual(model.neighbours(1), {})
+        self.assertEqual(model.neighbours(2), {})
+        self.assertIn(4, model.neighbours(3))
+
+    def test_rows_are_not_rescored_between_daily_passes(self):
+        self.add("s1", 1, T0)
+        self.add("s1", 2, T0)
+        model = self.model()
+        model.update(now=T0)
+        report = model.update(now=T0 + cowatch.RESCORE_ALL_EVERY - 1)
+        self.assertEqual(report["rows_rescored"], 0)
+        report = model.update(now=T0 + cowatch.RESCORE_ALL_EVERY)
+        self.assertEqual(report["rows_rescored"], 2)
+
+    def test_snapshot_is_throttled_and_log_tail_is_refolded(self):
+        self.add("s1", 1, T0)
+        self.add("s1", 2, T0)
+        model = self.model(self.state)
+        model.update(now=T0)
+        with open(self.state, encoding="utf-8") as f:
+            saved_offset = json.load(f)["offset"]
+
+        self.add("s1", 3, T0 + 30)
+        model.update(now=T0 + 60)
+        with open(self.state, encoding="utf-8") as f:
+            self.assertEqual(json.load(f)["offset"], saved_offset)  # not rewritten yet
+
+        reopened = self.model(self.state)
+        reopened.update(now=T0 + 60)
+        self.assertSameTop(reopened, model)
+
+        model.flush()
+        with open(self.state, encoding="utf-8") as f:
+            self.assertEqual(json.load(f)["offset"], os.path.getsize(self.events))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,73 @@
+# tests/test_filter_index.py
+import unittest
+
+from filter_index import FilterIndex
+
+MOVIES = [
+    {"id": 1, "release_date": "1999-03-31", "vote_average": 8.7, "vote_count": 25000, "runtime": 136,
+     "popularity": 90.0, "cert": "R", "language": "en", "genre_ids": [28, 878], "keyword_ids": [100, 101]},
+    {"id": 2, "release_date": "2004-07-23", "vote_average": 6.1, "vote_count": 900, "runtime": None,
+     "popularity": 12.0, "cert": "PG-13", "language": "en", "genre_ids": [35], "keyword_ids": [102]},
+    {"id": 3, "release_date": "2001-04-25", "vote_average": 7.8, "vote_count": 11000, "runtime": 122,
+     "popularity": 40.0, "cert": "R", "language": "fr", "genre_ids": [35, 10749], "keyword_ids": [101]},
+    {"id": 4, "release_date": "2015-10-02", "vote_average": 7.0, "vote_count": 3000, "runtime": 95,
+     "popularity": 55.0, "cert": "PG", "language": "en", "genre_ids": [16, 35], "keyword_ids": []},
+]
+
+
+class TestFilterIndexMask(unittest.TestCase):
+
+    def setUp(self):
+        self.index = FilterIndex(MOVIES)
+
+    def ids(self, params):
+        return sorted(self.index.query(params).tolist())
+
+    def test_genres_comma_means_all_of(self):
+        self.assertEqual(self.ids({"with_genres": "35,10749"}), [3])
+
+    def test_genres_pipe_means_any_of(self):
+        self.assertEqual(self.ids({"with_genres": "878|16"}), [1, 4])
+
+    def test_unknown_genre(self):
+        self.assertEqual(self.ids({"with_genres": "35,99999"}), [])
+        self.assertEqual(self.ids({"with_genres": "35|99999"}), [2, 3, 4])
+
+    def test_keywords(self):
+        self.assertEqual(self.ids({"with_keywords": "101"}), [1, 3])
+
+    def test_ranges(self):
+        params = {"primary_release_date.gte": "2000-01-01", "vote_average.gte": 7.0, "vote_count.gte": 1000}
+        self.assertEqual(self.ids(params), [3, 4])
+
+    def test_unknown_runtime_never_matches_a_runtime_filter(self):
+        self.assertNotIn(2, self.ids({"with_runtime.gte": 0}))
+        self.assertNotIn(2, self.ids({"with_runtime.lte": 500}))
+        self.assertIn(2, self.ids({"vote_count.gte": 0}))
+
+    def test_cert_and_language(self):
+        self.assertEqual(self.ids({"certification": "R", "with_original_language": "en"}), [1])
+        self.assertIsNone(self.index.mask({"certification": "R", "certification_country": "GB"}))
+
+    def test_cast_and_crew_need_the_api(self):
+        self.assertIsNone(self.index.mask({"with_cast": "500"}))
+        self.assertIsNone(self.index.query({"with_crew": "138"}))
+        self.assertIsNone(self.index.matches([1, 2], {"with_genres": "35", "with_cast": "500"}))
+
+    def test_ignored_params_and_sort(self):
+        self.assertEqual(self.index.query({"page": 3, "sort_by": "popularity.desc"}).tolist(), [1, 4, 3, 2])
+        self.assertEqual(self.index.query({"sort_by": "vote_average.asc"}, limit=2).tolist(), [2, 4])
+
+    def test_matches_keeps_order_and_drops_unknown(self):
+        self.assertEqual(self.index.matches([4, 99, 3, 1], {"with_genres": "35"}), [4, 3])
+
+    def test_restrict(self):
+        self.assertEqual(self.index.restrict([1, 2, 3, 4], exclude_certs=["R"]), [2, 4])
+        # unknown ids survive the cert filter but never share a genre
+        self.assertEqual(self.index.restrict([99, 1, 2], exclude_certs=["R"]), [99, 2])
+        self.assertEqual(self.index.restrict([99, 1, 2, 3], any_genres=["878", "10749"]), [1, 3])
+        self.assertEqual(self.index.restrict([1, 2, 3, 4], exclude_certs=["R"], any_genres=["35"]), [2, 4])
+
+
+if __name__ == "__main__":
+    unittest.main()
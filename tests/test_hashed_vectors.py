@@ -0,0 +1,80 @@
+# tests/test_hashed_vectors.py
+import unittest
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+from sklearn.feature_extraction.text import TfidfTransformer
+
+import recommender
+from recommender import HASH_FEATURES, _hasher, fit_hashed, global_idf, hashed_row
+
+SOUPS = {
+    1: "space heist crew space",
+    2: "love story paris",
+    3: "space love war",
+    4: "ghost story heist",
+}
+
+
+class HashedStateTest(unittest.TestCase):
+    """Each test starts from an empty global hashing state."""
+
+    def setUp(self):
+        for name, value in (("_hash_rows", {}), ("_doc_freq", np.zeros(HASH_FEATURES, dtype=np.int64))):
+            patcher = mock.patch.object(recommender, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def columns(self, text):
+        return _hasher.transform([text]).indices
+
+
+class TestHashedRows(HashedStateTest):
+
+    def test_rows_are_cached_per_movie(self):
+        row = hashed_row(1, SOUPS[1])
+        self.assertIs(hashed_row(1, SOUPS[1]), row)
+        self.assertEqual(row[0, self.columns("space")[0]], 2)
+        self.assertEqual(recommender._doc_freq[self.columns("space")].tolist(), [1])
+
+    def test_changed_soup_moves_document_frequencies(self):
+        for mid in (1, 3):
+            hashed_row(mid, SOUPS[mid])
+        space, heist, ghost = (self.columns(w)[0] for w in ("space", "heist", "ghost"))
+        self.assertEqual(recommender._doc_freq[[space, heist, ghost]].tolist(), [2, 1, 0])
+
+        row = hashed_row(1, "ghost crew")
+        self.assertEqual(row[0, ghost], 1)
+        self.assertEqual(recommender._doc_freq[[space, heist, ghost]].tolist(), [1, 0, 1])
+        self.assertEqual(len(recommender._hash_rows), 2)
+        self.assertEqual(int(recommender._doc_freq.sum()), sum(
+            len(self.columns(s)) for s in ("ghost crew", SOUPS[3])
+        ))
+
+        hashed_row(1, "")
+        self.assertEqual(recommender._doc_freq[[space, ghost]].tolist(), [1, 0])
+
+    def test_incremental_state_matches_a_full_refit(self):
+        for mid, soup in SOUPS.items():
+            hashed_row(mid, soup)
+        final = {**SOUPS, 2: "love story rome", 4: "space ghost"}
+        for mid in (2, 4):
+            hashed_row(mid, final[mid])
+        df = pd.DataFrame({"id": list(final), "soup": list(final.values())})
+        _, incremental = fit_hashed(df)
+        idf = global_idf()
+
+        with mock.patch.object(recommender, "_hash_rows", {}), \
+                mock.patch.object(recommender, "_doc_freq", np.zeros(HASH_FEATURES, dtype=np.int64)):
+            _, refit = fit_hashed(df)
+            np.testing.assert_allclose(global_idf(), idf)
+        np.testing.assert_allclose(incremental.toarray(), refit.toarray())
+
+        # and the same weighting scikit-learn's TfidfTransformer gives the pool
+        expected = TfidfTransformer().fit_transform(_hasher.transform(df["soup"]))
+        np.testing.assert_allclose(incremental.toarray(), expected.toarray())
+
+
+if __name__ == "__main__":
+    unittest.main()
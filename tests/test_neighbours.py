@@ -0,0 +1,114 @@
+# tests/test_neighbours.py
+import os
+import random
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+
+import neighbours
+import recommender
+
+WORDS = ["space", "heist", "robot", "love", "war", "detective", "island", "ghost", "school", "dragon",
+         "family", "revenge", "comedy", "music", "storm", "desert", "prison", "vampire", "road", "ocean"]
+MOODS = ["wonderful happy hopeful story", "terrible sad grim story", "quiet calm story", "brutal angry story"]
+
+
+def movie(mid, rng):
+    words = rng.sample(WORDS, 4)
+    return {
+        "id": mid,
+        "title": f"Movie {mid}",
+        "overview": f"A {rng.choice(MOODS)} about {words[0]} and {words[1]}.",
+        "soup": " ".join(words),
+        "vote_average": 7.0, "vote_count": 100, "popularity": 1.0,
+        "release_date": "2000-01-01", "runtime": 100, "cert": "", "language": "en",
+    }
+
+
+def catalog(n, seed):
+    rng = random.Random(seed)
+    return [movie(mid, rng) for mid in range(1, n + 1)]
+
+
+class TestNeighbourUpdates(unittest.TestCase):
+    """Incremental updates must match a full rebuild; IDF is held at 1 so both see the same vectors."""
+
+    def setUp(self):
+        patcher = mock.patch.object(recommender, "global_idf", lambda: np.ones(recommender.HASH_FEATURES))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def dir(self, name):
+        return os.path.join(self.tmp.name, name)
+
+    def assert_same_tables(self, a, b):
+        ta, tb = neighbours.NeighbourTable(a["path"]), neighbours.NeighbourTable(b["path"])
+        np.testing.assert_array_equal(ta.ids, tb.ids)
+        np.testing.assert_allclose(
+            np.asarray(ta.nbr_scores, dtype=np.float32), np.asarray(tb.nbr_scores, dtype=np.float32), atol=2e-3,
+        )
+        # which of several movies tied at the k-th score makes the cut is arbitrary,
+        # everything scoring above the cut must be the same
+        for ids_a, ids_b, scores in zip(ta.nbr_ids, tb.nbr_ids, np.asarray(ta.nbr_scores, dtype=np.float32)):
+            above = scores > scores[-1] + 2e-3
+            self.assertEqual(set(ids_a[above].tolist()), set(ids_b[above].tolist()))
+
+    def test_incremental_matches_full(self):
+        movies = catalog(40, seed=1)
+        neighbours.update(movies, self.dir("inc"), k=8)
+
+        rng = random.Random(2)
+        changed = {5: movie(5, rng), 17: movie(17, rng), 33: movie(33, rng)}
+        movies = [changed.get(m["id"], m) for m in movies] + [movie(mid, rng) for mid in range(41, 45)]
+
+        inc = neighbours.update(movies, self.dir("inc"), k=8)
+        full = neighbours.update(movies, self.dir("full"), k=8, full=True)
+        self.assertEqual(inc["mode"], "incremental")
+        self.assertEqual(inc["changed"], 7)
+        self.assertEqual(full["changed"], 44)
+        self.assert_same_tables(inc, full)
+
+    def test_rows_listing_a_changed_movie_are_recomputed(self):
+        movies = catalog(30, seed=3)
+        neighbours.update(movies, self.dir("inc"), k=5)
+        # every other movie now shares movie 1's soup, so 1 must not keep its old neighbour scores
+        rng = random.Random(4)
+        edited = dict(movie(1, rng), soup=movies[1]["soup"], overview=movies[1]["overview"])
+        movies[0] = edited
+        inc = neighbours.update(movies, self.dir("inc"), k=5)
+        full = neighbours.update(movies, self.dir("full"), k=5, full=True)
+        self.assert_same_tables(inc, full)
+        ids, scores = neighbours.NeighbourTable(inc["path"]).lookup(2)
+        self.assertEqual(int(ids[0]), 1)
+
+    def test_short_rows_are_padded(self):
+        movies = catalog(4, seed=5)
+        report = neighbours.update(movies, self.dir("inc"), k=6)
+        table = neighbours.NeighbourTable(report["path"])
+        self.assertTrue(np.all(np.asarray(table.nbr_ids)[:, 3:] == -1))
+        self.assertTrue(np.all(np.isneginf(np.asarray(table.nbr_scores, dtype=np.float32)[:, 3:])))
+        ids, scores = table.lookup(1)
+        self.assertEqual(len(ids), 3)
+        self.assertNotIn(1, ids.tolist())
+
+        movies.append(movie(5, random.Random(6)))
+        inc = neighbours.update(movies, self.dir("inc"), k=6)
+        full = neighbours.update(movies, self.dir("full"), k=6, full=True)
+        self.assert_same_tables(inc, full)
+        self.assertEqual(len(neighbours.NeighbourTable(inc["path"]).lookup(1)[0]), 4)
+
+    def test_unchanged_catalog_is_not_rewritten(self):
+        movies = catalog(20, seed=7)
+        first = neighbours.update(movies, self.dir("inc"), k=5)
+        again = neighbours.update(movies, self.dir("inc"), k=5)
+        self.assertEqual(again["path"], first["path"])
+        self.assertEqual(again["changed"], 0)
+        self.assertEqual(len([d for d in os.listdir(self.dir("inc")) if d.startswith("v")]), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
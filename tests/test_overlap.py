@@ -0,0 +1,89 @@
+# tests/test_overlap.py
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from recommender import (
+    build_incidence, explain_shared, fit_tfidf, overlap_scores, recommend_hybrid, shared_attributes,
+)
+
+
+def pool():
+    return pd.DataFrame({
+        "id": [10, 20, 30, 40],
+        "soup": ["space heist", "space war", "love story", "space heist crew"],
+        "overview": ["", "", "", ""],
+        "sentiment": [0.5, 0.4, -0.2, 0.5],
+        "genres_list": [["Action", "Sci-Fi"], ["Sci-Fi"], ["Romance"], ["Action", "Sci-Fi"]],
+        "keywords_list": [["heist"], [], ["paris"], ["heist", "crew"]],
+        "cast_list": [["A", "B"], ["B"], ["C"], []],
+        "director": ["X", "Y", "Z", "X"],
+    })
+
+
+class TestOverlap(unittest.TestCase):
+
+    def setUp(self):
+        self.df = pool()
+        self.incidence = build_incidence(self.df)
+        self.shared = shared_attributes(self.incidence, 0)
+
+    def test_shared_attributes_per_row(self):
+        self.assertEqual(self.shared["genres_list"].getnnz(axis=1).tolist(), [2, 1, 0, 2])
+        self.assertEqual(self.shared["keywords_list"].getnnz(axis=1).tolist(), [1, 0, 0, 1])
+        self.assertEqual(self.shared["cast_list"].getnnz(axis=1).tolist(), [2, 1, 0, 0])
+        self.assertEqual(self.shared["director"].getnnz(axis=1).tolist(), [1, 0, 0, 1])
+
+    def test_overlap_scores_use_soup_weights(self):
+        # genres 4, keywords 6, cast 2, director 2 (as in build_soup)
+        raw = np.array([4 * 2 + 6 + 2 * 2 + 2, 4 + 2, 0, 4 * 2 + 6 + 2], dtype=float)
+        np.testing.assert_allclose(overlap_scores(self.shared), raw / raw.max())
+        self.assertEqual(overlap_scores({}), 0.0)
+
+    def test_explain_shared(self):
+        seed = self.df.iloc[0]
+        self.assertEqual(
+            explain_shared(self.shared, self.incidence, seed, 3),
+            "Shared genres: Action, Sci-Fi · Shared keywords: heist · Same director",
+        )
+        self.assertEqual(explain_shared(self.shared, self.incidence, seed, 1),
+                         "Shared genres: Sci-Fi · Shared cast: B")
+        self.assertEqual(explain_shared(self.shared, self.incidence, seed, 2),
+                         "Similar plot/style based on hybrid match.")
+
+
+class TestRecommendHybrid(unittest.TestCase):
+
+    def recommend(self, df, **kwargs):
+        _, mat = fit_tfidf(df)
+        return recommend_hybrid(df, mat, 10, top_n=3, incidence=build_incidence(df), **kwargs)
+
+    def test_explanations_follow_rows_not_index_labels(self):
+        expected = self.recommend(pool())
+        self.assertEqual(expected["id"].tolist(), [40, 20, 30])
+        for index in ([7, 3, 9, 1], ["a", "b", "c", "d"], [5, 5, 6, 6]):
+            df = pool()
+            df.index = index
+            out = self.recommend(df)
+            self.assertEqual(out["id"].tolist(), expected["id"].tolist(), index)
+            self.assertEqual(out["why"].tolist(), expected["why"].tolist(), index)
+            np.testing.assert_allclose(out["hybrid_score"], expected["hybrid_score"])
+        self.assertEqual(expected["why"].iloc[0],
+                         "Shared genres: Action, Sci-Fi · Shared keywords: heist · Same director")
+
+    def test_overlap_term_adds_to_scores(self):
+        base = self.recommend(pool())
+        boosted = self.recommend(pool(), w_overlap=1.0)
+        scores = dict(zip(base["id"], base["hybrid_score"]))
+        for mid, score in zip(boosted["id"], boosted["hybrid_score"]):
+            self.assertGreaterEqual(score, scores[mid])
+        self.assertEqual(boosted["id"].tolist()[:2], [40, 20])
+
+    def test_unknown_seed(self):
+        _, mat = fit_tfidf(pool())
+        self.assertTrue(recommend_hybrid(pool(), mat, 999).empty)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,57 @@
+# tests/test_profiler.py
+import contextlib
+import io
+import shutil
+import tempfile
+import time
+import unittest
+
+from profiler import RerunProfiler, _list, load_capture
+
+
+def busy(seconds):
+    end = time.time() + seconds
+    while time.time() < end:
+        pass
+
+
+class TestRerunProfiler(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def listing(self):
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            _list(self.dir)
+        return out.getvalue()
+
+    def test_complete_capture(self):
+        profiler = RerunProfiler(interval=0.001).start()
+        profiler.annotate(scope="search tab")
+        busy(0.05)
+        cap = load_capture(profiler.save(self.dir))
+        self.assertGreater(cap["samples"], 0)
+        self.assertEqual(cap["meta"], {"scope": "search tab"})
+        self.assertNotIn("interrupted", self.listing())
+
+    def test_interrupted_capture_keeps_partial_sample(self):
+        profiler = RerunProfiler(interval=0.001).start()
+        with self.assertRaises(RuntimeError):
+            try:
+                busy(0.05)
+                raise RuntimeError("rerun")
+            finally:
+                path = profiler.save(self.dir, interrupted=True)
+        cap = load_capture(path)
+        self.assertTrue(cap["meta"]["interrupted"])
+        self.assertGreater(cap["samples"], 0)
+        self.assertTrue(any("busy" in stack for stack in cap["stacks"]))
+        self.assertIn("(interrupted)", self.listing())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,136 @@
+# tests/test_title_index.py
+import os
+import tempfile
+import unittest
+
+from catalog import Catalog
+from title_index import TitleIndex, fold, search_response
+
+# id -> (title, popularity)
+TITLES = {
+    1: ("The Shawshank Redemption", 80.0),
+    2: ("Amélie", 30.0),
+    3: ("Schindler's List", 50.0),
+    4: ("Alien", 60.0),
+    5: ("Aliens", 40.0),
+    6: ("Alien: Covenant", 90.0),
+    7: ("Star Wars", 100.0),
+    8: ("Star Trek", 70.0),
+    9: ("The Star", 5.0),
+    10: ("Ōkami", 1.0),
+}
+
+
+def build():
+    ids = sorted(TITLES)
+    return TitleIndex(ids, [TITLES[i][0] for i in ids], [TITLES[i][1] for i in ids])
+
+
+class TestFold(unittest.TestCase):
+
+    def test_accents_case_and_punctuation(self):
+        self.assertEqual(fold("Amélie (2001)"), "amelie 2001")
+        self.assertEqual(fold("ŌKAMI"), "okami")
+        self.assertEqual(fold("Alien: Covenant"), "alien covenant")
+        self.assertEqual(fold("  WALL·E  "), "wall e")
+
+    def test_possessives_join_elisions_split(self):
+        self.assertEqual(fold("Schindler's List"), "schindlers list")
+        self.assertEqual(fold("Schindler’s List"), "schindlers list")
+        self.assertEqual(fold("Le Fabuleux Destin d'Amélie Poulain"), "le fabuleux destin d amelie poulain")
+
+    def test_empty(self):
+        self.assertEqual(fold(""), "")
+        self.assertEqual(fold(None), "")
+        self.assertEqual(fold("?!"), "")
+
+
+class TestTitleIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.index = build()
+
+    def test_exact_title_then_startswith_then_popularity(self):
+        # "Alien" is exact; both other titles start with "alien" and go by popularity
+        self.assertEqual(self.index.search("alien"), [4, 6, 5])
+        # "The Star" only has a word starting with "star"
+        self.assertEqual(self.index.search("star"), [7, 8, 9])
+        self.assertEqual(self.index.search("the star"), [9])
+
+    def test_every_query_word_is_a_prefix(self):
+        self.assertEqual(self.index.search("star w"), [7])
+        self.assertEqual(self.index.search("wars star"), [7])
+        self.assertEqual(self.index.search("the s"), [1, 9])
+        self.assertEqual(self.index.prefix(["star", "x"], 10), [])
+        self.assertEqual(self.index.match("star x")[1], "fuzzy")
+
+    def test_folded_queries(self):
+        self.assertEqual(self.index.search("AMELIE"), [2])
+        self.assertEqual(self.index.search("okami"), [10])
+        self.assertEqual(self.index.search("schindler's"), [3])
+        self.assertEqual(self.index.search("schindl"), [3])
+
+    def test_limit(self):
+        # titles starting with "s" outrank the more popular "The Shawshank..."
+        self.assertEqual(self.index.search("s", limit=3), [7, 8, 3])
+
+    def test_match_kind(self):
+        self.assertEqual(self.index.match("alien"), ([4, 6, 5], "prefix"))
+        self.assertEqual(self.index.match("zzzz"), ([], None))
+        self.assertEqual(self.index.match("  "), ([], None))
+
+    def test_trigram_fallback_for_misspellings(self):
+        ids, kind = self.index.match("shawshnk")
+        self.assertEqual(kind, "fuzzy")
+        self.assertEqual(ids[:1], [1])
+        self.assertEqual(self.index.search("amelei poulain"), [])  # too few shared trigrams
+        self.assertEqual(self.index.search("schindlr list")[:1], [3])
+
+    def test_word_longer_than_any_indexed_word(self):
+        # numpy would truncate the key to the array's itemsize ("redemption")
+        longest = max(len(w) for t, _ in TITLES.values() for w in fold(t).split())
+        word = "redemption" + "x" * 3
+        self.assertGreater(len(word), longest)
+        self.assertEqual(self.index._range(word), (0, 0))
+        self.assertNotEqual(self.index.match(word)[1], "prefix")
+        self.assertEqual(self.index.prefix(["the", word], 10), [])
+
+    def test_empty_index(self):
+        index = TitleIndex([], [], [])
+        self.assertEqual(len(index), 0)
+        self.assertEqual(index.match("alien"), ([], None))
+
+
+class TestCatalogSearch(unittest.TestCase):
+
+    def setUp(self):
+        self.catalog = Catalog(os.path.join(tempfile.mkdtemp(), "catalog"))
+        self.catalog.ingest([self.movie(mid) for mid in TITLES])
+
+    def movie(self, mid, title=None):
+        return {"id": mid, "title": title or TITLES[mid][0], "popularity": TITLES.get(mid, ("", 1.0))[1]}
+
+    def test_search_response_shape(self):
+        res = self.catalog.search_titles("alien")
+        self.assertEqual(res["match"], "prefix")
+        self.assertEqual([m["id"] for m in res["results"]], [4, 6, 5])
+        self.assertEqual(res["total_results"], 3)
+        self.assertEqual(
+            set(res["results"][0]),
+            {"id", "title", "overview", "release_date", "poster_path", "popularity",
+             "vote_average", "vote_count", "original_language", "genre_ids"},
+        )
+        self.assertEqual(self.catalog.search_titles("shawshnk")["match"], "fuzzy")
+        self.assertEqual(search_response([])["results"], [])
+
+    def test_old_index_serves_until_rebuild_finishes(self):
+        old = self.catalog.title_index()
+        self.catalog.ingest([self.movie(11, "Alien Resurrection")])
+        self.assertIs(self.catalog.title_index(), old)
+
+        self.catalog.wait()
+        self.assertIn(11, self.catalog.title_index().search("alien resurrection"))
+
+
+if __name__ == "__main__":
+    unittest.main()
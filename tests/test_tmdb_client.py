@@ -0,0 +1,123 @@
+# tests/test_tmdb_client.py
+import os
+import threading
+import unittest
+from unittest import mock
+
+import features
+import tmdb_client
+from tmdb_client import DETAILS_PARAMS, _cache_key, movie_details, tmdb_get, transfer_report
+from tmdb_standin import serve
+
+
+class StandInTest(unittest.TestCase):
+    """Talks to the offline stand-in over real HTTP, with a fresh cache and counters."""
+
+    def setUp(self):
+        self.server, self.standin, self.served, base_url = serve(n=40)
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        for patcher in (
+            mock.patch.object(tmdb_client, "BASE_URL", base_url),
+            mock.patch.dict(os.environ, {"TMDB_API_KEY": "offline"}),
+            mock.patch.object(tmdb_client, "_cache", tmdb_client.OrderedDict()),
+            mock.patch.dict(tmdb_client._transfer_stats, dict.fromkeys(tmdb_client._transfer_stats, 0)),
+            mock.patch.dict(tmdb_client._projection_stats, dict.fromkeys(tmdb_client._projection_stats, 0)),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def expire(self, path, params=None):
+        key = _cache_key(path, dict(params or {}))
+        tmdb_client._cache[key] = (0.0,) + tmdb_client._cache[key][1:]
+
+
+class TestTransfer(StandInTest):
+
+    def test_gzip_wire_bytes(self):
+        data = tmdb_get("/movie/1")
+        self.assertEqual(data["id"], 1)
+        report = transfer_report()
+        self.assertEqual(report["requests"], 1)
+        self.assertEqual(report["full_responses"], 1)
+        self.assertEqual(report["wire_bytes"], self.served["bytes_sent"])  # compressed size on the wire
+        self.assertGreater(report["decoded_bytes"], report["wire_bytes"])
+        self.assertLess(report["compression_ratio"], 1.0)
+
+    def test_expired_entry_is_revalidated_with_304(self):
+        first = tmdb_get("/movie/2")
+        wire = transfer_report()["wire_bytes"]
+        self.expire("/movie/2")
+
+        self.assertIs(tmdb_get("/movie/2"), first)
+        report = transfer_report()
+        self.assertEqual((report["requests"], report["not_modified"]), (2, 1))
+        self.assertEqual(report["wire_bytes"], wire)
+        self.assertEqual(report["bytes_saved_by_304"], wire)
+        self.assertGreater(tmdb_client.cache_ttl_remaining("/movie/2"), 3000)  # TTL renewed
+
+    def test_changed_resource_is_downloaded_again(self):
+        tmdb_get("/movie/3")
+        self.standin.churn(1.0)
+        self.expire("/movie/3")
+        self.assertEqual(tmdb_get("/movie/3")["vote_count"], self.standin.movies[3]["vote_count"])
+        report = transfer_report()
+        self.assertEqual((report["full_responses"], report["not_modified"]), (2, 0))
+
+    def test_stale_schema_is_refetched_in_full(self):
+        self.assertEqual(movie_details(4)["_schema"], features.DETAILS_SCHEMA_VERSION)
+        newer = features.DETAILS_SCHEMA_VERSION + 1
+        with mock.patch.object(features, "DETAILS_SCHEMA_VERSION", newer), \
+                mock.patch.object(tmdb_client, "DETAILS_SCHEMA_VERSION", newer):
+            det = movie_details(4)
+        self.assertEqual(det["_schema"], newer)
+        self.assertEqual(self.served.get(304, 0), 0)  # no validators sent, so no 304
+        self.assertIs(tmdb_get("/movie/4", DETAILS_PARAMS), det)
+
+
+
+class TestCache(StandInTest):
+
+    def test_hits_within_ttl_skip_the_network(self):
+        first = tmdb_get("/movie/5")
+        self.assertIs(tmdb_get("/movie/5"), first)
+        self.assertEqual(transfer_report()["requests"], 1)
+        self.assertGreater(tmdb_client.cache_ttl_remaining("/movie/5"), 3000)
+        self.assertIsNone(tmdb_client.cache_ttl_remaining("/movie/6"))
+
+    def test_expired_entries_are_fetched_again(self):
+        with mock.patch.object(tmdb_client, "CACHE_TTL", 0):
+            tmdb_get("/movie/5")
+            self.assertLessEqual(tmdb_client.cache_ttl_remaining("/movie/5"), 0)
+            tmdb_get("/movie/5")
+        self.assertEqual(transfer_report()["requests"], 2)
+
+    def test_least_recently_used_entries_are_evicted(self):
+        with mock.patch.object(tmdb_client, "CACHE_MAX_ENTRIES", 3):
+            for mid in (1, 2, 3):
+                tmdb_get(f"/movie/{mid}")
+            tmdb_get("/movie/1")  # hit: 1 becomes the most recently used
+            tmdb_get("/movie/4")
+        cached = {key[0] for key in tmdb_client._cache}
+        self.assertEqual(cached, {"/movie/1", "/movie/3", "/movie/4"})
+        self.assertEqual(transfer_report()["requests"], 4)
+
+    def test_counters_add_up_under_concurrency(self):
+        def worker(mids):
+            for mid in mids:
+                tmdb_client.movie_details(mid)
+
+        threads = [threading.Thread(target=worker, args=(range(1 + t, 41, 4),)) for t in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        report = transfer_report()
+        self.assertEqual(report["requests"], 40)
+        self.assertEqual(report["full_responses"], 40)
+        self.assertEqual(report["wire_bytes"], self.served["bytes_sent"])
+        self.assertEqual(tmdb_client.projection_report()["movies"], 40)
+
+
+if __name__ == "__main__":
+    unittest.main()